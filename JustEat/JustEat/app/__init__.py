@@ -2,12 +2,15 @@ from flask import Flask
 from flask_login import current_user
 
 from app.blueprints import auth_bp, customer_bp, restaurant_bp
+from app.commands import register_commands
 from app.config import configs
 from app.extensions import csrf, db, login_manager, migrate, moment
 from app.logging_config import setup_logging
 
 # Import services to register decorators
 from app.services import auth_service  # This registers the user_loader
+from app.services import autocomplete_service, search_cache, search_index, trending_service
+from app.services import order_event_service
 
 
 def create_app(config: str = "development") -> Flask:
@@ -22,9 +25,16 @@ def create_app(config: str = "development") -> Flask:
     # Register blueprints
     register_blueprints(app)
 
+    # Register CLI commands
+    register_commands(app)
+
     # Setup logging
     setup_logging(app)
 
+    # Build in-memory search indexes
+    autocomplete_service.init_app(app)
+    trending_service.init_app(app)
+
     return app
 
 
@@ -40,6 +50,9 @@ def initialize_extensions(app: Flask) -> None:
     login_manager.init_app(app)
     migrate.init_app(app, db)
     moment.init_app(app)
+    search_index.init_app(app)
+    search_cache.init_app(app)
+    order_event_service.init_app(app)
 
 
 def register_blueprints(app: Flask) -> None:
@@ -1,7 +1,8 @@
-from flask import flash, redirect, render_template, request, url_for, jsonify
+from flask import Response, current_app, flash, redirect, render_template, request, url_for, jsonify
 from flask_login import current_user, login_required
 
 from app.decorators import (
+    idempotent_checkout,
     item_exists,
     order_exists,
     order_from_customer,
@@ -9,12 +10,16 @@ from app.decorators import (
     validate_cart_before_order,
 )
 from app.services import (
+    autocomplete_service as autocomplete_svc,
     cart_service as cart_svc,
     favorite_service as favorite_svc,
+    geo_index,
     menu_item_service as menu_item_svc,
+    order_event_service as order_event_svc,
     order_service as order_svc,
     restaurant_service as restaurant_svc,
     search_service as search_svc,
+    trending_service as trending_svc,
 )
 
 from . import customer_bp
@@ -29,24 +34,49 @@ def home():
     restaurant_ids = request.args.getlist("restaurant") 
     price_min = request.args.get("price_min", type=float)
     price_max = request.args.get("price_max", type=float)
+    cursor = request.args.get("cursor")
+    top_rated = request.args.get("sort") == "top_rated"
+    near = geo_index.parse_near(
+        request.args.get("lat", type=float),
+        request.args.get("lng", type=float),
+        request.args.get("radius", default=current_app.config["NEAR_ME_RADIUS_KM"], type=float),
+    )
     
     # Get filtered restaurants if filters are applied
-    if cuisine_ids or restaurant_ids or price_min or price_max:
+    if cuisine_ids or restaurant_ids or price_min or price_max or near:
         restaurants, _ = search_svc.get_filtered_search_results(
             query=None,
             cuisine_ids=cuisine_ids,
             restaurant_ids=restaurant_ids,
             price_min=price_min,
-            price_max=price_max
+            price_max=price_max,
+            restaurant_cursor=cursor,
+            near=near,
+            # The home page lists restaurants only
+            with_menu_items=False,
         )
     else:
-        restaurants = restaurant_svc.get_all_restaurants()
+        restaurants = restaurant_svc.get_all_restaurants(cursor, top_rated=top_rated)
     
     cuisines = [(c.id, c.name, c.image) for c in restaurant_svc.get_all_cuisines()]
+
+    # Restaurant counts for every filter option, cached between catalogue writes
+    facets = search_svc.get_search_facets(
+        query=None,
+        cuisine_ids=cuisine_ids,
+        restaurant_ids=restaurant_ids,
+        price_min=price_min,
+        price_max=price_max,
+    )
     
+    # Trending now, ranked from the in-memory sketches
+    trending_limit = current_app.config["TRENDING_HOME_LIMIT"]
+    trending_items = trending_svc.get_trending_items(trending_limit)
+    trending_restaurants = trending_svc.get_trending_restaurants(trending_limit)
+
     # Get all cuisines and restaurants for filter options
     all_cuisines = restaurant_svc.get_all_cuisines()
-    all_restaurants = restaurant_svc.get_all_restaurants()
+    all_restaurants = restaurant_svc.get_restaurant_filter_options()
 
     # Cart data for header display
     cart_summary = cart_svc.get_cart_summary(current_user)
@@ -63,6 +93,9 @@ def home():
         cuisines=cuisines,
         all_cuisines=all_cuisines,
         all_restaurants=all_restaurants,
+        facets=facets,
+        trending_items=trending_items,
+        trending_restaurants=trending_restaurants,
         cart=cart,
         cart_summary=cart_summary,
         user_favorites=user_favorites,
@@ -72,6 +105,8 @@ def home():
         selected_restaurants=restaurant_ids,
         price_min=price_min,
         price_max=price_max,
+        near=near,
+        top_rated=top_rated,
     )
 
 
@@ -120,7 +155,7 @@ def restaurant_reviews(restaurant, **kwargs):
     cart_summary = cart_svc.get_cart_summary(current_user)
     cart = cart_svc.get_user_cart(current_user)
 
-    reviews = order_svc.get_reviews(restaurant.id)
+    reviews = order_svc.get_reviews(restaurant.id, request.args.get("cursor"))
     
     # Check if restaurant is favorited by current user
     is_favorited = False
@@ -178,15 +213,17 @@ def remove_from_cart(slug, item, **kwargs):
 
 
 @customer_bp.route("/cart/place-order", methods=["POST"])
+@idempotent_checkout
 @validate_cart_before_order
-def place_order(cart):
+def place_order(cart, idempotency_key=None):
     """
     Process order placement from cart contents.
 
     Args:
         cart (Cart): Validated cart object from decorator
+        idempotency_key (str): Claimed checkout key, if the client sent one
     """
-    order_svc.place_order(current_user, cart)
+    order_svc.place_order(current_user, cart, idempotency_key)
     flash("Order placed successfully!", "success")
     return redirect(url_for("customer.home"))
 
@@ -198,7 +235,7 @@ def view_orders():
     cart_summary = cart_svc.get_cart_summary(current_user)
 
     status = request.args.get("status")
-    orders = order_svc.get_orders(current_user, status)
+    orders = order_svc.get_orders(current_user, status, request.args.get("cursor"))
 
     return render_template(
         "customer/view_orders.html",
@@ -208,6 +245,39 @@ def view_orders():
     )
 
 
+@customer_bp.route("/orders/stream")
+def order_stream():
+    """Stream status changes of the customer's orders as Server-Sent Events.
+
+    The order history page listens to this instead of being reloaded to
+    see whether an order has been delivered.
+    """
+    events = order_event_svc.stream(
+        order_event_svc.customer_topic(current_user.id),
+        request.headers.get("Last-Event-ID"),
+    )
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        # Keep proxies from caching or buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@customer_bp.route("/orders/<int:order_id>/card")
+@order_exists
+@order_from_customer
+def order_card(order_id, order, **kwargs):
+    """
+    Render the history card of a single order.
+
+    Args:
+        order_id (int): ID of order to render
+        order (Order): Order object from decorator
+    """
+    return render_template("partials/_customer_order_card.html", order=order)
+
+
 @customer_bp.route("/search")
 def search():
     """Handle restaurant and menu item searches."""
@@ -219,13 +289,42 @@ def search():
     cart_summary = cart_svc.get_cart_summary(current_user)
     cart = cart_svc.get_user_cart(current_user)
 
-    # Get search results
-    restaurants, menu_items = search_svc.get_filtered_search_results(query=query)
+    # Get filter parameters if any
+    cuisine_ids = request.args.getlist("cuisine")
+    price_min = request.args.get("price_min", type=float)
+    price_max = request.args.get("price_max", type=float)
+    filters = dict(cuisine_ids=cuisine_ids, price_min=price_min, price_max=price_max)
+
+    # Get search results, each section paged independently
+    restaurant_cursor = request.args.get("restaurant_cursor")
+    menu_item_cursor = request.args.get("item_cursor")
+    restaurants, menu_items = search_svc.get_filtered_search_results(
+        query=query,
+        restaurant_cursor=restaurant_cursor,
+        menu_item_cursor=menu_item_cursor,
+        **filters,
+    )
+
+    # Retry misspelled queries with the closest known words
+    suggestion = None
+    if not restaurants and not menu_items and not (restaurant_cursor or menu_item_cursor):
+        suggestion = search_svc.get_search_suggestion(query)
+        if suggestion:
+            restaurants, menu_items = search_svc.get_filtered_search_results(
+                query=suggestion, **filters
+            )
+
+    # Restaurant counts for the filter options of the query actually shown
+    facets = search_svc.get_search_facets(query=suggestion or query, **filters)
+    cuisines = restaurant_svc.get_all_cuisines()
     
     # Get popular item IDs for search results
     popular_item_ids = set()
     if menu_items:
         popular_item_ids = menu_item_svc.get_popular_item_ids_for_search(menu_items)
+    trending_item_ids = trending_svc.trending_item_ids(
+        current_app.config["TRENDING_CAPACITY"] // 10
+    )
     
     # Get user's favorites for showing heart icons
     user_favorites = []
@@ -239,11 +338,36 @@ def search():
         restaurants=restaurants,
         menu_items=menu_items,
         popular_item_ids=popular_item_ids,
+        trending_item_ids=trending_item_ids,
         user_favorites=user_favorites,
-        query=query
+        query=query,
+        suggestion=suggestion,
+        facets=facets,
+        cuisines=cuisines,
+        selected_cuisines=cuisine_ids,
+        price_min=price_min,
+        price_max=price_max,
     )
 
 
+@customer_bp.route("/search/suggest")
+def search_suggestions():
+    """Return typeahead suggestions for the search box as JSON."""
+    prefix = request.args.get("q", "")
+    suggestions = []
+
+    for suggestion in autocomplete_svc.suggest(prefix):
+        if suggestion.kind == autocomplete_svc.RESTAURANT:
+            url = url_for("customer.restaurant_info", slug=suggestion.ref)
+        else:
+            url = url_for("customer.search", q=suggestion.label)
+        suggestions.append(
+            {"label": suggestion.label, "type": suggestion.kind, "url": url}
+        )
+
+    return jsonify({"query": prefix, "suggestions": suggestions})
+
+
 @customer_bp.route("/orders/<int:order_id>/review", methods=["GET", "POST"])
 @order_exists
 @order_from_customer
@@ -5,6 +5,7 @@ from flask_wtf.file import FileAllowed, FileField
 from wtforms import (
     BooleanField,
     DecimalField,
+    FloatField,
     SelectField,
     SelectMultipleField,
     StringField,
@@ -12,7 +13,7 @@ from wtforms import (
     TextAreaField,
     TimeField,
 )
-from wtforms.validators import DataRequired, Length, Optional
+from wtforms.validators import DataRequired, Length, NumberRange, Optional
 
 
 class RestaurantForm(FlaskForm):
@@ -29,6 +30,16 @@ class RestaurantForm(FlaskForm):
         validators=[DataRequired(), Length(max=200)],
         description="Physical address of the restaurant",
     )
+    latitude = FloatField(
+        "Latitude",
+        validators=[Optional(), NumberRange(min=-90, max=90)],
+        description="Used to show the restaurant in nearby searches",
+    )
+    longitude = FloatField(
+        "Longitude",
+        validators=[Optional(), NumberRange(min=-180, max=180)],
+        description="Used to show the restaurant in nearby searches",
+    )
 
     # Operating Hours
     opening_time = TimeField(
@@ -1,4 +1,6 @@
-from flask import flash, redirect, render_template, url_for
+from datetime import date
+
+from flask import Response, flash, redirect, render_template, request, url_for
 
 from app.decorators import (
     order_exists,
@@ -6,6 +8,7 @@ from app.decorators import (
     restaurant_exists,
     order_for_restaurant,
 )
+from app.services import order_event_service as order_event_svc
 from app.services import order_service as order_svc
 from app.services import restaurant_service as restaurant_svc
 
@@ -16,7 +19,7 @@ from . import restaurant_bp
 @restaurant_exists
 @owns_restaurant
 def view_orders(slug, restaurant):
-    """Display all orders for a restaurant.
+    """Display one page of a restaurant's orders, optionally filtered.
 
     Args:
         slug: Restaurant URL identifier
@@ -25,7 +28,13 @@ def view_orders(slug, restaurant):
     Returns:
         Rendered template with orders list
     """
-    orders = order_svc.get_restaurant_orders(restaurant.id)
+    orders = order_svc.get_restaurant_orders(
+        restaurant.id,
+        status=request.args.get("status"),
+        date_from=request.args.get("from", type=date.fromisoformat),
+        date_to=request.args.get("to", type=date.fromisoformat),
+        cursor=request.args.get("cursor"),
+    )
 
     return render_template(
         "restaurants/view_orders.html",
@@ -35,6 +44,57 @@ def view_orders(slug, restaurant):
     )
 
 
+@restaurant_bp.route("/<string:slug>/orders/stream", methods=["GET"])
+@restaurant_exists
+@owns_restaurant
+def order_stream(slug, restaurant):
+    """Stream a restaurant's new orders and status changes as Server-Sent Events.
+
+    The order board opens one of these instead of being reloaded, and
+    fetches the card of each order it is told about.
+
+    Args:
+        slug: Restaurant URL identifier
+        restaurant: Restaurant object from decorator
+
+    Returns:
+        Long-lived ``text/event-stream`` response
+    """
+    events = order_event_svc.stream(
+        order_event_svc.restaurant_topic(restaurant.id),
+        request.headers.get("Last-Event-ID"),
+    )
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        # Keep proxies from caching or buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@restaurant_bp.route("/<string:slug>/orders/<int:order_id>/card", methods=["GET"])
+@restaurant_exists
+@owns_restaurant
+@order_exists
+@order_for_restaurant
+def order_card(order_id, order, **kwargs):
+    """Render the board card of a single order.
+
+    Args:
+        order_id: ID of order to render
+        order: Order object from decorator
+        **kwargs: Additional route parameters
+
+    Returns:
+        HTML fragment of the order card
+    """
+    return render_template(
+        "partials/_restaurant_order_card.html",
+        order=order,
+        restaurant=kwargs.get("restaurant"),
+    )
+
+
 @restaurant_bp.route(
     "/<string:slug>/orders/<int:order_id>/<string:status>", methods=["POST"]
 )
@@ -56,7 +116,10 @@ def update_order_status(order_id, status, order, **kwargs):
     """
     slug = kwargs.get("slug")
 
-    if not order_svc.update_order_status(order, status):
+    # Version the page was rendered with, so a stale tab cannot overwrite
+    # a status another tab already changed
+    version = request.form.get("version", type=int)
+    if not order_svc.update_order_status(order, status, version):
         flash("Failed to update order status", "danger")
     else:
         flash("Order status updated successfully", "success")
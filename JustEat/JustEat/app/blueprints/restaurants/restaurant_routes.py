@@ -1,4 +1,4 @@
-from flask import flash, redirect, render_template, url_for
+from flask import flash, redirect, render_template, request, url_for
 from flask_login import current_user
 
 from app.decorators.restaurant_decorators import owns_restaurant, restaurant_exists
@@ -33,6 +33,8 @@ def create():
             location=form.location.data,
             opening_time=form.opening_time.data,
             closing_time=form.closing_time.data,
+            latitude=form.latitude.data,
+            longitude=form.longitude.data,
         )
 
         if restaurant:
@@ -119,6 +121,8 @@ def edit_details(slug, restaurant):
             location=form.location.data,
             opening_time=form.opening_time.data,
             closing_time=form.closing_time.data,
+            latitude=form.latitude.data,
+            longitude=form.longitude.data,
         ):
             flash("Restaurant details updated successfully", "success")
             return redirect(url_for("restaurant.view_menu", slug=restaurant.slug))
@@ -136,8 +140,8 @@ def edit_details(slug, restaurant):
 @restaurant_exists
 @owns_restaurant
 def view_reviews(restaurant, **kwargs):
-    """Display all restaurant reviews."""
-    reviews = order_svc.get_reviews(restaurant.id)
+    """Display restaurant reviews one page at a time."""
+    reviews = order_svc.get_reviews(restaurant.id, request.args.get("cursor"))
     return render_template(
         "restaurants/reviews.html",
         restaurant=restaurant,
@@ -0,0 +1,108 @@
+import json
+import time
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+from app.extensions import db
+from app.services import outbox_service, popularity_service, rating_service
+from app.services import search_index, trigram_index
+
+search_cli = AppGroup("search", help="Manage the search index.")
+
+
+@search_cli.command("rebuild")
+def rebuild_search_index():
+    """Create the search index if missing and repopulate it."""
+    search_index.rebuild_index()
+    trigram_index.rebuild_vocabulary()
+    click.echo("Search index rebuilt.")
+
+
+popularity_cli = AppGroup("popularity", help="Manage the hourly sales counters.")
+
+
+@popularity_cli.command("rebuild")
+def rebuild_popularity():
+    """Recompute the sales counters from order history."""
+    count = popularity_service.rebuild()
+    click.echo(f"Rebuilt {count} hourly sales buckets.")
+
+
+@popularity_cli.command("refresh")
+@click.option("--hours", type=int, help="Window length in hours.")
+def refresh_popularity(hours):
+    """Recompute the rolling sales totals search ranks by."""
+    count = popularity_service.refresh_recent_sales(hours)
+    click.echo(f"Refreshed recent sales of {count} rows.")
+
+
+@popularity_cli.command("prune")
+@click.option("--days", type=int, help="Days of counters to keep.")
+def prune_popularity(days):
+    """Delete sales counters older than the retention period."""
+    count = popularity_service.prune(days)
+    click.echo(f"Deleted {count} hourly sales buckets.")
+
+
+ratings_cli = AppGroup("ratings", help="Maintain rating aggregates.")
+
+
+@ratings_cli.command("reconcile")
+@click.option("--chunk-size", type=int, help="Rows recomputed per transaction.")
+@click.option("--dry-run", is_flag=True, help="Report drifted rows without fixing them.")
+@click.option("--verbose", "-v", is_flag=True, help="List the ids of drifted rows.")
+def reconcile_ratings(chunk_size, dry_run, verbose):
+    """Recompute rating aggregates from the raw rating tables."""
+    corrected = rating_service.reconcile(chunk_size, dry_run=dry_run)
+    action = "Found" if dry_run else "Corrected"
+    for label, ids in corrected.items():
+        click.echo(f"{action} {len(ids)} {label.replace('_', ' ')}.")
+        if verbose and ids:
+            click.echo("  ids: " + ", ".join(map(str, ids)))
+
+
+outbox_cli = AppGroup("outbox", help="Read and trim the event outbox.")
+
+
+@outbox_cli.command("tail")
+@click.option("--after", type=int, default=0, help="Offset of the last event already read.")
+@click.option("--batch-size", type=int, help="Events read per query.")
+@click.option("--topic", "topics", multiple=True, help="Only events of this topic.")
+@click.option("--follow", "-f", is_flag=True, help="Keep polling for new events.")
+@click.option("--interval", type=float, default=1.0, help="Seconds between polls with --follow.")
+def tail_outbox(after, batch_size, topics, follow, interval):
+    """Print events after an offset as JSON lines."""
+    while True:
+        for batch in outbox_service.tail(after, batch_size, topics):
+            for event in batch:
+                click.echo(json.dumps(outbox_service.as_message(event)))
+            after = batch[-1].id
+        if not follow:
+            break
+        # Start a new transaction so the next read sees newly committed events
+        db.session.rollback()
+        time.sleep(interval)
+    click.echo(f"Next offset: {after}", err=True)
+
+
+@outbox_cli.command("prune")
+@click.option("--days", type=int, help="Days of events to keep.")
+def prune_outbox(days):
+    """Delete events older than the retention period."""
+    count = outbox_service.prune(days)
+    click.echo(f"Deleted {count} outbox events.")
+
+
+def register_commands(app: Flask) -> None:
+    """
+    Register custom CLI command groups.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    app.cli.add_command(search_cli)
+    app.cli.add_command(popularity_cli)
+    app.cli.add_command(ratings_cli)
+    app.cli.add_command(outbox_cli)
@@ -6,6 +6,71 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "not so secure key")
     # Disable SQLAlchemy event system for performance
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Search index backend: "auto" (FTS5 on SQLite), "fts5" or "like"
+    SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "auto")
+    # Minimum trigram similarity for typo-tolerant suggestions (0-1)
+    SEARCH_FUZZY_THRESHOLD = 0.3
+    # Number of ranked results returned per search page
+    SEARCH_RESULT_LIMIT = 50
+    # Rows per page for restaurant and order listings
+    PAGE_SIZE = 20
+    # Max age (seconds) of the in-process autocomplete index before a refresh
+    AUTOCOMPLETE_REFRESH_SECONDS = 300
+    # Serve typeahead from the in-process index; False reads the indexed name columns
+    AUTOCOMPLETE_IN_MEMORY = True
+    # Window (days) of order volume counted towards search ranking, kept in the
+    # recent_sales columns and trimmed by `flask popularity refresh`
+    SEARCH_RECENT_ORDER_DAYS = 7
+    # Relative weight of each ranking component
+    SEARCH_RANKING_WEIGHTS = {"match": 2.0, "rating": 1.0, "popularity": 1.0}
+    # Lower edges of the price bands counted by search facets
+    SEARCH_PRICE_BUCKETS = (0, 10, 20, 50, 100)
+    # Cached search result pages (0 disables the cache) and their lifetime
+    SEARCH_CACHE_SIZE = 512
+    SEARCH_CACHE_TTL = 60
+    # Ranked ids kept per paged search so later pages keep the first page's order:
+    # ids per search, searches kept, and seconds a reader has to page through them
+    SEARCH_SNAPSHOT_SIZE = 500
+    SEARCH_SNAPSHOTS = 1024
+    SEARCH_SNAPSHOT_TTL = 900
+    # Default radius of "near me" restaurant searches
+    NEAR_ME_RADIUS_KM = 5.0
+    # Days of hourly sales counters kept for popularity and ranking
+    POPULARITY_RETENTION_DAYS = 30
+    # Outbox events returned per read, and days of events kept by `flask outbox prune`
+    # (consumers further behind than that lose the events they have not read)
+    OUTBOX_BATCH_SIZE = 500
+    OUTBOX_RETENTION_DAYS = 7
+    # Seconds before an outbox event is handed to consumers; must exceed the
+    # longest transaction that writes events, plus clock skew between workers
+    OUTBOX_SETTLE_SECONDS = 5
+    # Window (hours) and minimum units sold for the "Mostly Ordered" badge
+    POPULAR_WINDOW_HOURS = 24
+    POPULAR_MIN_QUANTITY = 1
+    # Trending decay half-lives in hours by name, and the one shown by default.
+    # Not hard windows: under "24h" a sale from a day ago still counts half
+    TRENDING_WINDOWS = {"1h": 1, "24h": 24, "7d": 168}
+    TRENDING_WINDOW = "24h"
+    # Counters kept per trending sketch, bounding its memory
+    TRENDING_CAPACITY = 200
+    # Trending dishes and restaurants shown on the home page
+    TRENDING_HOME_LIMIT = 8
+    # Bayesian ranking prior: unrated places score the mean, and it weighs as
+    # much as this many ratings against their own
+    RATING_PRIOR_MEAN = 3.5
+    RATING_PRIOR_WEIGHT = 10
+    # Seconds a checkout idempotency key is remembered
+    IDEMPOTENCY_KEY_TTL = 600
+    # Restaurants or menu items recomputed per transaction by `flask ratings reconcile`
+    RATING_RECONCILE_CHUNK_SIZE = 1000
+    # Live order streams: seconds between keep-alive comments, seconds before a
+    # stream is closed for the browser to reconnect, and the reconnect delay (ms).
+    # Each open stream holds a server thread, see gunicorn.conf.py
+    ORDER_STREAM_HEARTBEAT = 15
+    ORDER_STREAM_MAX_SECONDS = 300
+    ORDER_STREAM_RETRY_MS = 3000
+    # Events buffered per live listener before it is told to reload instead
+    ORDER_STREAM_QUEUE_SIZE = 100
 
 
 # Configuration for development environment
@@ -34,6 +99,7 @@ class TestingConfig(Config):
         os.environ.get("TEST_DATABASE_URI") or "sqlite:///:memory:"
     )
     WTF_CSRF_ENABLED = False  # Disable CSRF for testing forms easily
+    OUTBOX_SETTLE_SECONDS = 0  # Hand events to consumers as soon as they commit
 
 
 # Dictionary to map config names to config classes
@@ -1,9 +1,10 @@
 from functools import wraps
 
-from flask import flash, redirect, url_for
+from flask import flash, redirect, request, url_for
 from flask_login import current_user
 
 from app.services import cart_service as cs
+from app.services import idempotency_service as idem
 
 
 def validate_cart_before_order(f):
@@ -18,7 +19,8 @@ def validate_cart_before_order(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        cart = cs.get_user_cart(current_user)
+        # Load the whole cart up front; checkout reads every line
+        cart = cs.get_checkout_cart(current_user)
 
         # Validate cart existence and contents
         if not cart or not cart.items:
@@ -40,4 +42,39 @@ def validate_cart_before_order(f):
 
         return f(*args, cart=cart, **kwargs)
 
+    return decorated_function
+
+
+def idempotent_checkout(f):
+    """Decorator making order placement safe to retry.
+
+    The key comes from an ``Idempotency-Key`` header or an
+    ``idempotency_key`` form field. The first request with a key places
+    the order; repeats (double clicks, network or proxy retries) are
+    answered with the original outcome without touching the cart. Must
+    wrap ``validate_cart_before_order``, since a retry finds the cart gone.
+
+    Returns:
+        function: Original route function for a new key, otherwise a redirect
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key") or request.form.get("idempotency_key")
+        if not key:
+            return f(*args, **kwargs)
+
+        claim = idem.claim(current_user.id, key)
+        if not claim.fresh:
+            if claim.order_id:
+                flash("Order placed successfully!", "success")
+                return redirect(url_for("customer.home"))
+            flash("Your order is already being placed.", "info")
+            return redirect(url_for("customer.view_orders"))
+
+        try:
+            return f(*args, idempotency_key=key, **kwargs)
+        finally:
+            # Let a retry through if this attempt placed no order
+            idem.release(current_user.id, key)
+
     return decorated_function
\ No newline at end of file
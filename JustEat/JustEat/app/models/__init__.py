@@ -1,6 +1,10 @@
 from .auth_model import *
 from .cart_model import *
 from .favorite_model import *
+from .idempotency_model import *
 from .order_model import *
+from .outbox_model import *
+from .popularity_model import *
 from .rating_model import *
 from .restaurant_model import *
+from .search_model import *
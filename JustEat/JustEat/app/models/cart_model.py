@@ -39,6 +39,11 @@ class Cart(db.Model):
         "CartItem", back_populates="cart", cascade="all, delete-orphan"
     )
 
+    @property
+    def checkout_key(self) -> str:
+        """Idempotency key for placing this cart: a cart becomes at most one order."""
+        return f"cart-{self.id}-{self.created_at.timestamp():.6f}"
+
 
 class CartItem(db.Model):
     """Represents an item in a shopping cart.
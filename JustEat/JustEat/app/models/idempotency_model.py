@@ -0,0 +1,36 @@
+from datetime import datetime as dt
+
+from app.extensions import db
+
+
+__all__ = ["IdempotencyKey"]
+
+
+class IdempotencyKey(db.Model):
+    """A client-supplied key claimed by one checkout.
+
+    The first request with a key inserts the row; retries of the same
+    submission hit the unique constraint and are answered from
+    ``order_id`` instead of placing the order again. Rows older than
+    IDEMPOTENCY_KEY_TTL are treated as absent and pruned.
+
+    Attributes:
+        id: Primary key
+        user_id: User who submitted the key
+        key: Client-supplied idempotency key, unique per user
+        order_id: Order placed under the key, None while in progress
+        created_at: When the key was claimed
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    key = db.Column(db.String(100), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id", ondelete="CASCADE"))
+    created_at = db.Column(db.DateTime, default=dt.now, nullable=False, index=True)
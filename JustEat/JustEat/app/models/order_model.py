@@ -12,6 +12,16 @@ class OrderStatus(Enum):
     DELIVERED = "delivered"
 
 
+# Statuses an order may move to from each status. A new step such as
+# "preparing" is added here and to OrderStatus; terminal statuses map to
+# an empty set.
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: frozenset({OrderStatus.DELIVERED, OrderStatus.CANCELLED}),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+}
+
+
 class Order(db.Model):
     """Represents a customer's food order.
 
@@ -23,6 +33,7 @@ class Order(db.Model):
         updated_at: Last status update timestamp
         total: Order total amount
         status: Current order state
+        version: Incremented on every status change, guards concurrent updates
         user: Relationship to User model
         restaurant: Relationship to Restaurant model
         items: List of ordered items
@@ -30,6 +41,20 @@ class Order(db.Model):
     """
 
     __tablename__ = "orders"
+    # Serve the restaurant order board and customer order history,
+    # filtered by status and paged by date
+    __table_args__ = (
+        db.Index(
+            "ix_orders_restaurant_status_created", "restaurant_id", "status", "created_at"
+        ),
+        # The unfiltered board, newest first by (created_at, id)
+        db.Index("ix_orders_restaurant_created", "restaurant_id", "created_at", "id"),
+        db.Index(
+            "ix_orders_customer_status_created", "customer_id", "status", "created_at"
+        ),
+        # The customer's full history, newest first by (created_at, id)
+        db.Index("ix_orders_customer_created", "customer_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -42,6 +67,7 @@ class Order(db.Model):
     total = db.Column(db.Numeric(10, 2), nullable=False)
 
     status = db.Column(db.Enum(OrderStatus), default=OrderStatus.PENDING)
+    version = db.Column(db.Integer, nullable=False, default=1)
 
     # Relationships
     user = db.relationship("User", back_populates="orders")
@@ -53,6 +79,11 @@ class Order(db.Model):
         "RestaurantRating", backref="order", uselist=False
     )
 
+    @property
+    def next_statuses(self) -> frozenset:
+        """Statuses this order can move to from its current one."""
+        return ORDER_TRANSITIONS.get(self.status, frozenset())
+
 
 class OrderItem(db.Model):
     """Represents an individual item within an order.
@@ -0,0 +1,41 @@
+from datetime import datetime as dt
+
+from app.extensions import db
+
+
+__all__ = ["OutboxEvent"]
+
+
+class OutboxEvent(db.Model):
+    """A change to orders, ratings or the catalogue, for downstream consumers.
+
+    Rows are written in the same transaction as the change they describe,
+    so an event exists exactly when its change was committed. ``id`` only
+    ever grows and serves as the event's offset: a consumer remembers the
+    last offset it processed and reads the rows after it. Offsets are
+    assigned at insert rather than commit, so consumers only read events
+    old enough that every earlier offset has committed or rolled back (see
+    ``outbox_service.read``).
+
+    Attributes:
+        id: Primary key, the event's offset
+        topic: Stream the event belongs to (orders, ratings or catalogue)
+        type: What happened, e.g. ``order.created``
+        key: Id of the changed order, restaurant or menu item
+        payload: JSON details of the change
+        created_at: When the event was written
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        db.Index("ix_outbox_events_topic_id", "topic", "id"),
+        # Never hand out the offset of a pruned event again
+        {"sqlite_autoincrement": True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(50), nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    key = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    created_at = db.Column(db.DateTime, default=dt.now, nullable=False, index=True)
@@ -0,0 +1,34 @@
+from app.extensions import db
+
+
+__all__ = ["ItemSalesBucket"]
+
+
+class ItemSalesBucket(db.Model):
+    """Units of a menu item sold within one hour.
+
+    Rows are bumped in place when an order is placed, so "sold in the last
+    24 hours" is a read of at most 24 rows per item instead of a scan of
+    recent order items. The primary key leads with the item for per-item
+    reads; the restaurant index serves per-restaurant reads.
+
+    Attributes:
+        menu_item_id: Menu item sold
+        bucket_start: Start of the hour the sales fall in
+        restaurant_id: Restaurant of the menu item (denormalized)
+        quantity: Units sold in the hour
+    """
+
+    __tablename__ = "item_sales_buckets"
+    __table_args__ = (
+        db.Index("ix_item_sales_buckets_restaurant_hour", "restaurant_id", "bucket_start"),
+    )
+
+    menu_item_id = db.Column(
+        db.Integer, db.ForeignKey("menu_items.id", ondelete="CASCADE"), primary_key=True
+    )
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    restaurant_id = db.Column(
+        db.Integer, db.ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False
+    )
+    quantity = db.Column(db.Integer, nullable=False, default=0)
@@ -19,6 +19,15 @@ class RestaurantRating(db.Model):
     """
 
     __tablename__ = "restaurant_ratings"
+    # Serves the newest-first reviews listing of a restaurant
+    __table_args__ = (
+        db.Index(
+            "ix_restaurant_ratings_restaurant_created",
+            "restaurant_id",
+            "created_at",
+            "id",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
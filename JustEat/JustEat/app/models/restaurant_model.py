@@ -1,7 +1,21 @@
+import re
 from datetime import datetime as dt
 
+from flask import current_app
+from sqlalchemy import event
+from text_unidecode import unidecode
+
 from app.extensions import db
 
+
+def normalize_text(text: str) -> str:
+    """Fold text for matching: ASCII transliteration, lowercase, single spaces.
+
+    "Crème Brûlée" and "creme  brulee" both become "creme brulee".
+    """
+    return re.sub(r"\s+", " ", unidecode(text or "").lower()).strip()
+
+
 # Association table for many-to-many between Restaurant and Cuisine
 restaurant_cuisine = db.Table(
     "restaurant_cuisine",
@@ -11,20 +25,56 @@ restaurant_cuisine = db.Table(
     db.Column("cuisine_id", db.Integer, db.ForeignKey("cuisines.id"), primary_key=True),
 )
 
+def _prior_score() -> float:
+    """Ranking score of a row without ratings: the configured prior mean."""
+    return current_app.config["RATING_PRIOR_MEAN"]
+
+
+class RatingHistogramMixin:
+    """Per-star rating counters, kept in step with ``rating_count``.
+
+    Attributes:
+        rating_1 .. rating_5: Number of ratings rounding to that many stars
+    """
+
+    rating_1 = db.Column(db.Integer, default=0)
+    rating_2 = db.Column(db.Integer, default=0)
+    rating_3 = db.Column(db.Integer, default=0)
+    rating_4 = db.Column(db.Integer, default=0)
+    rating_5 = db.Column(db.Integer, default=0)
+
+    @property
+    def rating_histogram(self) -> list:
+        """``(stars, count, percent)`` rows from five stars down to one."""
+        counts = [(stars, getattr(self, f"rating_{stars}") or 0) for stars in range(5, 0, -1)]
+        total = sum(count for _, count in counts)
+        return [
+            (stars, count, round(100 * count / total) if total else 0)
+            for stars, count in counts
+        ]
+
+
 # Only restaurant-related attributes (Single Responsibility Principle)
-class Restaurant(db.Model):
+class Restaurant(RatingHistogramMixin, db.Model):
     """Represents a restaurant business in the system.
 
     Attributes:
         id: Primary key
         owner_id: Reference to owner user
         name: Restaurant name
+        name_normalized: Accent- and case-folded name, indexed for prefix lookups
         location: Physical address
+        latitude: Latitude in degrees, if known
+        longitude: Longitude in degrees, if known
+        geohash: Geohash of the coordinates, indexed for "near me" searches
         opening_time: Daily opening time
         closing_time: Daily closing time
         slug: URL-friendly identifier
         avg_rating: Calculated average rating
+        rating_sum: Sum of all ratings received
         rating_count: Number of ratings received
+        rank_score: Bayesian average rating, indexed for ranking
+        recent_sales: Units sold within the search ranking window
         created_at: When restaurant was registered
         is_active: Business status flag
         image: Logo/cover image URL
@@ -35,14 +85,21 @@ class Restaurant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     name = db.Column(db.String(100), nullable=False)
+    name_normalized = db.Column(db.String(100), index=True)
     location = db.Column(db.String(200))
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     opening_time = db.Column(db.Time)
     closing_time = db.Column(db.Time)
 
     slug = db.Column(db.String(255), unique=True)
 
     avg_rating = db.Column(db.Float, default=0.0)
+    rating_sum = db.Column(db.Float, default=0.0)
     rating_count = db.Column(db.Integer, default=0)
+    rank_score = db.Column(db.Float, default=_prior_score, index=True)
+    recent_sales = db.Column(db.Integer, nullable=False, default=0)
 
     created_at = db.Column(db.DateTime, default=dt.now)
     is_active = db.Column(db.Boolean, default=False)
@@ -67,17 +124,21 @@ class Restaurant(db.Model):
     favorites = db.relationship("Favorite", back_populates="restaurant", cascade="all, delete-orphan")
 
 
-class MenuItem(db.Model):
+class MenuItem(RatingHistogramMixin, db.Model):
     """Represents a single menu item offered by a restaurant.
 
     Attributes:
         id: Primary key
         name: Item name
+        name_normalized: Accent- and case-folded name, indexed for prefix lookups
         description: Item description
         price: Current price
         restaurant_id: Owning restaurant reference
         avg_rating: Calculated average rating
+        rating_sum: Sum of all ratings received
         rating_count: Number of ratings received
+        rank_score: Bayesian average rating, indexed for ranking
+        recent_sales: Units sold within the search ranking window
         cuisine_id: Cuisine type reference
         category_id: Menu category reference
         is_active: Availability status
@@ -87,9 +148,15 @@ class MenuItem(db.Model):
     """
 
     __tablename__ = "menu_items"
+    __table_args__ = (
+        # A restaurant's dishes in a price range, for the search price filter
+        # and the price band facets
+        db.Index("ix_menu_items_restaurant_price", "restaurant_id", "price"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+    name_normalized = db.Column(db.String(100), index=True)
     description = db.Column(db.String(255), default="")
     price = db.Column(db.Numeric(10, 2), nullable=False)
 
@@ -98,7 +165,10 @@ class MenuItem(db.Model):
     )
 
     avg_rating = db.Column(db.Float, default=0.0)
+    rating_sum = db.Column(db.Float, default=0.0)
     rating_count = db.Column(db.Integer, default=0)
+    rank_score = db.Column(db.Float, default=_prior_score, index=True)
+    recent_sales = db.Column(db.Integer, nullable=False, default=0)
 
     cuisine_id = db.Column(db.Integer, db.ForeignKey("cuisines.id"), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=False)
@@ -130,6 +200,7 @@ class Cuisine(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
+    name_normalized = db.Column(db.String(50), index=True)
     image = db.Column(
         db.String(255),
         default="https://tse3.mm.bing.net/th?id=OIP.k7zYh0xnwGj3NH0uY6ZQFwHaE8&pid=Api",
@@ -149,5 +220,20 @@ class Category(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
+    name_normalized = db.Column(db.String(50), index=True)
 
     menu_items = db.relationship("MenuItem", back_populates="category")
+
+
+# Models carrying a ``name_normalized`` shadow of their name
+NORMALIZED_NAME_MODELS = (Restaurant, MenuItem, Cuisine, Category)
+
+
+def _sync_normalized_name(mapper, connection, target) -> None:
+    """Keep ``name_normalized`` in step with ``name`` on every flush."""
+    target.name_normalized = normalize_text(target.name)
+
+
+for _model in NORMALIZED_NAME_MODELS:
+    event.listen(_model, "before_insert", _sync_normalized_name)
+    event.listen(_model, "before_update", _sync_normalized_name)
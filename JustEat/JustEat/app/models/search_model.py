@@ -0,0 +1,49 @@
+from app.extensions import db
+
+
+__all__ = ["SearchTerm", "SearchTermTrigram"]
+
+
+class SearchTerm(db.Model):
+    """A distinct word from restaurant, menu item, cuisine or category names.
+
+    Attributes:
+        id: Primary key
+        term: Lowercased word
+        trigram_count: Number of distinct trigrams in the padded word
+        trigrams: Trigram postings for this term
+    """
+
+    __tablename__ = "search_terms"
+
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(100), unique=True, nullable=False)
+    trigram_count = db.Column(db.Integer, nullable=False)
+
+    trigrams = db.relationship(
+        "SearchTermTrigram", back_populates="term", cascade="all, delete-orphan"
+    )
+
+    def __repr__(self):
+        return f"<SearchTerm {self.term}>"
+
+
+class SearchTermTrigram(db.Model):
+    """Posting of a trigram to a search term.
+
+    The composite primary key leads with the trigram, so looking up every
+    term sharing a trigram is an index range scan.
+
+    Attributes:
+        trigram: Three-character gram
+        term_id: Reference to the term containing it
+    """
+
+    __tablename__ = "search_term_trigrams"
+
+    trigram = db.Column(db.String(3), primary_key=True)
+    term_id = db.Column(
+        db.Integer, db.ForeignKey("search_terms.id"), primary_key=True
+    )
+
+    term = db.relationship("SearchTerm", back_populates="trigrams")
@@ -0,0 +1,312 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models import Category, Cuisine, MenuItem, Restaurant, normalize_text
+from app.services.search_index import prefix_range, tokenize
+
+# Suggestion kinds, in the order they are listed for equally good matches
+RESTAURANT = "restaurant"
+MENU_ITEM = "menu_item"
+CUISINE = "cuisine"
+CATEGORY = "category"
+_KIND_ORDER = {RESTAURANT: 0, CUISINE: 1, CATEGORY: 2, MENU_ITEM: 3}
+
+
+class Suggestion(NamedTuple):
+    """A typeahead suggestion.
+
+    Attributes:
+        kind: One of restaurant, menu_item, cuisine or category
+        label: Display text
+        ref: Kind-specific reference (restaurant slug, cuisine id), may be None
+    """
+
+    kind: str
+    label: str
+    ref: Optional[str]
+
+
+class PrefixIndex:
+    """In-memory prefix index over suggestion labels.
+
+    Every word of a label is stored as a key in a sorted list, so a prefix
+    lookup is a binary search followed by a short forward scan, and typing
+    "pizz" finds "Margherita Pizza". Labels shared by several rows (the
+    same dish at many restaurants) are reference counted so removing one
+    row keeps the suggestion alive for the others.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, int, Suggestion]] = []
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    @staticmethod
+    def _word_keys(suggestion: Suggestion) -> List[Tuple[str, int, Suggestion]]:
+        words = tokenize(suggestion.label)
+        # Key on each word-start suffix of the normalized label
+        return [(" ".join(words[i:]), i, suggestion) for i in range(len(words))]
+
+    def load(self, suggestions: List[Suggestion]) -> None:
+        """Replace the whole index in one sort."""
+        counts = Counter(suggestions)
+        keys = sorted(key for s in counts for key in self._word_keys(s))
+        with self._lock:
+            self._keys, self._counts = keys, counts
+
+    def add(self, suggestion: Suggestion) -> None:
+        with self._lock:
+            self._counts[suggestion] += 1
+            if self._counts[suggestion] == 1:
+                for key in self._word_keys(suggestion):
+                    insort(self._keys, key)
+
+    def remove(self, suggestion: Suggestion) -> None:
+        with self._lock:
+            if self._counts[suggestion] <= 0:
+                return
+            self._counts[suggestion] -= 1
+            if self._counts[suggestion]:
+                return
+            del self._counts[suggestion]
+            for key in self._word_keys(suggestion):
+                position = bisect_left(self._keys, key)
+                if position < len(self._keys) and self._keys[position] == key:
+                    del self._keys[position]
+
+    def search(self, prefix: str, limit: int = 8) -> List[Suggestion]:
+        """Return suggestions with a word starting with ``prefix``.
+
+        Matches on the start of the label come before mid-label matches,
+        then shorter labels first.
+        """
+        prefix = " ".join(tokenize(prefix))
+        if not prefix:
+            return []
+
+        keys = self._keys
+        matches: Dict[Suggestion, bool] = {}
+        position = bisect_left(keys, (prefix,))
+        # Scan a bounded window so very short prefixes stay cheap
+        for key, word_position, suggestion in keys[position : position + limit * 20]:
+            if not key.startswith(prefix):
+                break
+            matches[suggestion] = matches.get(suggestion, False) or word_position == 0
+
+        ranked = sorted(
+            matches,
+            key=lambda s: (not matches[s], _KIND_ORDER[s.kind], len(s.label), s.label),
+        )
+        return ranked[:limit]
+
+
+def restaurant_suggestion(restaurant: Restaurant) -> Suggestion:
+    return Suggestion(RESTAURANT, restaurant.name, restaurant.slug)
+
+
+def menu_item_suggestion(item: MenuItem) -> Suggestion:
+    return Suggestion(MENU_ITEM, item.name, None)
+
+
+def _load_suggestions() -> List[Suggestion]:
+    """Read every suggestion label from the database in four narrow queries."""
+    suggestions = [
+        Suggestion(RESTAURANT, name, slug)
+        for name, slug in db.session.query(Restaurant.name, Restaurant.slug).filter(
+            Restaurant.is_active == True
+        )
+    ]
+    suggestions += [
+        Suggestion(MENU_ITEM, name, None)
+        for (name,) in db.session.query(MenuItem.name).filter(MenuItem.is_active == True)
+    ]
+    suggestions += [
+        Suggestion(CUISINE, name, str(id))
+        for id, name in db.session.query(Cuisine.id, Cuisine.name)
+    ]
+    suggestions += [
+        Suggestion(CATEGORY, name, str(id))
+        for id, name in db.session.query(Category.id, Category.name)
+    ]
+    return suggestions
+
+
+def _query_suggestions(prefix: str, limit: int) -> List[Suggestion]:
+    """
+    Look up suggestions straight from the indexed ``name_normalized`` columns.
+
+    Each kind is a single index range scan capped at ``limit`` rows, so the
+    cost does not grow with the catalogue and every process sees the same
+    labels. Only the start of a label is matched: unlike the in-memory
+    index, later words are not keyed.
+
+    Args:
+        prefix: Text typed so far
+        limit: Maximum number of suggestions
+
+    Returns:
+        Matching suggestions, best first
+    """
+    term = normalize_text(prefix)
+    if not term:
+        return []
+
+    suggestions = [
+        Suggestion(RESTAURANT, name, slug)
+        for name, slug in db.session.query(Restaurant.name, Restaurant.slug)
+        .filter(
+            Restaurant.is_active == True,
+            prefix_range(Restaurant.name_normalized, term),
+        )
+        .order_by(Restaurant.name_normalized)
+        .limit(limit)
+    ]
+    suggestions += [
+        Suggestion(MENU_ITEM, name, None)
+        for name, _ in db.session.query(MenuItem.name, MenuItem.name_normalized)
+        .filter(
+            MenuItem.is_active == True,
+            prefix_range(MenuItem.name_normalized, term),
+        )
+        .distinct()
+        .order_by(MenuItem.name_normalized)
+        .limit(limit)
+    ]
+    for kind, model in ((CUISINE, Cuisine), (CATEGORY, Category)):
+        suggestions += [
+            Suggestion(kind, name, str(id))
+            for id, name in db.session.query(model.id, model.name)
+            .filter(prefix_range(model.name_normalized, term))
+            .order_by(model.name_normalized)
+            .limit(limit)
+        ]
+
+    ranked = sorted(
+        set(suggestions), key=lambda s: (_KIND_ORDER[s.kind], len(s.label), s.label)
+    )
+    return ranked[:limit]
+
+
+def init_app(app: Flask) -> None:
+    """
+    Attach an autocomplete index to the app and try to build it.
+
+    If the tables do not exist yet (fresh database, tests) the index is
+    built on first use instead. With AUTOCOMPLETE_IN_MEMORY off no index
+    is built and lookups read the database.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    app.extensions["autocomplete"] = {
+        "index": PrefixIndex(),
+        "built_at": None,
+        "refreshing": threading.Lock(),
+    }
+    if not app.config.get("AUTOCOMPLETE_IN_MEMORY", True):
+        return
+    with app.app_context():
+        try:
+            rebuild()
+        except SQLAlchemyError:
+            db.session.rollback()
+            app.logger.info("Autocomplete index deferred until first lookup")
+
+
+def rebuild() -> None:
+    """Rebuild the current app's index from the database."""
+    state = current_app.extensions["autocomplete"]
+    state["index"].load(_load_suggestions())
+    state["built_at"] = time.monotonic()
+    current_app.logger.info(
+        f"Built autocomplete index with {len(state['index'])} suggestions"
+    )
+
+
+def _refresh_in_background(app: Flask) -> None:
+    """Rebuild a stale index on a worker thread while lookups use the old one."""
+    refreshing = app.extensions["autocomplete"]["refreshing"]
+    if not refreshing.acquire(blocking=False):
+        return  # A refresh is already running
+
+    def run():
+        try:
+            with app.app_context():
+                rebuild()
+        except SQLAlchemyError as e:
+            app.logger.error(f"Failed to refresh autocomplete index: {str(e)}")
+        finally:
+            refreshing.release()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _get_index() -> Optional[PrefixIndex]:
+    """Return the built index, or None if it has not been built yet."""
+    state = current_app.extensions["autocomplete"]
+    return state["index"] if state["built_at"] is not None else None
+
+
+def suggest(prefix: str, limit: int = 8) -> List[Suggestion]:
+    """
+    Look up typeahead suggestions for a prefix without touching the database.
+
+    Each process keeps its own index and only sees its own writes, so an
+    index older than AUTOCOMPLETE_REFRESH_SECONDS is rebuilt in the
+    background to pick up changes made by other workers. Deployments that
+    cannot afford that lag turn AUTOCOMPLETE_IN_MEMORY off to query the
+    indexed name columns instead.
+
+    Args:
+        prefix: Text typed so far
+        limit: Maximum number of suggestions
+
+    Returns:
+        Matching suggestions, best first
+    """
+    if not current_app.config.get("AUTOCOMPLETE_IN_MEMORY", True):
+        try:
+            return _query_suggestions(prefix, limit)
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Failed to look up suggestions: {str(e)}")
+            db.session.rollback()
+            return []
+
+    state = current_app.extensions["autocomplete"]
+    max_age = current_app.config.get("AUTOCOMPLETE_REFRESH_SECONDS", 300)
+    built_at = state["built_at"]
+    if built_at is None:
+        try:
+            rebuild()
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Failed to build autocomplete index: {str(e)}")
+            db.session.rollback()
+            return []
+    elif time.monotonic() - built_at > max_age:
+        _refresh_in_background(current_app._get_current_object())
+
+    return state["index"].search(prefix, limit)
+
+
+def add(suggestion: Suggestion) -> None:
+    """Record a newly visible label in the index."""
+    index = _get_index()
+    if index is not None:
+        index.add(suggestion)
+
+
+def remove(suggestion: Suggestion) -> None:
+    """Drop a label that is no longer visible from the index."""
+    index = _get_index()
+    if index is not None:
+        index.remove(suggestion)
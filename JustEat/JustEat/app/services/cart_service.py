@@ -1,6 +1,7 @@
 from typing import Optional
 
 from flask import current_app
+from sqlalchemy.orm import joinedload
 
 from app.extensions import db
 from app.models import Cart, CartItem, User
@@ -10,6 +11,15 @@ def get_user_cart(user: User) -> Optional[Cart]:
     """Retrieve a user's active cart."""
     return Cart.query.filter_by(user_id=user.id).first()
 
+
+def get_checkout_cart(user: User) -> Optional[Cart]:
+    """Retrieve a user's cart with its items and their menu items in one query."""
+    return (
+        Cart.query.options(joinedload(Cart.items).joinedload(CartItem.menu_item))
+        .filter_by(user_id=user.id)
+        .first()
+    )
+
 # Only handles shopping cart operations (Single Responsibility Principle)
 def get_cart_summary(user: User) -> dict:
     """Generate summary of cart contents and total."""
@@ -0,0 +1,133 @@
+import math
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from app.models import Restaurant
+
+# Base32 alphabet of geohashes; every character sorts before "{"
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_PREFIX_END = "{"
+
+# Precision stored on restaurants (cells of roughly 5 x 5 m)
+GEOHASH_PRECISION = 9
+
+# Kilometres per degree of latitude
+_KM_PER_DEGREE = 111.32
+
+
+class NearBy(NamedTuple):
+    """A "within radius_km of (latitude, longitude)" search constraint."""
+
+    latitude: float
+    longitude: float
+    radius_km: float
+
+
+def encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a geohash of ``precision`` characters.
+
+    Geohash cells nest by prefix, so every point inside a cell has a hash
+    starting with the cell's hash and a cell is a contiguous range of an
+    ordinary string index.
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, span = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if target >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """Height and width of a cell in degrees."""
+    lon_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def _precision_for(radius_km: float, latitude: float) -> int:
+    """Longest hash whose cells are at least ``radius_km`` on each side.
+
+    With cells that large, the circle around a point always fits in the
+    point's cell and its eight neighbours.
+    """
+    shrink = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        if (
+            height * _KM_PER_DEGREE >= radius_km
+            and width * _KM_PER_DEGREE * shrink >= radius_km
+        ):
+            return precision
+    return 1
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """Return the geohash cells covering a circle: its cell and neighbours."""
+    precision = _precision_for(radius_km, latitude)
+    height, width = _cell_size(precision)
+    cells = set()
+    for d_lat in (-height, 0.0, height):
+        for d_lon in (-width, 0.0, width):
+            lat = min(max(latitude + d_lat, -90.0), 90.0)
+            lon = (longitude + d_lon + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lon, precision))
+    return sorted(cells)
+
+
+def distance_km(latitude: float, longitude: float, other_lat: float, other_lon: float) -> float:
+    """Great-circle distance between two coordinates."""
+    lat1, lat2 = math.radians(latitude), math.radians(other_lat)
+    d_lat = lat2 - lat1
+    d_lon = math.radians(other_lon - longitude)
+    a = math.sin(d_lat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(d_lon / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def within(near: NearBy):
+    """Build the indexed predicate selecting restaurants inside a circle.
+
+    The geohash ranges let the database scan only the covering cells;
+    the squared planar distance then trims the corners of those cells.
+
+    Returns:
+        Tuple of (filter clause, squared distance expression for ordering)
+    """
+    cells = or_(
+        *(
+            and_(Restaurant.geohash >= cell, Restaurant.geohash < cell + _PREFIX_END)
+            for cell in covering_cells(near.latitude, near.longitude, near.radius_km)
+        )
+    )
+    # Equirectangular approximation, fine at city scale and needs no SQL trig
+    shrink = math.cos(math.radians(near.latitude))
+    d_lat = Restaurant.latitude - near.latitude
+    d_lon = (Restaurant.longitude - near.longitude) * shrink
+    distance_sq = d_lat * d_lat + d_lon * d_lon
+    radius_sq = (near.radius_km / _KM_PER_DEGREE) ** 2
+    return and_(cells, distance_sq <= radius_sq), distance_sq
+
+
+def parse_near(
+    latitude: Optional[float], longitude: Optional[float], radius_km: Optional[float]
+) -> Optional[NearBy]:
+    """Validate request coordinates, returning None if they are unusable."""
+    if latitude is None or longitude is None:
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    if not radius_km or radius_km <= 0:
+        return None
+    return NearBy(latitude, longitude, radius_km)
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models import IdempotencyKey
+from app.utils import insert_ignore
+
+
+class Claim(NamedTuple):
+    """Outcome of claiming an idempotency key.
+
+    Attributes:
+        fresh: True if this request owns the key and should do the work
+        order_id: Order already placed under the key, for repeated requests
+    """
+
+    fresh: bool
+    order_id: Optional[int] = None
+
+
+def _for(user_id: int, key: str):
+    return (IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+
+
+def claim(user_id: int, key: str) -> Claim:
+    """
+    Claim a key for one checkout and commit the claim.
+
+    Keys past IDEMPOTENCY_KEY_TTL are pruned first, so they can be claimed
+    again. The insert relies on the unique (user_id, key) constraint, so
+    two concurrent requests cannot both win.
+
+    Args:
+        user_id: User submitting the checkout
+        key: Client-supplied idempotency key
+
+    Returns:
+        Claim: fresh for the first request, otherwise the existing order id
+        (None while the first request is still running)
+    """
+    try:
+        ttl = timedelta(seconds=current_app.config["IDEMPOTENCY_KEY_TTL"])
+        now = datetime.now()
+        db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.created_at < now - ttl)
+        )
+        connection = db.session.connection()
+        result = connection.execute(
+            insert_ignore(connection.dialect.name, IdempotencyKey.__table__),
+            {"user_id": user_id, "key": key, "created_at": now},
+        )
+        db.session.commit()
+        if result.rowcount == 1:
+            return Claim(fresh=True)
+
+        order_id = db.session.execute(
+            select(IdempotencyKey.order_id).where(*_for(user_id, key))
+        ).scalar()
+        current_app.logger.info(
+            f"Repeated checkout with key {key} for user {user_id}, order {order_id}"
+        )
+        return Claim(fresh=False, order_id=order_id)
+    except SQLAlchemyError as e:
+        # Fail open: a lost claim only risks the duplicate it was meant to stop
+        current_app.logger.error(f"Failed to claim idempotency key {key}: {str(e)}")
+        db.session.rollback()
+        return Claim(fresh=True)
+
+
+def complete(user_id: int, key: str, order_id: int) -> None:
+    """Record the order placed under a key, in the caller's transaction."""
+    db.session.execute(
+        update(IdempotencyKey).where(*_for(user_id, key)).values(order_id=order_id)
+    )
+
+
+def release(user_id: int, key: str) -> None:
+    """
+    Drop a claim that did not produce an order and commit, so a retry can
+    try again. Completed claims are kept.
+    """
+    try:
+        db.session.execute(
+            delete(IdempotencyKey).where(
+                *_for(user_id, key), IdempotencyKey.order_id.is_(None)
+            )
+        )
+        db.session.commit()
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Failed to release idempotency key {key}: {str(e)}")
+        db.session.rollback()
@@ -1,11 +1,11 @@
-from datetime import datetime, timedelta
 from typing import Optional, Set
 
 from flask import current_app
-from sqlalchemy import func
 
 from app.extensions import db
-from app.models import MenuItem, Order, OrderItem
+from app.models import MenuItem
+from app.services import autocomplete_service, outbox_service, popularity_service
+from app.services import search_cache
 
 
 def get_item_by_id(id: int) -> Optional[MenuItem]:
@@ -17,23 +17,19 @@ def get_item_by_id(id: int) -> Optional[MenuItem]:
         return None
 
 
-def get_popular_item_ids(restaurant, criteria_count: int = 1) -> Set[int]:
-    """Get frequently ordered item IDs within last 24 hours."""
+def get_popular_item_ids(restaurant, criteria_count: Optional[int] = None) -> Set[int]:
+    """Get frequently ordered item IDs within the last POPULAR_WINDOW_HOURS."""
     try:
-        popular_items = (
-            OrderItem.query.join(Order)
-            .filter(
-                Order.restaurant_id == restaurant.id,
-                OrderItem.created_at >= datetime.now() - timedelta(hours=24),
-            )
-            .group_by(OrderItem.menu_item_id)
-            .having(func.sum(OrderItem.quantity) > criteria_count)
-            .all()
+        # Read from the hourly sales counters rather than scanning orders
+        popular_ids = popularity_service.popular_item_ids(
+            restaurant_id=restaurant.id,
+            min_quantity=criteria_count or current_app.config["POPULAR_MIN_QUANTITY"],
+            hours=current_app.config["POPULAR_WINDOW_HOURS"],
         )
         current_app.logger.debug(
-            f"Found {len(popular_items)} popular items for restaurant {restaurant.id}"
+            f"Found {len(popular_ids)} popular items for restaurant {restaurant.id}"
         )
-        return {item.menu_item_id for item in popular_items}
+        return popular_ids
     except Exception as e:
         current_app.logger.error(
             f"Error calculating popular items for restaurant {restaurant.id}: {str(e)}"
@@ -41,7 +37,9 @@ def get_popular_item_ids(restaurant, criteria_count: int = 1) -> Set[int]:
         return set()
 
 
-def get_popular_item_ids_for_search(menu_items, criteria_count: int = 1) -> Set[int]:
+def get_popular_item_ids_for_search(
+    menu_items, criteria_count: Optional[int] = None
+) -> Set[int]:
     """Get popular item IDs from a list of menu items for search results."""
     try:
         if not menu_items:
@@ -51,21 +49,16 @@ def get_popular_item_ids_for_search(menu_items, criteria_count: int = 1) -> Set[
         menu_item_ids = [item.id for item in menu_items]
         
         # Find popular items among the search results
-        popular_items = (
-            OrderItem.query.join(Order)
-            .filter(
-                OrderItem.menu_item_id.in_(menu_item_ids),
-                OrderItem.created_at >= datetime.now() - timedelta(hours=24),
-            )
-            .group_by(OrderItem.menu_item_id)
-            .having(func.sum(OrderItem.quantity) > criteria_count)
-            .all()
+        popular_ids = popularity_service.popular_item_ids(
+            menu_item_ids=menu_item_ids,
+            min_quantity=criteria_count or current_app.config["POPULAR_MIN_QUANTITY"],
+            hours=current_app.config["POPULAR_WINDOW_HOURS"],
         )
         
         current_app.logger.debug(
-            f"Found {len(popular_items)} popular items in search results"
+            f"Found {len(popular_ids)} popular items in search results"
         )
-        return {item.menu_item_id for item in popular_items}
+        return popular_ids
     except Exception as e:
         current_app.logger.error(
             f"Error calculating popular items for search results: {str(e)}"
@@ -93,7 +86,11 @@ def create_menu_item(
         )
         
         db.session.add(menu_item)
+        db.session.flush()
+        outbox_service.record_menu_item("menu_item.created", menu_item)
         db.session.commit()
+        autocomplete_service.add(autocomplete_service.menu_item_suggestion(menu_item))
+        search_cache.invalidate(search_cache.menu_item_change(menu_item, reprices=True))
         current_app.logger.info(f"Created menu item {menu_item.id}")
         return menu_item
         
@@ -121,15 +118,26 @@ def update_menu_item(
         if not item:
             current_app.logger.warning(f"Menu item {item_id} not found for update")
             return None
-            
+
+        old_suggestion = autocomplete_service.menu_item_suggestion(item)
+        old_change = search_cache.menu_item_change(item)
+        old_price = item.price
         item.name = name.strip()
         item.description = description.strip()
         item.price = price
         item.cuisine_id = cuisine_id
         item.category_id = category_id
         item.is_non_veg = is_non_veg
+        outbox_service.record_menu_item("menu_item.updated", item)
         
         db.session.commit()
+        if item.is_active:
+            autocomplete_service.remove(old_suggestion)
+            autocomplete_service.add(autocomplete_service.menu_item_suggestion(item))
+        search_cache.invalidate(
+            old_change,
+            search_cache.menu_item_change(item, reprices=item.price != old_price),
+        )
         current_app.logger.info(f"Updated menu item {item_id}")
         return item
         
@@ -146,6 +154,7 @@ def update_item_special_status(item: MenuItem, status: bool) -> Optional[MenuIte
     """Toggle special status flag for menu item."""
     try:
         item.is_special = status
+        outbox_service.record_menu_item("menu_item.updated", item)
         db.session.commit()
         current_app.logger.info(
             f"Set special status to {status} for item {item.id}"
@@ -162,8 +171,20 @@ def update_item_special_status(item: MenuItem, status: bool) -> Optional[MenuIte
 def update_item_active_status(item: MenuItem, status: bool) -> Optional[MenuItem]:
     """Toggle active/availability status flag for menu item."""
     try:
+        was_active = item.is_active
         item.is_active = status
+        outbox_service.record_menu_item("menu_item.updated", item)
         db.session.commit()
+
+        suggestion = autocomplete_service.menu_item_suggestion(item)
+        if status and not was_active:
+            autocomplete_service.add(suggestion)
+        elif was_active and not status:
+            autocomplete_service.remove(suggestion)
+        search_cache.invalidate(
+            search_cache.menu_item_change(item, reprices=status != was_active)
+        )
+
         current_app.logger.info(
             f"Set active status to {status} for item {item.id}"
         )
@@ -183,9 +204,16 @@ def delete_menu_item(item_id: int) -> bool:
         if not item:
             current_app.logger.warning(f"Item {item_id} not found for deletion")
             return False
-            
+
+        was_active = item.is_active
+        suggestion = autocomplete_service.menu_item_suggestion(item)
+        change = search_cache.menu_item_change(item, reprices=was_active)
+        outbox_service.record_menu_item("menu_item.deleted", item)
         db.session.delete(item)
         db.session.commit()
+        if was_active:
+            autocomplete_service.remove(suggestion)
+        search_cache.invalidate(change)
         current_app.logger.info(f"Deleted menu item {item_id}")
         return True
         
@@ -195,35 +223,4 @@ def delete_menu_item(item_id: int) -> bool:
             exc_info=True
         )
         db.session.rollback()
-        return False
-
-
-def update_item_rating(menu_item_id: int, new_rating: float) -> bool:
-    """Update item's average rating with new review."""
-    try:
-        menu_item = get_item_by_id(menu_item_id)
-        if not menu_item:
-            current_app.logger.warning(f"Item {menu_item_id} not found for rating update")
-            return False
-            
-        if menu_item.rating_count == 0:
-            menu_item.avg_rating = new_rating
-            menu_item.rating_count = 1
-        else:
-            total = menu_item.avg_rating * menu_item.rating_count
-            total += new_rating
-            menu_item.rating_count += 1
-            menu_item.avg_rating = total / menu_item.rating_count
-            
-        db.session.commit()
-        current_app.logger.debug(
-            f"Updated rating for item {menu_item_id} to {menu_item.avg_rating}"
-        )
-        return True
-        
-    except Exception as e:
-        current_app.logger.error(
-            f"Failed to update rating for item {menu_item_id}: {str(e)}"
-        )
-        db.session.rollback()
         return False
\ No newline at end of file
@@ -0,0 +1,217 @@
+import json
+import queue
+import secrets
+import threading
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, Set, Tuple
+
+from flask import Flask, current_app
+
+# Event types
+CREATED = "created"
+STATUS = "status"
+
+
+class OrderEvent(NamedTuple):
+    """A change to an order, as pushed to live listeners.
+
+    Attributes:
+        type: CREATED for a new order, STATUS for a status change
+        order_id: Changed order
+        restaurant_id: Restaurant the order was placed with
+        customer_id: Customer who placed the order
+        status: Status after the change
+        version: Order version after the change
+    """
+
+    type: str
+    order_id: int
+    restaurant_id: int
+    customer_id: int
+    status: str
+    version: int
+
+    def to_sse(self, event_id: str) -> str:
+        """Format the event as a Server-Sent Events message with the given id."""
+        data = json.dumps(self._asdict())
+        return f"event: order\nid: {event_id}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """A listener's bounded queue of events on one topic.
+
+    Attributes:
+        topic: Topic the listener is subscribed to
+        position: Id of the last event published on the topic before the
+            listener subscribed
+        events: ``(id, event)`` pairs published since the listener last read
+        overflowed: Set when events were dropped because the queue was full
+    """
+
+    def __init__(self, topic: str, position: str, max_queued: int):
+        self.topic = topic
+        self.position = position
+        self.events: "queue.Queue[Tuple[str, OrderEvent]]" = queue.Queue(max_queued)
+        self.overflowed = False
+
+
+class EventHub:
+    """In-process publish/subscribe of order events by topic.
+
+    The hub lives in one process's memory and only sees events published
+    there, so live streams are complete only when the app runs as a single
+    process (see ``gunicorn.conf.py``).
+
+    Publishing never blocks: a listener that falls more than its queue
+    size behind is marked overflowed and told to resync instead of
+    slowing down the request that published.
+
+    Each event gets an id of the hub's random token and a per-topic
+    sequence number. A reconnecting listener hands back the last id it saw,
+    and it has missed nothing exactly when that is still the topic's
+    latest id on this hub.
+    """
+
+    def __init__(self, max_queued: int):
+        self.max_queued = max_queued
+        self.token = secrets.token_hex(4)
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._sequences: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _event_id(self, topic: str) -> str:
+        return f"{self.token}.{self._sequences.get(topic, 0)}"
+
+    def subscribe(self, topic: str) -> Subscription:
+        with self._lock:
+            subscription = Subscription(topic, self._event_id(topic), self.max_queued)
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.topic]
+
+    def subscriber_count(self, topic: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(topic, ()))
+
+    def publish(self, topic: str, event: OrderEvent) -> int:
+        """Queue an event for every listener on a topic.
+
+        Returns:
+            Number of listeners the event was queued for
+        """
+        with self._lock:
+            self._sequences[topic] = self._sequences.get(topic, 0) + 1
+            event_id = self._event_id(topic)
+            subscribers = list(self._subscribers.get(topic, ()))
+        delivered = 0
+        for subscription in subscribers:
+            try:
+                subscription.events.put_nowait((event_id, event))
+                delivered += 1
+            except queue.Full:
+                subscription.overflowed = True
+        return delivered
+
+
+def restaurant_topic(restaurant_id: int) -> str:
+    return f"restaurant:{restaurant_id}"
+
+
+def customer_topic(customer_id: int) -> str:
+    return f"customer:{customer_id}"
+
+
+def init_app(app: Flask) -> None:
+    """
+    Attach an order event hub to the application.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    app.extensions["order_events"] = EventHub(app.config["ORDER_STREAM_QUEUE_SIZE"])
+
+
+def get_hub() -> EventHub:
+    """Return the order event hub of the current application."""
+    return current_app.extensions["order_events"]
+
+
+def publish(event: OrderEvent) -> None:
+    """
+    Push an order change to this process's live listeners.
+
+    The event goes to both the restaurant's and the customer's topic. Call
+    after the change is committed. Only listeners connected to this process
+    receive it: this works only when the app is served by a single process,
+    as the shipped gunicorn config does. Under several processes, pages
+    streaming from another process see the change when they next reload.
+
+    Args:
+        event: The committed change
+    """
+    hub = get_hub()
+    delivered = hub.publish(restaurant_topic(event.restaurant_id), event)
+    delivered += hub.publish(customer_topic(event.customer_id), event)
+    if delivered:
+        current_app.logger.debug(
+            f"Pushed {event.type} event of order {event.order_id} to {delivered} listeners"
+        )
+
+
+def stream(topic: str, last_event_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Subscribe to a topic and yield its events as Server-Sent Events.
+
+    The subscription is taken before the first message is yielded, so no
+    event published after the call is missed. The first message carries
+    the topic's latest event id, so the browser always has one to send
+    back when it reconnects. A comment is sent every ORDER_STREAM_HEARTBEAT
+    seconds to keep proxies from closing the connection, and the stream
+    ends after ORDER_STREAM_MAX_SECONDS so a worker thread is not held
+    forever; browsers reconnect on their own.
+
+    A reconnecting listener whose ``Last-Event-ID`` is not the topic's
+    latest id on this process may have missed events in the gap, and is
+    sent a ``resync`` event first. A listener that fell behind is sent a
+    ``resync`` event and closed.
+
+    Args:
+        topic: Topic to listen to
+        last_event_id: The ``Last-Event-ID`` header of a reconnecting browser
+
+    Returns:
+        Iterator of SSE messages
+    """
+    config = current_app.config
+    hub = get_hub()
+    heartbeat = config["ORDER_STREAM_HEARTBEAT"]
+    deadline = time.monotonic() + config["ORDER_STREAM_MAX_SECONDS"]
+    subscription = hub.subscribe(topic)
+
+    def messages() -> Iterator[str]:
+        try:
+            yield f"retry: {config['ORDER_STREAM_RETRY_MS']}\nid: {subscription.position}\n\n"
+            if last_event_id is not None and last_event_id != subscription.position:
+                yield "event: resync\ndata: {}\n\n"
+            while time.monotonic() < deadline:
+                if subscription.overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                try:
+                    event_id, event = subscription.events.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield event.to_sse(event_id)
+        finally:
+            hub.unsubscribe(subscription)
+
+    return messages()
@@ -1,12 +1,26 @@
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 from typing import Optional
 
 from flask import current_app
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.extensions import db
-from app.models import MenuItemRating, Order, OrderItem, OrderStatus, RestaurantRating
-from app.services import menu_item_service as menu_item_svc
-from app.services import restaurant_service as restaurant_svc
+from app.models import (
+    Cart,
+    CartItem,
+    MenuItemRating,
+    ORDER_TRANSITIONS,
+    Order,
+    OrderItem,
+    OrderStatus,
+    RestaurantRating,
+)
+from app.services import idempotency_service, order_event_service, outbox_service
+from app.services import popularity_service
+from app.services import rating_service
+from app.services.pagination import Page, paginate
 
 
 def get_order_status(status: str) -> Optional[OrderStatus]:
@@ -18,47 +32,112 @@ def get_order_status(status: str) -> Optional[OrderStatus]:
         return None
 
 
-def get_orders(user, status: Optional[str] = None) -> list[Order]:
-    """Retrieve user's orders with optional status filter."""
+def get_orders(
+    user, status: Optional[str] = None, cursor: Optional[str] = None
+) -> Page:
+    """
+    Retrieve one page of user's orders, newest first.
+
+    Restaurants and reviews are joined into the page query and order
+    lines are fetched in one extra query for the whole page, so a page
+    costs two queries however long the customer's history is.
+
+    Args:
+        user: Customer whose orders to list
+        status: Only orders in this status
+        cursor: Cursor of the page to fetch
+
+    Returns:
+        Page of orders
+    """
     try:
-        query = Order.query.filter_by(customer_id=user.id)
+        query = Order.query.options(
+            joinedload(Order.restaurant),
+            joinedload(Order.restaurant_rating),
+            selectinload(Order.items),
+        ).filter(Order.customer_id == user.id)
         if status_enum := get_order_status(status):
-            query = query.filter_by(status=status_enum)
-        return query.order_by(Order.created_at.desc()).all()
+            query = query.filter(Order.status == status_enum)
+        return paginate(
+            query, [(Order.created_at, True), (Order.id, True)], cursor=cursor
+        )
     except Exception as e:
         current_app.logger.error(f"Failed to fetch orders for user {user.id}: {str(e)}")
-        return []
+        return Page()
+
 
+def place_order(user, cart, idempotency_key: Optional[str] = None) -> Optional[Order]:
+    """
+    Convert cart to completed order with transaction.
 
-def place_order(user, cart) -> Optional[Order]:
-    """Convert cart to completed order with transaction."""
+    The cart should come from ``cart_service.get_checkout_cart`` so its
+    lines are already loaded. The order is inserted once with its total,
+    its lines in one executemany, and the cart is removed with two bulk
+    deletes, so the statement count does not grow with the cart.
+
+    Args:
+        user: Customer placing the order
+        cart: Cart to convert
+        idempotency_key: Claimed key to attach the order to, committed
+            together with the order
+    """
     try:
+        # Price the lines and snapshot them in a single pass
         total = Decimal(0)
+        lines = []
+        for item in cart.items:
+            menu_item = item.menu_item
+            total += menu_item.price * item.quantity
+            lines.append(
+                {
+                    "menu_item_id": menu_item.id,
+                    "quantity": item.quantity,
+                    "price_at_order": menu_item.price,
+                    "name": menu_item.name,
+                }
+            )
+
         order = Order(
             customer_id=user.id,
             restaurant_id=cart.restaurant_id,
-            total=0,
+            total=total,
             status=OrderStatus.PENDING,
         )
         db.session.add(order)
         db.session.flush()
 
-        for item in cart.items:
-            item_total = item.menu_item.price * item.quantity
-            total += item_total
-
-            order_item = OrderItem(
+        db.session.execute(
+            insert(OrderItem), [{"order_id": order.id, **line} for line in lines]
+        )
+        # Bump the hourly sales counters in the same transaction
+        sales = [(line["menu_item_id"], line["quantity"]) for line in lines]
+        popularity_service.record_sales(cart.restaurant_id, sales)
+        if idempotency_key:
+            idempotency_service.complete(user.id, idempotency_key, order.id)
+        outbox_service.record(
+            outbox_service.ORDERS,
+            "order.created",
+            order.id,
+            {
+                "customer_id": user.id,
+                "restaurant_id": cart.restaurant_id,
+                "total": str(total),
+                "items": [[menu_item_id, quantity] for menu_item_id, quantity in sales],
+            },
+        )
+        db.session.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+        db.session.execute(delete(Cart).where(Cart.id == cart.id))
+        db.session.commit()
+        order_event_service.publish(
+            order_event_service.OrderEvent(
+                type=order_event_service.CREATED,
                 order_id=order.id,
-                menu_item_id=item.menu_item.id,
-                quantity=item.quantity,
-                price_at_order=item.menu_item.price,
-                name=item.menu_item.name,
+                restaurant_id=order.restaurant_id,
+                customer_id=order.customer_id,
+                status=order.status.value,
+                version=order.version,
             )
-            db.session.add(order_item)
-
-        order.total = total
-        db.session.delete(cart)
-        db.session.commit()
+        )
 
         current_app.logger.info(
             f"Order {order.id} placed for user {user.id}, total: {total}"
@@ -73,19 +152,49 @@ def place_order(user, cart) -> Optional[Order]:
         return None
 
 
-def get_restaurant_orders(restaurant_id: int) -> list[Order]:
-    """Retrieve all orders for a restaurant."""
+def get_restaurant_orders(
+    restaurant_id: int,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+) -> Page:
+    """
+    Retrieve one page of a restaurant's orders, newest first.
+
+    Customers are joined into the page query and order lines are fetched
+    in one extra query for the whole page, so a page costs two queries
+    however many orders it shows.
+
+    Args:
+        restaurant_id: Restaurant whose orders to list
+        status: Only orders in this status
+        date_from: Only orders placed on or after this day
+        date_to: Only orders placed on or before this day
+        cursor: Cursor of the page to fetch
+
+    Returns:
+        Page of orders
+    """
     try:
-        return (
-            Order.query.filter_by(restaurant_id=restaurant_id)
-            .order_by(Order.created_at.desc())
-            .all()
+        query = Order.query.options(
+            joinedload(Order.user), selectinload(Order.items)
+        ).filter(Order.restaurant_id == restaurant_id)
+        if status_enum := get_order_status(status):
+            query = query.filter(Order.status == status_enum)
+        if date_from:
+            query = query.filter(Order.created_at >= datetime.combine(date_from, time.min))
+        if date_to:
+            next_day = datetime.combine(date_to + timedelta(days=1), time.min)
+            query = query.filter(Order.created_at < next_day)
+        return paginate(
+            query, [(Order.created_at, True), (Order.id, True)], cursor=cursor
         )
     except Exception as e:
         current_app.logger.error(
             f"Failed to fetch orders for restaurant {restaurant_id}: {str(e)}"
         )
-        return []
+        return Page()
 
 
 def get_order_by_id(order_id: int) -> Optional[Order]:
@@ -97,18 +206,73 @@ def get_order_by_id(order_id: int) -> Optional[Order]:
         return None
 
 
-def update_order_status(order: Order, status: str) -> Optional[Order]:
-    """Safely update order status with validation."""
+def update_order_status(
+    order: Order, status: str, version: Optional[int] = None
+) -> Optional[Order]:
+    """
+    Move an order to a new status if ORDER_TRANSITIONS allows it.
+
+    The write is a single conditional UPDATE on the status and version the
+    caller saw, so when two requests race only the first to commit changes
+    the row and the other matches nothing. No lock is held in between.
+
+    Args:
+        order: Order to update
+        status: Target status value
+        version: Version the caller last saw, defaults to the loaded one
+
+    Returns:
+        The updated order, or None if the transition is not allowed or the
+        order changed since the caller saw it
+    """
     try:
-        if order.status != OrderStatus.PENDING:
+        status_enum = OrderStatus(status)
+        seen_status = order.status
+        seen_version = order.version if version is None else version
+        if status_enum not in ORDER_TRANSITIONS.get(seen_status, ()):
             current_app.logger.warning(
-                f"Attempt to modify non-pending order {order.id} status"
+                f"Rejected moving order {order.id} from {seen_status.value} "
+                f"to {status_enum.value}"
             )
             return None
 
-        status_enum = OrderStatus(status)
-        order.status = status_enum
+        result = db.session.execute(
+            update(Order)
+            .where(
+                Order.id == order.id,
+                Order.version == seen_version,
+                Order.status == seen_status,
+            )
+            .values(status=status_enum, version=Order.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.session.rollback()
+            current_app.logger.warning(
+                f"Order {order.id} changed since version {seen_version}, "
+                f"not moving it to {status_enum.value}"
+            )
+            return None
+        event = order_event_service.OrderEvent(
+            type=order_event_service.STATUS,
+            order_id=order.id,
+            restaurant_id=order.restaurant_id,
+            customer_id=order.customer_id,
+            status=status_enum.value,
+            version=seen_version + 1,
+        )
+        outbox_service.record(
+            outbox_service.ORDERS,
+            "order.status_changed",
+            order.id,
+            {
+                "from": seen_status.value,
+                "to": status_enum.value,
+                "version": event.version,
+            },
+        )
         db.session.commit()
+        order_event_service.publish(event)
 
         current_app.logger.info(
             f"Updated order {order.id} status to {status_enum.value}"
@@ -132,7 +296,7 @@ def update_order_status(order: Order, status: str) -> Optional[Order]:
 def add_ratings(
     user_id: int, order_id: int, item_ratings: list[dict], restaurant_rating: dict
 ) -> bool:
-    """Add ratings for both restaurant and menu items."""
+    """Add ratings for both restaurant and menu items in one transaction."""
     try:
         # Add restaurant rating
         rest_rating = RestaurantRating(
@@ -144,19 +308,37 @@ def add_ratings(
         )
         db.session.add(rest_rating)
 
-        # Add menu item ratings
-        for item in item_ratings:
-            item_rating = MenuItemRating(
-                user_id=user_id,
-                menu_item_id=item["item_id"],
-                rating=item["rating"],
+        # Add menu item ratings in one bulk insert
+        if item_ratings:
+            db.session.execute(
+                insert(MenuItemRating),
+                [
+                    {
+                        "user_id": user_id,
+                        "menu_item_id": item["item_id"],
+                        "rating": item["rating"],
+                    }
+                    for item in item_ratings
+                ],
             )
-            db.session.add(item_rating)
-            menu_item_svc.update_item_rating(item["item_id"], item["rating"])
 
-        # Update restaurant aggregate rating
-        restaurant_svc.update_restaurant_rating(
-            restaurant_rating["restaurant_id"], restaurant_rating["rating"]
+        # Update aggregates with atomic SQL-side increments
+        rating_service.add_menu_item_ratings(
+            (item["item_id"], item["rating"]) for item in item_ratings
+        )
+        rating_service.add_restaurant_ratings(
+            [(restaurant_rating["restaurant_id"], restaurant_rating["rating"])]
+        )
+        outbox_service.record(
+            outbox_service.RATINGS,
+            "rating.added",
+            order_id,
+            {
+                "user_id": user_id,
+                "restaurant_id": restaurant_rating["restaurant_id"],
+                "rating": restaurant_rating["rating"],
+                "items": [[item["item_id"], item["rating"]] for item in item_ratings],
+            },
         )
 
         db.session.commit()
@@ -174,16 +356,20 @@ def add_ratings(
         return False
 
 
-def get_reviews(restaurant_id: int) -> list[RestaurantRating]:
-    """Retrieve reviews for a restaurant."""
+def get_reviews(restaurant_id: int, cursor: Optional[str] = None) -> Page:
+    """Retrieve one page of a restaurant's reviews, newest first, with their authors."""
     try:
-        return (
-            RestaurantRating.query.filter_by(restaurant_id=restaurant_id)
-            .order_by(RestaurantRating.created_at.desc())
-            .all()
+        # Authors are joined in so rendering a page does not query per review
+        query = RestaurantRating.query.options(
+            joinedload(RestaurantRating.user)
+        ).filter_by(restaurant_id=restaurant_id)
+        return paginate(
+            query,
+            [(RestaurantRating.created_at, True), (RestaurantRating.id, True)],
+            cursor=cursor,
         )
     except Exception as e:
         current_app.logger.error(
             f"Failed to fetch reviews for restaurant {restaurant_id}: {str(e)}"
         )
-        return []
+        return Page()
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional
+
+from flask import current_app
+from sqlalchemy import delete, func, select
+
+from app.extensions import db
+from app.models import MenuItem, OutboxEvent, Restaurant
+
+# Topics
+ORDERS = "orders"
+RATINGS = "ratings"
+CATALOGUE = "catalogue"
+
+
+def record(topic: str, type: str, key: int, payload: Optional[dict] = None) -> None:
+    """
+    Stage an event in the caller's transaction.
+
+    Nothing is committed here: the event is written if and only if the
+    caller commits the change it describes.
+
+    Args:
+        topic: ORDERS, RATINGS or CATALOGUE
+        type: What happened, e.g. ``order.created``
+        key: Id of the changed row
+        payload: JSON-serializable details of the change
+    """
+    db.session.add(OutboxEvent(topic=topic, type=type, key=key, payload=payload or {}))
+
+
+def record_menu_item(type: str, item: MenuItem) -> None:
+    """Stage a catalogue event for a menu item, e.g. ``menu_item.updated``."""
+    record(CATALOGUE, type, item.id, {"restaurant_id": item.restaurant_id})
+
+
+def record_restaurant(type: str, restaurant: Restaurant) -> None:
+    """Stage a catalogue event for a restaurant, e.g. ``restaurant.updated``."""
+    record(CATALOGUE, type, restaurant.id, {"slug": restaurant.slug})
+
+
+def _settled_before() -> datetime:
+    """Events written before this time belong to transactions that have ended."""
+    return datetime.now() - timedelta(seconds=current_app.config["OUTBOX_SETTLE_SECONDS"])
+
+
+def read(
+    after: int = 0,
+    limit: Optional[int] = None,
+    topics: Optional[Iterable[str]] = None,
+) -> List[OutboxEvent]:
+    """
+    Read the settled events after an offset, oldest first.
+
+    Offsets are handed out when an event is inserted, not when its
+    transaction commits, so a younger event can become visible before an
+    older one. Reading stops at the first event written less than
+    OUTBOX_SETTLE_SECONDS ago: every transaction that could still commit
+    an event with a lower offset has ended by then, so a consumer that
+    moves its offset past a batch never skips an event.
+
+    A primary key range scan, so a read costs the same however long the
+    outbox has grown.
+
+    Args:
+        after: Offset of the last event already processed, 0 for the start
+        limit: Maximum number of events, defaults to OUTBOX_BATCH_SIZE
+        topics: Only events of these topics
+
+    Returns:
+        Events in offset order; the last one's ``id`` is the next ``after``
+    """
+    limit = limit or current_app.config["OUTBOX_BATCH_SIZE"]
+    query = select(OutboxEvent).where(OutboxEvent.id > after)
+    if topics:
+        query = query.where(OutboxEvent.topic.in_(list(topics)))
+    settled_before = _settled_before()
+    events = []
+    for event in db.session.scalars(query.order_by(OutboxEvent.id).limit(limit)):
+        if event.created_at > settled_before:
+            break
+        events.append(event)
+    return events
+
+
+def tail(
+    after: int = 0,
+    batch_size: Optional[int] = None,
+    topics: Optional[Iterable[str]] = None,
+) -> Iterator[List[OutboxEvent]]:
+    """
+    Yield batches of settled events after an offset until the consumer has
+    caught up.
+
+    Args:
+        after: Offset of the last event already processed
+        batch_size: Events per batch, defaults to OUTBOX_BATCH_SIZE
+        topics: Only events of these topics
+
+    Returns:
+        Iterator of non-empty batches in offset order
+    """
+    topics = list(topics) if topics else None
+    batch_size = batch_size or current_app.config["OUTBOX_BATCH_SIZE"]
+    while True:
+        batch = read(after, batch_size, topics)
+        if not batch:
+            return
+        yield batch
+        after = batch[-1].id
+        if len(batch) < batch_size:
+            return
+
+
+def latest_offset() -> int:
+    """
+    Return the offset a new consumer can start reading after.
+
+    That is the offset before the first unsettled event, so no event still
+    being committed is skipped, or the newest offset if all have settled.
+    """
+    unsettled = db.session.scalar(
+        select(func.min(OutboxEvent.id)).where(OutboxEvent.created_at > _settled_before())
+    )
+    if unsettled is not None:
+        return unsettled - 1
+    return db.session.scalar(select(func.max(OutboxEvent.id))) or 0
+
+
+def as_message(event: OutboxEvent) -> dict:
+    """Serialize an event for consumers outside the app."""
+    return {
+        "offset": event.id,
+        "topic": event.topic,
+        "type": event.type,
+        "key": event.key,
+        "payload": event.payload,
+        "created_at": event.created_at.isoformat(),
+    }
+
+
+def prune(retention_days: Optional[int] = None) -> int:
+    """
+    Delete events older than the retention period and commit.
+
+    Events are deleted whether or not every consumer has read them: a
+    consumer that falls more than the retention period behind loses the
+    events it had not read yet and must resynchronize from the source
+    tables instead.
+
+    Args:
+        retention_days: Days of events to keep, defaults to
+            OUTBOX_RETENTION_DAYS
+
+    Returns:
+        Number of events deleted
+    """
+    if retention_days is None:
+        retention_days = current_app.config["OUTBOX_RETENTION_DAYS"]
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    result = db.session.execute(delete(OutboxEvent).where(OutboxEvent.created_at < cutoff))
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,137 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import ColumnElement
+
+# A sort key is an expression plus whether it is sorted descending
+SortKey = Tuple[ColumnElement, bool]
+
+
+@dataclass
+class Page:
+    """One page of keyset-paginated results.
+
+    Iterating, ``len()`` and truthiness behave like the underlying list,
+    so templates can treat a page exactly like the full result list it
+    replaces.
+
+    Attributes:
+        items: Rows on this page
+        next_cursor: Opaque token for the following page, None on the last page
+    """
+
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Serialize sort key values into a URL-safe cursor token."""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[List[Any]]:
+    """Parse a cursor token, returning None if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            return None
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+def _after(sort_keys: Sequence[SortKey], values: Sequence[Any]):
+    """Build the predicate selecting rows strictly after the cursor row."""
+    clauses = []
+    for i, (expression, descending) in enumerate(sort_keys):
+        ties = [sort_keys[j][0] == values[j] for j in range(i)]
+        beyond = expression < values[i] if descending else expression > values[i]
+        clauses.append(and_(*ties, beyond))
+    return or_(*clauses)
+
+
+def paginate(
+    query: Query,
+    sort_keys: Sequence[SortKey],
+    cursor: Optional[str] = None,
+    per_page: Optional[int] = None,
+) -> Page:
+    """
+    Fetch one page of a query using keyset (cursor) pagination.
+
+    Instead of an OFFSET, the cursor carries the sort key values of the
+    last row already shown, so every page is an index range scan that
+    costs the same no matter how deep the reader pages.
+
+    Args:
+        query: ORM query selecting a single entity, without ORDER BY or LIMIT
+        sort_keys: ``(expression, descending)`` pairs. The last key must be
+            unique (usually the primary key) so the order is total.
+        cursor: Token from a previous page's ``next_cursor``
+        per_page: Page size, defaults to the PAGE_SIZE setting
+
+    Returns:
+        Page of entities with the cursor for the following page
+    """
+    per_page = per_page or current_app.config["PAGE_SIZE"]
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if values is not None and len(values) == len(sort_keys):
+            query = query.filter(_after(sort_keys, values))
+        else:
+            current_app.logger.warning(f"Ignoring malformed page cursor: {cursor}")
+
+    rows = (
+        query.add_columns(*(expression for expression, _ in sort_keys))
+        .order_by(
+            *(
+                expression.desc() if descending else expression.asc()
+                for expression, descending in sort_keys
+            )
+        )
+        .limit(per_page + 1)
+        .all()
+    )
+
+    # The extra row only tells us whether another page exists
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(list(rows[-1][1:]))
+
+    return Page([row[0] for row in rows], next_cursor)
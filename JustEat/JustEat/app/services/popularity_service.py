@@ -0,0 +1,232 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Set
+
+from flask import current_app
+from sqlalchemy import bindparam, delete, func, select, update
+
+from app.extensions import db
+from app.models import ItemSalesBucket, MenuItem, Order, OrderItem, Restaurant
+from app.utils import insert_or_increment
+
+
+def bucket_start(at: datetime) -> datetime:
+    """Return the start of the hourly bucket containing ``at``."""
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def _window_start(hours: int, now: Optional[datetime] = None) -> datetime:
+    """First bucket of a window of ``hours`` buckets ending with the current one."""
+    return bucket_start(now or datetime.now()) - timedelta(hours=hours - 1)
+
+
+def record_sales(
+    restaurant_id: int,
+    quantities: Iterable[tuple],
+    at: Optional[datetime] = None,
+) -> None:
+    """
+    Add sold quantities to the current hourly buckets.
+
+    Also bumps the ``recent_sales`` totals that search ranks by, so search
+    never aggregates the buckets itself. Runs in the caller's transaction,
+    so the counters commit or roll back together with the order that
+    produced them.
+
+    Args:
+        restaurant_id: Restaurant the items belong to
+        quantities: ``(menu_item_id, quantity)`` pairs, repeats are summed
+        at: Time of the sale, defaults to now
+    """
+    totals = Counter()
+    for menu_item_id, quantity in quantities:
+        totals[menu_item_id] += quantity
+    if not totals:
+        return
+
+    hour = bucket_start(at or datetime.now())
+    insert_or_increment(
+        db.session.connection(),
+        ItemSalesBucket.__table__,
+        key_columns=("menu_item_id", "bucket_start"),
+        counter_columns=("quantity",),
+        rows=[
+            {
+                "menu_item_id": menu_item_id,
+                "bucket_start": hour,
+                "restaurant_id": restaurant_id,
+                "quantity": quantity,
+            }
+            for menu_item_id, quantity in totals.items()
+        ],
+    )
+
+    if hour < _window_start(_ranking_window_hours()):
+        return  # Already outside the ranking window
+    items, restaurants = MenuItem.__table__, Restaurant.__table__
+    connection = db.session.connection()
+    connection.execute(
+        update(items)
+        .where(items.c.id == bindparam("b_id"))
+        .values(recent_sales=items.c.recent_sales + bindparam("b_quantity")),
+        [
+            {"b_id": menu_item_id, "b_quantity": quantity}
+            for menu_item_id, quantity in totals.items()
+        ],
+    )
+    connection.execute(
+        update(restaurants)
+        .where(restaurants.c.id == restaurant_id)
+        .values(recent_sales=restaurants.c.recent_sales + sum(totals.values()))
+    )
+
+
+def _ranking_window_hours() -> int:
+    """Length of the search ranking window in hourly buckets."""
+    return current_app.config.get("SEARCH_RECENT_ORDER_DAYS", 7) * 24
+
+
+def refresh_recent_sales(hours: Optional[int] = None) -> int:
+    """
+    Recompute the ``recent_sales`` totals from the hourly buckets and commit.
+
+    ``record_sales`` only ever adds to the totals, so this is what drops
+    sales once they age out of the window; run it periodically (e.g.
+    hourly). Only rows whose total changed are written.
+
+    Args:
+        hours: Window length in hourly buckets, defaults to
+            SEARCH_RECENT_ORDER_DAYS
+
+    Returns:
+        Number of menu items and restaurants updated
+    """
+    since = _window_start(hours or _ranking_window_hours())
+    updated = 0
+    for table, owner in (
+        (MenuItem.__table__, ItemSalesBucket.menu_item_id),
+        (Restaurant.__table__, ItemSalesBucket.restaurant_id),
+    ):
+        volume = func.coalesce(
+            select(func.sum(ItemSalesBucket.quantity))
+            .where(owner == table.c.id, ItemSalesBucket.bucket_start >= since)
+            .scalar_subquery(),
+            0,
+        )
+        result = db.session.execute(
+            update(table)
+            .where(table.c.recent_sales != volume)
+            .values(recent_sales=volume)
+        )
+        updated += result.rowcount
+    db.session.commit()
+    return updated
+
+
+def popular_item_ids(
+    restaurant_id: Optional[int] = None,
+    menu_item_ids: Optional[Iterable[int]] = None,
+    min_quantity: int = 1,
+    hours: int = 24,
+) -> Set[int]:
+    """
+    Return items that sold more than ``min_quantity`` units recently.
+
+    The window is counted in whole hourly buckets, so it reaches back to
+    the start of the hour ``hours - 1`` hours ago.
+
+    Args:
+        restaurant_id: Limit to one restaurant's items
+        menu_item_ids: Limit to these items
+        min_quantity: Units an item must exceed to count as popular
+        hours: Window length in hours
+
+    Returns:
+        IDs of popular menu items
+    """
+    query = select(ItemSalesBucket.menu_item_id).where(
+        ItemSalesBucket.bucket_start >= _window_start(hours)
+    )
+    if restaurant_id is not None:
+        query = query.where(ItemSalesBucket.restaurant_id == restaurant_id)
+    if menu_item_ids is not None:
+        query = query.where(ItemSalesBucket.menu_item_id.in_(list(menu_item_ids)))
+
+    query = query.group_by(ItemSalesBucket.menu_item_id).having(
+        func.sum(ItemSalesBucket.quantity) > min_quantity
+    )
+    return set(db.session.execute(query).scalars())
+
+
+def prune(retention_days: Optional[int] = None) -> int:
+    """
+    Delete buckets older than the retention period and commit.
+
+    Args:
+        retention_days: Days of buckets to keep, defaults to
+            POPULARITY_RETENTION_DAYS
+
+    Returns:
+        Number of buckets deleted
+    """
+    if retention_days is None:
+        retention_days = current_app.config["POPULARITY_RETENTION_DAYS"]
+    cutoff = bucket_start(datetime.now()) - timedelta(days=retention_days)
+    result = db.session.execute(
+        delete(ItemSalesBucket).where(ItemSalesBucket.bucket_start < cutoff)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def rebuild(retention_days: Optional[int] = None) -> int:
+    """
+    Recompute the buckets and ``recent_sales`` totals from order history
+    and commit.
+
+    Used to backfill the counters on an existing database.
+
+    Args:
+        retention_days: Days of history to rebuild, defaults to
+            POPULARITY_RETENTION_DAYS
+
+    Returns:
+        Number of buckets written
+    """
+    if retention_days is None:
+        retention_days = current_app.config["POPULARITY_RETENTION_DAYS"]
+    since = bucket_start(datetime.now()) - timedelta(days=retention_days)
+
+    rows = db.session.execute(
+        select(
+            OrderItem.menu_item_id,
+            Order.restaurant_id,
+            OrderItem.created_at,
+            OrderItem.quantity,
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(OrderItem.created_at >= since)
+    ).all()
+
+    buckets = Counter()
+    owners = {}
+    for menu_item_id, restaurant_id, created_at, quantity in rows:
+        buckets[(menu_item_id, bucket_start(created_at))] += quantity
+        owners[menu_item_id] = restaurant_id
+
+    db.session.execute(delete(ItemSalesBucket))
+    if buckets:
+        db.session.execute(
+            ItemSalesBucket.__table__.insert(),
+            [
+                {
+                    "menu_item_id": menu_item_id,
+                    "bucket_start": hour,
+                    "restaurant_id": owners[menu_item_id],
+                    "quantity": quantity,
+                }
+                for (menu_item_id, hour), quantity in buckets.items()
+            ],
+        )
+    refresh_recent_sales()
+    return len(buckets)
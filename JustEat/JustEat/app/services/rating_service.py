@@ -0,0 +1,270 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from flask import current_app
+from sqlalchemy import bindparam, case, func, or_, select, update
+
+from app.extensions import db
+from app.models import MenuItem, MenuItemRating, Restaurant, RestaurantRating
+
+# Stored aggregates closer than this to the recomputed ones are left alone
+_TOLERANCE = 1e-6
+
+# Histogram columns, one per star level
+STARS = range(1, 6)
+
+
+def star_bucket(rating: float) -> int:
+    """Histogram bucket of a rating: rounded half up and clamped to 1-5."""
+    return min(max(int(rating + 0.5), 1), 5)
+
+
+def _star_bucket_sql(rating):
+    """SQL twin of ``star_bucket``."""
+    return case(*((rating < stars + 0.5, stars) for stars in range(1, 5)), else_=5)
+
+
+def _bayesian_score(total, count):
+    """
+    SQL Bayesian average of ratings.
+
+    Blends the row's ratings with RATING_PRIOR_WEIGHT phantom ratings of
+    RATING_PRIOR_MEAN, so one 5-star review cannot outrank thousands of
+    4.7s while well-reviewed rows converge on their true average.
+    """
+    mean = current_app.config["RATING_PRIOR_MEAN"]
+    weight = current_app.config["RATING_PRIOR_WEIGHT"]
+    return (mean * weight + total) / (weight + count)
+
+
+def _add_statement(model: Type[db.Model]):
+    """
+    Atomic UPDATE adding one row's new ratings to its aggregates.
+
+    Takes the rating total ``b_sum``, their number ``b_count`` and the
+    per-star counts ``b_r1`` .. ``b_r5``.
+
+    The new values are computed by the database from the current row, so
+    concurrent reviews cannot overwrite each other. Rows created before
+    ``rating_sum`` existed fall back to ``avg_rating * rating_count``.
+    """
+    table = model.__table__
+    current_sum = func.coalesce(
+        table.c.rating_sum, table.c.avg_rating * table.c.rating_count
+    )
+    new_sum = current_sum + bindparam("b_sum")
+    new_count = func.coalesce(table.c.rating_count, 0) + bindparam("b_count")
+    # The average is assigned first: MySQL evaluates SET clauses left to
+    # right against already updated columns
+    return (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .ordered_values(
+            (table.c.avg_rating, new_sum / new_count),
+            (table.c.rank_score, _bayesian_score(new_sum, new_count)),
+            (table.c.rating_sum, new_sum),
+            (table.c.rating_count, new_count),
+            *(
+                (
+                    table.c[f"rating_{stars}"],
+                    func.coalesce(table.c[f"rating_{stars}"], 0) + bindparam(f"b_r{stars}"),
+                )
+                for stars in STARS
+            ),
+        )
+    )
+
+
+def add_to_aggregates(
+    model: Type[db.Model], ratings: Iterable[Tuple[int, float]]
+) -> int:
+    """
+    Fold new ratings into the stored aggregates of restaurants or menu items.
+
+    Ratings of the same row are summed first, then every row is updated by
+    one executemany of the atomic UPDATE. Runs in the caller's transaction.
+
+    Args:
+        model: Restaurant or MenuItem
+        ratings: ``(row id, rating)`` pairs
+
+    Returns:
+        Number of rows updated
+    """
+    deltas = defaultdict(
+        lambda: {"b_sum": 0.0, "b_count": 0, **{f"b_r{stars}": 0 for stars in STARS}}
+    )
+    for id, rating in ratings:
+        delta = deltas[id]
+        delta["b_sum"] += rating
+        delta["b_count"] += 1
+        delta[f"b_r{star_bucket(rating)}"] += 1
+    if not deltas:
+        return 0
+
+    db.session.execute(
+        _add_statement(model),
+        [{"b_id": id, **delta} for id, delta in deltas.items()],
+    )
+    return len(deltas)
+
+
+def add_restaurant_ratings(ratings: Iterable[Tuple[int, float]]) -> int:
+    """Fold ``(restaurant_id, rating)`` pairs into restaurant aggregates."""
+    return add_to_aggregates(Restaurant, ratings)
+
+
+def add_menu_item_ratings(ratings: Iterable[Tuple[int, float]]) -> int:
+    """Fold ``(menu_item_id, rating)`` pairs into menu item aggregates."""
+    return add_to_aggregates(MenuItem, ratings)
+
+
+def _corrections(
+    model: Type[db.Model], rating_model: Type[db.Model], foreign_key, low: int, high: int
+) -> List[dict]:
+    """
+    Recompute the aggregates of rows with ids in ``[low, high)``.
+
+    One grouped query over the raw ratings of the chunk, outer joined to
+    the rows so unrated rows are checked too.
+
+    Returns:
+        Update parameters for the rows whose stored aggregates are wrong,
+        with the stored ``rating_count`` they were compared against
+    """
+    bucket = _star_bucket_sql(rating_model.rating)
+    totals = (
+        select(
+            foreign_key.label("id"),
+            func.count().label("count"),
+            func.sum(rating_model.rating).label("total"),
+            *(
+                func.sum(case((bucket == stars, 1), else_=0)).label(f"r{stars}")
+                for stars in STARS
+            ),
+        )
+        .where(foreign_key >= low, foreign_key < high)
+        .group_by(foreign_key)
+        .subquery()
+    )
+    count = func.coalesce(totals.c.count, 0)
+    total = func.coalesce(totals.c.total, 0.0)
+    average = case((count > 0, total / count), else_=0.0)
+    score = _bayesian_score(total, count)
+    histogram = [func.coalesce(totals.c[f"r{stars}"], 0) for stars in STARS]
+    stored_histogram = [getattr(model, f"rating_{stars}") for stars in STARS]
+
+    rows = db.session.execute(
+        select(model.id, model.rating_count, count, total, average, score, *histogram)
+        .outerjoin(totals, totals.c.id == model.id)
+        .where(
+            model.id >= low,
+            model.id < high,
+            or_(
+                model.rating_count.is_(None),
+                model.rating_sum.is_(None),
+                model.avg_rating.is_(None),
+                model.rank_score.is_(None),
+                model.rating_count != count,
+                func.abs(model.rating_sum - total) > _TOLERANCE,
+                func.abs(model.avg_rating - average) > _TOLERANCE,
+                func.abs(model.rank_score - score) > _TOLERANCE,
+                *(column.is_(None) for column in stored_histogram),
+                *(
+                    column != expected
+                    for column, expected in zip(stored_histogram, histogram)
+                ),
+            ),
+        )
+    ).all()
+    return [
+        {
+            "b_id": id,
+            "b_seen": seen,
+            "b_count": count,
+            "b_sum": total,
+            "b_avg": average,
+            "b_score": score,
+            **{f"b_r{stars}": n for stars, n in zip(STARS, stars_counts)},
+        }
+        for id, seen, count, total, average, score, *stars_counts in rows
+    ]
+
+
+def _reconcile_model(
+    model: Type[db.Model],
+    rating_model: Type[db.Model],
+    foreign_key,
+    chunk_size: int,
+    dry_run: bool,
+) -> List[int]:
+    """
+    Reconcile one table chunk by chunk, committing after each chunk.
+
+    A rating added between reading a chunk and writing it bumps the row's
+    ``rating_count``, so each write only applies while the count is still
+    the one that was read. Rows that changed in between are left for the
+    next run rather than overwritten with stale totals.
+    """
+    table = model.__table__
+    fix = (
+        update(table)
+        .where(
+            table.c.id == bindparam("b_id"),
+            table.c.rating_count.is_not_distinct_from(bindparam("b_seen")),
+        )
+        .values(
+            avg_rating=bindparam("b_avg"),
+            rank_score=bindparam("b_score"),
+            rating_sum=bindparam("b_sum"),
+            rating_count=bindparam("b_count"),
+            **{f"rating_{stars}": bindparam(f"b_r{stars}") for stars in STARS},
+        )
+    )
+
+    corrected = []
+    low, last = db.session.execute(select(func.min(model.id), func.max(model.id))).one()
+    while low is not None and low <= last:
+        high = low + chunk_size
+        rows = _corrections(model, rating_model, foreign_key, low, high)
+        if not dry_run:
+            rows = [row for row in rows if db.session.execute(fix, row).rowcount]
+        # End the transaction so locks are held for one chunk at most
+        db.session.commit()
+        corrected += [row["b_id"] for row in rows]
+        low = high
+    return corrected
+
+
+def reconcile(
+    chunk_size: Optional[int] = None, dry_run: bool = False
+) -> Dict[str, List[int]]:
+    """
+    Rebuild every rating aggregate from the raw rating tables.
+
+    Rows are processed in id ranges of ``chunk_size``, each in its own
+    short transaction, so the job can run against a live database. Only
+    rows whose stored aggregates disagree with their ratings are written,
+    which includes rank scores computed with a since-changed prior.
+
+    Args:
+        chunk_size: Rows per transaction, defaults to RATING_RECONCILE_CHUNK_SIZE
+        dry_run: Report the drifted rows without correcting them
+
+    Returns:
+        Ids of the corrected rows, keyed by "restaurants" and "menu_items"
+    """
+    chunk_size = chunk_size or current_app.config["RATING_RECONCILE_CHUNK_SIZE"]
+    corrected = {
+        "restaurants": _reconcile_model(
+            Restaurant, RestaurantRating, RestaurantRating.restaurant_id, chunk_size, dry_run
+        ),
+        "menu_items": _reconcile_model(
+            MenuItem, MenuItemRating, MenuItemRating.menu_item_id, chunk_size, dry_run
+        ),
+    }
+    current_app.logger.info(
+        f"Rating reconciliation found {len(corrected['restaurants'])} restaurants "
+        f"and {len(corrected['menu_items'])} menu items out of date"
+    )
+    return corrected
@@ -5,20 +5,42 @@ from flask import current_app
 
 from app.extensions import db
 from app.models import Category, Cuisine, Restaurant, User
+from app.services import autocomplete_service, geo_index, outbox_service
+from app.services import search_cache
+from app.services.pagination import Page, paginate
 from app.utils import generate_restaurant_slug
 
 # only handles restaurant-related operations (Single Responsibility Principle)
-def get_all_restaurants() -> List[Restaurant]:
-    """Retrieve all active restaurants sorted by creation date."""
+def get_all_restaurants(cursor: Optional[str] = None, top_rated: bool = False) -> Page:
+    """Retrieve one page of active restaurants, newest or best rated first."""
+    try:
+        if top_rated:
+            # Walks the rank_score index instead of sorting every restaurant
+            sort_keys = [(Restaurant.rank_score, True), (Restaurant.id, True)]
+        else:
+            sort_keys = [(Restaurant.created_at, True), (Restaurant.id, True)]
+        return paginate(
+            Restaurant.query.filter(Restaurant.is_active == True),
+            sort_keys,
+            cursor=cursor,
+        )
+    except Exception as e:
+        current_app.logger.error(f"Failed to fetch all restaurants: {str(e)}")
+        return Page()
+
+
+def get_restaurant_filter_options() -> list:
+    """Retrieve id, name and location of active restaurants for filter menus."""
     try:
         return (
             Restaurant.query
+            .with_entities(Restaurant.id, Restaurant.name, Restaurant.location)
             .filter(Restaurant.is_active == True)
-            .order_by(Restaurant.created_at.desc())
+            .order_by(Restaurant.name.asc())
             .all()
         )
     except Exception as e:
-        current_app.logger.error(f"Failed to fetch all restaurants: {str(e)}")
+        current_app.logger.error(f"Failed to fetch restaurant filter options: {str(e)}")
         return []
 
 
@@ -52,7 +74,9 @@ def create_new_restaurant(
     name: str,
     location: str,
     opening_time: time,
-    closing_time: time
+    closing_time: time,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
 ) -> Optional[Restaurant]:
     """Create a new restaurant with generated slug."""
     try:
@@ -64,10 +88,12 @@ def create_new_restaurant(
             closing_time=closing_time,
             is_active=False  # New restaurants inactive by default
         )
+        set_coordinates(restaurant, latitude, longitude)
 
         db.session.add(restaurant)
         db.session.flush()  # Get ID before slug generation
         restaurant.slug = generate_restaurant_slug(restaurant.name, restaurant.id)
+        outbox_service.record_restaurant("restaurant.created", restaurant)
         db.session.commit()
 
         current_app.logger.info(f"Created new restaurant {restaurant.id}")
@@ -87,7 +113,9 @@ def update_restaurant_details(
     name: str,
     location: str,
     opening_time: time,
-    closing_time: time
+    closing_time: time,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
 ) -> Optional[Restaurant]:
     """Update restaurant details and regenerate slug if name changed."""
     try:
@@ -96,16 +124,24 @@ def update_restaurant_details(
             current_app.logger.warning(f"Restaurant not found for slug {slug}")
             return None
 
+        old_suggestion = autocomplete_service.restaurant_suggestion(restaurant)
+        old_change = search_cache.restaurant_change(restaurant)
         name_changed = restaurant.name != name
         restaurant.name = name.strip()
         restaurant.location = location.strip()
         restaurant.opening_time = opening_time
         restaurant.closing_time = closing_time
+        set_coordinates(restaurant, latitude, longitude)
 
         if name_changed:
             restaurant.slug = generate_restaurant_slug(restaurant.name, restaurant.id)
+        outbox_service.record_restaurant("restaurant.updated", restaurant)
 
         db.session.commit()
+        if restaurant.is_active:
+            autocomplete_service.remove(old_suggestion)
+            autocomplete_service.add(autocomplete_service.restaurant_suggestion(restaurant))
+        search_cache.invalidate(old_change, search_cache.restaurant_change(restaurant))
         current_app.logger.info(f"Updated details for restaurant {restaurant.id}")
         return restaurant
 
@@ -118,11 +154,33 @@ def update_restaurant_details(
         return None
 
 
+def set_coordinates(
+    restaurant: Restaurant, latitude: Optional[float], longitude: Optional[float]
+) -> None:
+    """Store coordinates with their precomputed geohash cell."""
+    if latitude is None or longitude is None:
+        restaurant.latitude = restaurant.longitude = restaurant.geohash = None
+        return
+    restaurant.latitude = latitude
+    restaurant.longitude = longitude
+    restaurant.geohash = geo_index.encode(latitude, longitude)
+
+
 def update_restaurant_status(restaurant: Restaurant, status: bool) -> bool:
     """Toggle restaurant active/inactive status."""
     try:
+        was_active = restaurant.is_active
         restaurant.is_active = status
+        outbox_service.record_restaurant("restaurant.updated", restaurant)
         db.session.commit()
+
+        suggestion = autocomplete_service.restaurant_suggestion(restaurant)
+        if status and not was_active:
+            autocomplete_service.add(suggestion)
+        elif was_active and not status:
+            autocomplete_service.remove(suggestion)
+        search_cache.invalidate(search_cache.restaurant_change(restaurant))
+
         current_app.logger.info(
             f"Set status to {'active' if status else 'inactive'} "
             f"for restaurant {restaurant.id}"
@@ -143,8 +201,11 @@ def update_restaurant_cuisines(
     """Update restaurant's cuisine associations."""
     try:
         cuisines = Cuisine.query.filter(Cuisine.id.in_(cuisine_ids)).all()
+        old_change = search_cache.restaurant_change(restaurant)
         restaurant.cuisines = cuisines
+        outbox_service.record_restaurant("restaurant.updated", restaurant)
         db.session.commit()
+        search_cache.invalidate(old_change, search_cache.restaurant_change(restaurant))
         current_app.logger.info(
             f"Updated {len(cuisines)} cuisines for restaurant {restaurant.id}"
         )
@@ -178,8 +239,22 @@ def get_all_categories() -> List[Category]:
 def delete_restaurant(restaurant: Restaurant) -> bool:
     """Permanently delete a restaurant."""
     try:
+        # Menu items are deleted with the restaurant, so unlist them too
+        suggestions = [
+            autocomplete_service.menu_item_suggestion(item)
+            for item in restaurant.menu_items
+            if item.is_active
+        ]
+        if restaurant.is_active:
+            suggestions.append(autocomplete_service.restaurant_suggestion(restaurant))
+        change = search_cache.restaurant_change(restaurant)
+
+        outbox_service.record_restaurant("restaurant.deleted", restaurant)
         db.session.delete(restaurant)
         db.session.commit()
+        for suggestion in suggestions:
+            autocomplete_service.remove(suggestion)
+        search_cache.invalidate(change)
         current_app.logger.warning(f"Deleted restaurant {restaurant.id}")
         return True
     except Exception as e:
@@ -188,34 +263,4 @@ def delete_restaurant(restaurant: Restaurant) -> bool:
             exc_info=True
         )
         db.session.rollback()
-        return False
-
-
-def update_restaurant_rating(restaurant_id: int, new_rating: float) -> bool:
-    """Update restaurant's average rating with new review."""
-    try:
-        restaurant = Restaurant.query.get(restaurant_id)
-        if not restaurant:
-            current_app.logger.warning(f"Restaurant {restaurant_id} not found")
-            return False
-
-        if restaurant.rating_count == 0:
-            restaurant.avg_rating = new_rating
-            restaurant.rating_count = 1
-        else:
-            total = restaurant.avg_rating * restaurant.rating_count
-            total += new_rating
-            restaurant.rating_count += 1
-            restaurant.avg_rating = total / restaurant.rating_count
-
-        db.session.commit()
-        current_app.logger.debug(
-            f"Updated rating for restaurant {restaurant_id} to {restaurant.avg_rating}"
-        )
-        return True
-    except Exception as e:
-        current_app.logger.error(
-            f"Failed to update rating for restaurant {restaurant_id}: {str(e)}"
-        )
-        db.session.rollback()
         return False
\ No newline at end of file
@@ -0,0 +1,309 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from flask import Flask, current_app
+
+from app.models import MenuItem, Restaurant
+from app.services.search_index import tokenize
+
+# Normalized (query, cuisine ids, restaurant ids, price min, price max,
+# restaurant cursor, menu item cursor, near-me circle, with menu items)
+CacheKey = Tuple[
+    str, tuple, tuple, Optional[float], Optional[float], Optional[str], Optional[str],
+    Optional[tuple], bool,
+]
+
+
+class CachedSearch(NamedTuple):
+    """Result of one filtered search, stored as ids rather than ORM objects.
+
+    Attributes:
+        restaurant_ids: Ids of the restaurant page, in rank order
+        restaurant_cursor: Next cursor of the restaurant page
+        menu_item_ids: Ids of the menu item page, in rank order
+        menu_item_cursor: Next cursor of the menu item page
+        depends_on: Restaurants whose rows appear in either page
+        expires_at: Monotonic time after which the entry is stale
+    """
+
+    restaurant_ids: List[int]
+    restaurant_cursor: Optional[str]
+    menu_item_ids: List[int]
+    menu_item_cursor: Optional[str]
+    depends_on: FrozenSet[int]
+    expires_at: float
+
+
+class CatalogueChange(NamedTuple):
+    """Searchable state of a restaurant or menu item around a write.
+
+    Attributes:
+        restaurant_id: Restaurant the changed row belongs to
+        menu_item_id: Changed menu item, None for a restaurant change
+        cuisine_ids: Cuisines the row can be filtered by
+        texts: Searchable text of the row (names, description, location)
+        reprices: The write added, removed or repriced an active dish, so
+            any price-filtered search may list its restaurant differently
+    """
+
+    restaurant_id: int
+    menu_item_id: Optional[int]
+    cuisine_ids: FrozenSet[int]
+    texts: Tuple[str, ...]
+    reprices: bool = False
+
+
+def make_key(
+    query: Optional[str],
+    cuisine_ids: Iterable[int],
+    restaurant_ids: Iterable[int],
+    price_min: Optional[float],
+    price_max: Optional[float],
+    restaurant_cursor: Optional[str],
+    menu_item_cursor: Optional[str],
+    near: Optional[tuple] = None,
+    with_menu_items: bool = True,
+) -> CacheKey:
+    """Build a cache key that is equal for equivalent searches."""
+    return (
+        " ".join(tokenize(query)),
+        tuple(sorted(set(cuisine_ids))),
+        tuple(sorted(set(restaurant_ids))),
+        price_min,
+        price_max,
+        restaurant_cursor,
+        menu_item_cursor,
+        tuple(near) if near else None,
+        with_menu_items,
+    )
+
+
+def _query_matches(query: str, texts: Iterable[str]) -> bool:
+    """Whether a search for ``query`` could match a row with these texts.
+
+    Mirrors both backends: every query token is a prefix of some word
+    (FTS5), or the whole query is a substring of some text (``ilike``).
+    """
+    texts = [text.lower() for text in texts if text]
+    words = tokenize(" ".join(texts))
+    if all(any(word.startswith(token) for word in words) for token in tokenize(query)):
+        return True
+    return any(query in text for text in texts)
+
+
+class SearchCache:
+    """LRU cache of search results with a time to live.
+
+    Entries are dropped when a catalogue write could change them: the
+    changed row (or, for a restaurant, any of its dishes) already appears
+    in the results, the changed row passes the entry's filters and
+    matches its query, or a dish was repriced and the entry filters by
+    price (its restaurant is matched on its own cuisines and text, which
+    the dish does not carry). Facet counts span the whole catalogue, so they are
+    kept alongside and all dropped on any catalogue write.
+
+    Ranking snapshots (the ranked ids a paged search started from) are
+    kept separately and never invalidated: later pages must keep the
+    order the first page was cut from, even after a write.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        max_snapshots: int = 0,
+        snapshot_ttl: float = 0,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_snapshots = max_snapshots
+        self.snapshot_ttl = snapshot_ttl
+        self._entries: "OrderedDict[CacheKey, CachedSearch]" = OrderedDict()
+        self._facets: "OrderedDict[CacheKey, Tuple[dict, float]]" = OrderedDict()
+        self._snapshots: "OrderedDict[str, Tuple[List[int], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[CachedSearch]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(
+        self,
+        key: CacheKey,
+        restaurants: List[Restaurant],
+        restaurant_cursor: Optional[str],
+        menu_items: List[MenuItem],
+        menu_item_cursor: Optional[str],
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        entry = CachedSearch(
+            restaurant_ids=[r.id for r in restaurants],
+            restaurant_cursor=restaurant_cursor,
+            menu_item_ids=[item.id for item in menu_items],
+            menu_item_cursor=menu_item_cursor,
+            depends_on=frozenset(
+                [r.id for r in restaurants] + [item.restaurant_id for item in menu_items]
+            ),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_facets(self, key: CacheKey) -> Optional[dict]:
+        with self._lock:
+            cached = self._facets.get(key)
+            if cached is None:
+                return None
+            facets, expires_at = cached
+            if expires_at < time.monotonic():
+                del self._facets[key]
+                return None
+            self._facets.move_to_end(key)
+            return facets
+
+    def put_facets(self, key: CacheKey, facets: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._facets[key] = (facets, time.monotonic() + self.ttl)
+            self._facets.move_to_end(key)
+            while len(self._facets) > self.max_entries:
+                self._facets.popitem(last=False)
+
+    def get_snapshot(self, token: str) -> Optional[List[int]]:
+        with self._lock:
+            cached = self._snapshots.get(token)
+            if cached is None:
+                return None
+            ids, expires_at = cached
+            if expires_at < time.monotonic():
+                del self._snapshots[token]
+                return None
+            self._snapshots.move_to_end(token)
+            return ids
+
+    def put_snapshot(self, ids: List[int]) -> str:
+        """Keep a ranked id list and return the token that finds it again."""
+        token = secrets.token_urlsafe(8)
+        if self.max_snapshots <= 0:
+            return token
+        with self._lock:
+            self._snapshots[token] = (ids, time.monotonic() + self.snapshot_ttl)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return token
+
+    def invalidate(self, changes: Iterable[CatalogueChange]) -> int:
+        """Drop every entry one of the changes could affect.
+
+        Returns:
+            Number of result entries dropped
+        """
+        changes = list(changes)
+        with self._lock:
+            if changes:
+                self._facets.clear()
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if any(self._affects(change, key, entry) for change in changes)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    @staticmethod
+    def _affects(change: CatalogueChange, key: CacheKey, entry: CachedSearch) -> bool:
+        query, cuisine_ids, restaurant_ids = key[0], key[1], key[2]
+        if change.reprices and (key[3] is not None or key[4] is not None):
+            return True
+        if change.menu_item_id is not None:
+            if change.menu_item_id in entry.menu_item_ids:
+                return True
+        elif change.restaurant_id in entry.depends_on:
+            return True
+        if restaurant_ids and change.restaurant_id not in restaurant_ids:
+            return False
+        if cuisine_ids and not change.cuisine_ids.intersection(cuisine_ids):
+            return False
+        return not query or _query_matches(query, change.texts)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._facets.clear()
+            self._snapshots.clear()
+
+
+def menu_item_change(item: MenuItem, reprices: bool = False) -> CatalogueChange:
+    """Capture the searchable state of a menu item.
+
+    Pass ``reprices`` when the write changed the item's price or whether
+    it is active.
+    """
+    return CatalogueChange(
+        restaurant_id=item.restaurant_id,
+        menu_item_id=item.id,
+        cuisine_ids=frozenset([item.cuisine_id]),
+        texts=(
+            item.name,
+            item.description,
+            item.cuisine.name if item.cuisine else None,
+            item.category.name if item.category else None,
+        ),
+        reprices=reprices,
+    )
+
+
+def restaurant_change(restaurant: Restaurant) -> CatalogueChange:
+    """Capture the searchable state of a restaurant."""
+    return CatalogueChange(
+        restaurant_id=restaurant.id,
+        menu_item_id=None,
+        cuisine_ids=frozenset(c.id for c in restaurant.cuisines),
+        texts=(restaurant.name, restaurant.location),
+    )
+
+
+def init_app(app: Flask) -> None:
+    """
+    Attach a search result cache to the application.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    app.extensions["search_cache"] = SearchCache(
+        max_entries=app.config.get("SEARCH_CACHE_SIZE", 512),
+        ttl=app.config.get("SEARCH_CACHE_TTL", 60),
+        max_snapshots=app.config.get("SEARCH_SNAPSHOTS", 1024),
+        snapshot_ttl=app.config.get("SEARCH_SNAPSHOT_TTL", 900),
+    )
+
+
+def get_cache() -> SearchCache:
+    """Return the search result cache of the current application."""
+    return current_app.extensions["search_cache"]
+
+
+def invalidate(*changes: CatalogueChange) -> None:
+    """Drop cached searches affected by catalogue writes."""
+    dropped = get_cache().invalidate(changes)
+    if dropped:
+        current_app.logger.debug(f"Invalidated {dropped} cached searches")
@@ -0,0 +1,387 @@
+import re
+from typing import Dict, List, Type
+
+from flask import Flask, current_app
+from sqlalchemy import (
+    case,
+    column,
+    event,
+    false,
+    func,
+    literal_column,
+    or_,
+    bindparam,
+    select,
+    table,
+    text,
+    update,
+)
+from sqlalchemy.sql import Select
+
+from app.extensions import db
+from app.models import (
+    NORMALIZED_NAME_MODELS,
+    Category,
+    Cuisine,
+    MenuItem,
+    Restaurant,
+    normalize_text,
+)
+
+# Tokens are matched as prefixes so partially typed words still hit the index
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(query: str) -> List[str]:
+    """Split a search query into accent- and case-folded word tokens."""
+    return _TOKEN_PATTERN.findall(normalize_text(query))
+
+
+def prefix_range(column, prefix: str):
+    """Match ``column`` values starting with ``prefix`` as an index range.
+
+    Unlike ``LIKE 'x%'``, a plain range comparison can use a B-tree index
+    on every database regardless of its LIKE collation rules, which is
+    how database-backed autocomplete reads the ``name_normalized`` indexes.
+    """
+    return (column >= prefix) & (column < prefix + "\uffff")
+
+
+class SearchBackend:
+    """Base class for search index backends.
+
+    A backend owns whatever storage it needs to answer text queries and
+    exposes the matches as selectables of ``(id, score)`` rows, so the
+    search service can join them against the model tables and apply its
+    own filters and ranking.
+
+    Scores lie in ``[0, 2)``: a hit on the name contributes 1, and the
+    remaining fraction grades how well the other columns match. Any name
+    hit therefore outranks every description-only hit.
+    """
+
+    name = "base"
+
+    def create_schema(self, connection) -> None:
+        """Create index storage after the model tables exist."""
+
+    def drop_schema(self, connection) -> None:
+        """Drop index storage before the model tables are dropped."""
+
+    def rebuild(self, connection) -> None:
+        """Repopulate the index from the model tables."""
+
+    def restaurant_matches(self, query: str) -> Select:
+        """Return a select of ``(id, score)`` for matching restaurants."""
+        raise NotImplementedError
+
+    def menu_item_matches(self, query: str) -> Select:
+        """Return a select of ``(id, score)`` for matching menu items."""
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """Fallback backend using substring predicates.
+
+    Needs no extra storage, so it works on any database, but every query
+    is a full scan of the searched tables: substring matches cannot use
+    the ``name_normalized`` indexes, which serve prefix lookups instead.
+    Matching against those columns saves folding names at query time;
+    only free text (location, description) still needs ``ilike``.
+    """
+
+    name = "like"
+
+    @staticmethod
+    def _name_score(column, term: str):
+        # Names starting with the query outrank names merely containing it
+        return case(
+            (prefix_range(column, term), 1.75),
+            (column.contains(term, autoescape=True), 1.5),
+            else_=0.5,
+        )
+
+    def restaurant_matches(self, query: str) -> Select:
+        term = normalize_text(query)
+        pattern = f"%{query.strip().lower()}%"
+        return select(
+            Restaurant.id.label("id"),
+            self._name_score(Restaurant.name_normalized, term).label("score"),
+        ).where(
+            or_(
+                Restaurant.name_normalized.contains(term, autoescape=True),
+                Restaurant.location.ilike(pattern),
+            )
+        )
+
+    def menu_item_matches(self, query: str) -> Select:
+        term = normalize_text(query)
+        pattern = f"%{query.strip().lower()}%"
+        return (
+            select(
+                MenuItem.id.label("id"),
+                self._name_score(MenuItem.name_normalized, term).label("score"),
+            )
+            .join(Cuisine, MenuItem.cuisine_id == Cuisine.id)
+            .join(Category, MenuItem.category_id == Category.id)
+            .where(
+                or_(
+                    MenuItem.name_normalized.contains(term, autoescape=True),
+                    MenuItem.description.ilike(pattern),
+                    Cuisine.name_normalized.contains(term, autoescape=True),
+                    Category.name_normalized.contains(term, autoescape=True),
+                )
+            )
+        )
+
+
+class Fts5SearchBackend(SearchBackend):
+    """SQLite FTS5 backend kept in sync with the model tables by triggers.
+
+    ``restaurant_search`` is an external-content index over
+    ``restaurants(name, location)``. ``menu_item_search`` stores each menu
+    item's name and description together with its cuisine and category
+    names, so a single MATCH covers what used to take three joins.
+    """
+
+    name = "fts5"
+
+    RESTAURANT_TABLE = "restaurant_search"
+    MENU_ITEM_TABLE = "menu_item_search"
+
+    # Column weights for bm25(): a name hit outranks any other column
+    RESTAURANT_WEIGHTS = (10.0, 2.0)  # name, location
+    MENU_ITEM_WEIGHTS = (10.0, 1.0, 4.0, 4.0)  # name, description, cuisine, category
+
+    _SCHEMA = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS restaurant_search USING fts5(
+            name, location,
+            content='restaurants', content_rowid='id',
+            tokenize="unicode61 remove_diacritics 2"
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS menu_item_search USING fts5(
+            name, description, cuisine, category,
+            cuisine_id UNINDEXED, category_id UNINDEXED,
+            tokenize="unicode61 remove_diacritics 2"
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS restaurant_search_ai AFTER INSERT ON restaurants
+        BEGIN
+            INSERT INTO restaurant_search(rowid, name, location)
+            VALUES (new.id, new.name, new.location);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS restaurant_search_ad AFTER DELETE ON restaurants
+        BEGIN
+            INSERT INTO restaurant_search(restaurant_search, rowid, name, location)
+            VALUES ('delete', old.id, old.name, old.location);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS restaurant_search_au
+        AFTER UPDATE OF name, location ON restaurants
+        BEGIN
+            INSERT INTO restaurant_search(restaurant_search, rowid, name, location)
+            VALUES ('delete', old.id, old.name, old.location);
+            INSERT INTO restaurant_search(rowid, name, location)
+            VALUES (new.id, new.name, new.location);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS menu_item_search_ai AFTER INSERT ON menu_items
+        BEGIN
+            INSERT INTO menu_item_search(
+                rowid, name, description, cuisine, category, cuisine_id, category_id
+            )
+            SELECT new.id, new.name, new.description,
+                   (SELECT name FROM cuisines WHERE id = new.cuisine_id),
+                   (SELECT name FROM categories WHERE id = new.category_id),
+                   new.cuisine_id, new.category_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS menu_item_search_ad AFTER DELETE ON menu_items
+        BEGIN
+            DELETE FROM menu_item_search WHERE rowid = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS menu_item_search_au
+        AFTER UPDATE OF name, description, cuisine_id, category_id ON menu_items
+        BEGIN
+            DELETE FROM menu_item_search WHERE rowid = old.id;
+            INSERT INTO menu_item_search(
+                rowid, name, description, cuisine, category, cuisine_id, category_id
+            )
+            SELECT new.id, new.name, new.description,
+                   (SELECT name FROM cuisines WHERE id = new.cuisine_id),
+                   (SELECT name FROM categories WHERE id = new.category_id),
+                   new.cuisine_id, new.category_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS cuisine_search_au AFTER UPDATE OF name ON cuisines
+        BEGIN
+            UPDATE menu_item_search SET cuisine = new.name WHERE cuisine_id = new.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS category_search_au AFTER UPDATE OF name ON categories
+        BEGIN
+            UPDATE menu_item_search SET category = new.name WHERE category_id = new.id;
+        END
+        """,
+    ]
+
+    _restaurant_index = table(RESTAURANT_TABLE, column("rowid"))
+    _menu_item_index = table(MENU_ITEM_TABLE, column("rowid"))
+
+    def create_schema(self, connection) -> None:
+        for statement in self._SCHEMA:
+            connection.execute(text(statement))
+
+    def drop_schema(self, connection) -> None:
+        for name in (self.RESTAURANT_TABLE, self.MENU_ITEM_TABLE):
+            connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+    def rebuild(self, connection) -> None:
+        connection.execute(
+            text("INSERT INTO restaurant_search(restaurant_search) VALUES ('rebuild')")
+        )
+        connection.execute(text("DELETE FROM menu_item_search"))
+        connection.execute(
+            text(
+                """
+                INSERT INTO menu_item_search(
+                    rowid, name, description, cuisine, category, cuisine_id, category_id
+                )
+                SELECT m.id, m.name, m.description, c.name, g.name,
+                       m.cuisine_id, m.category_id
+                FROM menu_items m
+                LEFT JOIN cuisines c ON c.id = m.cuisine_id
+                LEFT JOIN categories g ON g.id = m.category_id
+                """
+            )
+        )
+
+    @staticmethod
+    def to_match_expression(query: str) -> str:
+        """Convert free text into an FTS5 query of quoted prefix terms."""
+        return " ".join(f'"{token}"*' for token in tokenize(query))
+
+    def _matches(self, index, weights, query: str) -> Select:
+        index_name = literal_column(index.name)
+
+        # bm25() is negative for matching rows; squash it into [0, 1)
+        rank = -func.bm25(index_name, *weights)
+        # Weighting every column but the name with zero leaves a non-zero
+        # bm25() only for rows whose name contains a query term
+        name_only = (1.0,) + (0.0,) * (len(weights) - 1)
+        name_hit = case((func.bm25(index_name, *name_only) < 0, 1.0), else_=0.0)
+
+        matches = select(
+            index.c.rowid.label("id"),
+            (name_hit + rank / (rank + 1.0)).label("score"),
+        ).select_from(index)
+
+        expression = self.to_match_expression(query)
+        if not expression:
+            # Nothing searchable (e.g. punctuation only), FTS5 rejects empty queries
+            return matches.where(false())
+        return matches.where(index_name.op("MATCH")(expression))
+
+    def restaurant_matches(self, query: str) -> Select:
+        return self._matches(self._restaurant_index, self.RESTAURANT_WEIGHTS, query)
+
+    def menu_item_matches(self, query: str) -> Select:
+        return self._matches(self._menu_item_index, self.MENU_ITEM_WEIGHTS, query)
+
+
+# Registry of available backends, selected with the SEARCH_BACKEND setting
+SEARCH_BACKENDS: Dict[str, Type[SearchBackend]] = {
+    LikeSearchBackend.name: LikeSearchBackend,
+    Fts5SearchBackend.name: Fts5SearchBackend,
+}
+
+
+def init_app(app: Flask) -> None:
+    """Attach the configured search backend to the application.
+
+    ``SEARCH_BACKEND = "auto"`` picks FTS5 for SQLite databases and the
+    ``ilike`` fallback everywhere else.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    name = app.config.get("SEARCH_BACKEND", "auto")
+    if name == "auto":
+        uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+        name = Fts5SearchBackend.name if uri.startswith("sqlite") else LikeSearchBackend.name
+
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {name}")
+
+    app.extensions["search_backend"] = SEARCH_BACKENDS[name]()
+
+
+def get_backend() -> SearchBackend:
+    """Return the search backend of the current application."""
+    return current_app.extensions["search_backend"]
+
+
+def backfill_normalized_names(connection) -> int:
+    """Recompute every ``name_normalized`` column from its name.
+
+    Model events keep the columns current for ORM writes; this covers rows
+    written before the columns existed or by raw SQL.
+
+    Returns:
+        Number of rows whose normalized name changed
+    """
+    changed = 0
+    for model in NORMALIZED_NAME_MODELS:
+        table_ = model.__table__
+        rows = [
+            {"row_id": id, "normalized": normalize_text(name)}
+            for id, name, current in connection.execute(
+                select(table_.c.id, table_.c.name, table_.c.name_normalized)
+            )
+            if normalize_text(name) != current
+        ]
+        if rows:
+            connection.execute(
+                update(table_)
+                .where(table_.c.id == bindparam("row_id"))
+                .values(name_normalized=bindparam("normalized")),
+                rows,
+            )
+            changed += len(rows)
+    return changed
+
+
+def rebuild_index() -> None:
+    """Create the index storage if needed and repopulate it from scratch."""
+    backend = get_backend()
+    connection = db.session.connection()
+    backfill_normalized_names(connection)
+    backend.create_schema(connection)
+    backend.rebuild(connection)
+    db.session.commit()
+    current_app.logger.info(f"Rebuilt '{backend.name}' search index")
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_search_schema(target, connection, **kwargs) -> None:
+    """Create index storage whenever the model tables are created."""
+    get_backend().create_schema(connection)
+
+
+@event.listens_for(db.metadata, "before_drop")
+def _drop_search_schema(target, connection, **kwargs) -> None:
+    """Drop index storage together with the model tables."""
+    get_backend().drop_schema(connection)
@@ -1,14 +1,41 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from flask import current_app
-from sqlalchemy import or_
+from sqlalchemy import (
+    and_,
+    case,
+    distinct,
+    func,
+    literal,
+    select,
+    true,
+    union_all,
+)
 from sqlalchemy.orm import joinedload
 
 from app.extensions import db
-from app.models import Category, Cuisine, MenuItem, Restaurant
+from app.models import (
+    Cuisine,
+    MenuItem,
+    Restaurant,
+    normalize_text,
+    restaurant_cuisine,
+)
+from app.services import (
+    geo_index,
+    search_cache,
+    search_index,
+    trigram_index,
+)
+from app.services.pagination import Page, decode_cursor, encode_cursor, paginate
 
+# Facet names in the combined facet count query
+CUISINE_FACET = "cuisine"
+RESTAURANT_FACET = "restaurant"
+PRICE_FACET = "price"
 
-def get_search_results(query: str) -> Tuple[List[Restaurant], List[MenuItem]]:
+
+def get_search_results(query: str) -> Tuple[Page, Page]:
     """
     Search for restaurants and menu items matching the query.
 
@@ -17,8 +44,8 @@ def get_search_results(query: str) -> Tuple[List[Restaurant], List[MenuItem]]:
 
     Returns:
         Tuple containing:
-        - List of matching Restaurant objects
-        - List of matching MenuItem objects (with eager-loaded relationships)
+        - First page of matching Restaurant objects
+        - First page of matching MenuItem objects (with eager-loaded relationships)
 
     Raises:
         DatabaseError: If there's an issue executing the queries
@@ -28,7 +55,7 @@ def get_search_results(query: str) -> Tuple[List[Restaurant], List[MenuItem]]:
         query = query.strip().lower()
         if not query:
             current_app.logger.debug("Empty search query received")
-            return [], []
+            return Page(), Page()
 
         current_app.logger.info(f"Processing search for: {query}")
 
@@ -49,42 +76,37 @@ def get_search_results(query: str) -> Tuple[List[Restaurant], List[MenuItem]]:
         raise
 
 
-def search_restaurants(query: str) -> List[Restaurant]:
-    """Search restaurants by name or location."""
-    return (
-        Restaurant.query.filter(
-            or_(
-                Restaurant.name.ilike(f"%{query}%"),
-                Restaurant.location.ilike(f"%{query}%"),
-            ),
-            Restaurant.is_active == True,  # Only active restaurants
-        )
-        .order_by(Restaurant.name.asc())
-        .all()
-    )
+def get_search_suggestion(query: str) -> Optional[str]:
+    """
+    Suggest a spelling-corrected query for a search that found nothing.
 
+    Args:
+        query: Search term that returned no results
 
-def search_menu_items(query: str) -> List[MenuItem]:
-    """Search menu items by name, cuisine, or category."""
-    return (
-        MenuItem.query.options(
-            joinedload(MenuItem.cuisine),
-            joinedload(MenuItem.category),
-            joinedload(MenuItem.restaurant),
-        )
-        .join(Cuisine)
-        .join(Category)
-        .filter(
-            or_(
-                MenuItem.name.ilike(f"%{query}%"),
-                Cuisine.name.ilike(f"%{query}%"),
-                Category.name.ilike(f"%{query}%"),
-            ),
-            MenuItem.is_active == True,  # Only active menu items
+    Returns:
+        Corrected query (e.g. "pizza" for "piza"), or None if no close
+        match exists in the trigram index
+    """
+    try:
+        suggestion = trigram_index.suggest_query(query)
+        if suggestion:
+            current_app.logger.debug(f"Suggesting '{suggestion}' for '{query}'")
+        return suggestion
+    except Exception as e:
+        current_app.logger.error(
+            f"Suggestion lookup failed for query '{query}': {str(e)}", exc_info=True
         )
-        .order_by(MenuItem.name.asc())
-        .all()
-    )
+        return None
+
+
+def search_restaurants(query: str) -> Page:
+    """Search restaurants by name or location, best matches first."""
+    return search_restaurants_filtered(query)
+
+
+def search_menu_items(query: str) -> Page:
+    """Search menu items by name, description, cuisine, or category, best matches first."""
+    return search_menu_items_filtered(query)
 
 
 def get_filtered_search_results(
@@ -92,38 +114,75 @@ def get_filtered_search_results(
     cuisine_ids: List[str] = None,
     restaurant_ids: List[str] = None,
     price_min: float = None,
-    price_max: float = None
-) -> Tuple[List[Restaurant], List[MenuItem]]:
+    price_max: float = None,
+    restaurant_cursor: Optional[str] = None,
+    menu_item_cursor: Optional[str] = None,
+    near: Optional[geo_index.NearBy] = None,
+    with_menu_items: bool = True,
+) -> Tuple[Page, Page]:
     """
     Search for restaurants and menu items with filters applied.
 
+    Results are cached by normalized query and filters (see
+    ``search_cache``), so repeated popular searches only load the cached
+    rows by primary key.
+
     Args:
         query: Search term to match against restaurant and menu item attributes
         cuisine_ids: List of cuisine IDs to filter by
         restaurant_ids: List of restaurant IDs to filter by
         price_min: Minimum price filter
         price_max: Maximum price filter
+        restaurant_cursor: Cursor of the restaurant page to fetch
+        menu_item_cursor: Cursor of the menu item page to fetch
+        near: Only return restaurants, and dishes of restaurants, within
+            this circle, nearest first
+        with_menu_items: Search menu items too; listings that only show
+            restaurants pass False and get an empty menu item page
 
     Returns:
         Tuple containing:
-        - List of matching Restaurant objects
-        - List of matching MenuItem objects (with eager-loaded relationships)
+        - Page of matching Restaurant objects
+        - Page of matching MenuItem objects (with eager-loaded relationships)
     """
     try:
         current_app.logger.info(f"Processing filtered search for: {query} with filters")
 
         # Convert string IDs to integers
-        cuisine_ids = [int(id) for id in cuisine_ids if id.isdigit()] if cuisine_ids else []
-        restaurant_ids = [int(id) for id in restaurant_ids if id.isdigit()] if restaurant_ids else []
+        cuisine_ids = _parse_ids(cuisine_ids)
+        restaurant_ids = _parse_ids(restaurant_ids)
+
+        cache = search_cache.get_cache()
+        key = search_cache.make_key(
+            query, cuisine_ids, restaurant_ids, price_min, price_max,
+            restaurant_cursor, menu_item_cursor, near, with_menu_items,
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            current_app.logger.debug(f"Search cache hit for: {query}")
+            return _load_cached_results(cached)
 
         # Search restaurants with filters
-        restaurants = search_restaurants_filtered(query, cuisine_ids, restaurant_ids)
+        restaurants = search_restaurants_filtered(
+            query, cuisine_ids, restaurant_ids, price_min, price_max,
+            cursor=restaurant_cursor, near=near,
+        )
         current_app.logger.debug(f"Found {len(restaurants)} matching restaurants")
 
         # Search menu items with filters
-        menu_items = search_menu_items_filtered(query, cuisine_ids, restaurant_ids, price_min, price_max)
-        current_app.logger.debug(f"Found {len(menu_items)} matching menu items")
+        menu_items = Page()
+        if with_menu_items:
+            menu_items = search_menu_items_filtered(
+                query, cuisine_ids, restaurant_ids, price_min, price_max,
+                cursor=menu_item_cursor, near=near,
+            )
+            current_app.logger.debug(f"Found {len(menu_items)} matching menu items")
 
+        cache.put(
+            key,
+            restaurants.items, restaurants.next_cursor,
+            menu_items.items, menu_items.next_cursor,
+        )
         return restaurants, menu_items
 
     except Exception as e:
@@ -131,38 +190,283 @@ def get_filtered_search_results(
             f"Filtered search failed for query '{query}': {str(e)}", exc_info=True
         )
         # Fallback to regular search if filtering fails
-        return get_search_results(query) if query else ([], [])
+        return get_search_results(query) if query else (Page(), Page())
+
+
+def _load_cached_results(cached: search_cache.CachedSearch) -> Tuple[Page, Page]:
+    """Load the rows of a cached search by id, keeping the cached order."""
+    restaurants = {}
+    if cached.restaurant_ids:
+        restaurants = {
+            r.id: r
+            for r in Restaurant.query.filter(Restaurant.id.in_(cached.restaurant_ids))
+        }
+
+    menu_items = {}
+    if cached.menu_item_ids:
+        menu_items = {
+            item.id: item
+            for item in MenuItem.query.options(
+                joinedload(MenuItem.restaurant),
+                joinedload(MenuItem.cuisine),
+                joinedload(MenuItem.category),
+            ).filter(MenuItem.id.in_(cached.menu_item_ids))
+        }
+
+    return (
+        Page(
+            [restaurants[id] for id in cached.restaurant_ids if id in restaurants],
+            cached.restaurant_cursor,
+        ),
+        Page(
+            [menu_items[id] for id in cached.menu_item_ids if id in menu_items],
+            cached.menu_item_cursor,
+        ),
+    )
+
+
+def get_search_facets(
+    query: str = None,
+    cuisine_ids: List[str] = None,
+    restaurant_ids: List[str] = None,
+    price_min: float = None,
+    price_max: float = None,
+) -> dict:
+    """
+    Count matching restaurants per cuisine, per restaurant and per price band.
+
+    Counts follow ``search_restaurants_filtered``: active restaurants
+    matching the query, matched through their own cuisines, priced by
+    their active dishes. Each facet applies every filter except its own,
+    so a count tells the user how many restaurants picking that option
+    lists. All three facets come from a single GROUP BY over the matching
+    restaurants, cached with the search results and dropped on any
+    catalogue write.
+
+    Args:
+        query: Search term to match, or None for the whole catalogue
+        cuisine_ids: Selected cuisine IDs
+        restaurant_ids: Selected restaurant IDs
+        price_min: Minimum price filter
+        price_max: Maximum price filter
+
+    Returns:
+        Dict with:
+        - cuisines: {cuisine_id: count}
+        - restaurants: {restaurant_id: count}
+        - prices: list of {"min", "max", "count"} bands (max None for the last)
+    """
+    edges = current_app.config["SEARCH_PRICE_BUCKETS"]
+    empty = {
+        "cuisines": {},
+        "restaurants": {},
+        "prices": _price_bands(edges, [0] * len(edges)),
+    }
+
+    try:
+        cuisine_ids = set(_parse_ids(cuisine_ids))
+        restaurant_ids = set(_parse_ids(restaurant_ids))
+
+        cache = search_cache.get_cache()
+        key = search_cache.make_key(
+            query, cuisine_ids, restaurant_ids, price_min, price_max, None, None
+        )
+        cached = cache.get_facets(key)
+        if cached is not None:
+            return cached
+
+        band = case(
+            *[(MenuItem.price < edge, i) for i, edge in enumerate(edges[1:])],
+            else_=len(edges) - 1,
+        )
+        in_range = and_(
+            MenuItem.is_active == True,
+            MenuItem.price >= price_min if price_min is not None else true(),
+            MenuItem.price <= price_max if price_max is not None else true(),
+        )
+        price_filtered = price_min is not None or price_max is not None
+
+        def flag(condition):
+            # 1 for rows passing the filter; every row passes an unset filter
+            return literal(1) if condition is None else case((condition, 1), else_=0)
+
+        # Matching restaurants, flagged with which filters they pass
+        candidates = select(
+            Restaurant.id.label("id"),
+            flag(
+                Restaurant.cuisines.any(Cuisine.id.in_(cuisine_ids))
+                if cuisine_ids else None
+            ).label("cuisine_ok"),
+            flag(
+                Restaurant.id.in_(restaurant_ids) if restaurant_ids else None
+            ).label("restaurant_ok"),
+            flag(
+                Restaurant.menu_items.any(in_range) if price_filtered else None
+            ).label("price_ok"),
+        ).where(Restaurant.is_active == True)
+        if query:
+            query = query.strip().lower()
+            matches = search_index.get_backend().restaurant_matches(query).subquery()
+            candidates = candidates.join(matches, matches.c.id == Restaurant.id)
+        candidates = candidates.cte("facet_candidates")
+
+        # One (facet, option, restaurant) row per restaurant an option would list
+        options = union_all(
+            select(
+                literal(CUISINE_FACET).label("facet"),
+                restaurant_cuisine.c.cuisine_id.label("option"),
+                candidates.c.id.label("restaurant_id"),
+            )
+            .join(restaurant_cuisine, restaurant_cuisine.c.restaurant_id == candidates.c.id)
+            .where(candidates.c.restaurant_ok == 1, candidates.c.price_ok == 1),
+            select(
+                literal(RESTAURANT_FACET), candidates.c.id, candidates.c.id
+            ).where(candidates.c.cuisine_ok == 1, candidates.c.price_ok == 1),
+            select(literal(PRICE_FACET), band, candidates.c.id)
+            .join(MenuItem, MenuItem.restaurant_id == candidates.c.id)
+            .where(
+                MenuItem.is_active == True,
+                candidates.c.cuisine_ok == 1,
+                candidates.c.restaurant_ok == 1,
+            ),
+        ).subquery()
+
+        cuisines, restaurants = {}, {}
+        prices = [0] * len(edges)
+        for facet, option, count in db.session.execute(
+            select(
+                options.c.facet,
+                options.c.option,
+                func.count(distinct(options.c.restaurant_id)),
+            ).group_by(options.c.facet, options.c.option)
+        ):
+            if facet == CUISINE_FACET:
+                cuisines[option] = count
+            elif facet == RESTAURANT_FACET:
+                restaurants[option] = count
+            else:
+                prices[option] = count
+
+        facets = {
+            "cuisines": cuisines,
+            "restaurants": restaurants,
+            "prices": _price_bands(edges, prices),
+        }
+        cache.put_facets(key, facets)
+        return facets
+
+    except Exception as e:
+        current_app.logger.error(
+            f"Facet counts failed for query '{query}': {str(e)}", exc_info=True
+        )
+        return empty
+
+
+def _price_bands(edges: List[float], counts: List[int]) -> List[dict]:
+    """Pair price band boundaries with their counts."""
+    upper = list(edges[1:]) + [None]
+    return [
+        {"min": low, "max": high, "count": count}
+        for low, high, count in zip(edges, upper, counts)
+    ]
+
+
+def _parse_ids(ids: Optional[List[str]]) -> List[int]:
+    """Convert ID strings from query arguments to integers, dropping junk."""
+    return [int(id) for id in ids if str(id).isdigit()] if ids else []
+
+
+def _exact_name_bonus(column, query: str):
+    """Score bonus for a name equal to the query once accents and case are folded."""
+    return case((column == normalize_text(query), 0.5), else_=0.0)
+
+
+def _relevance(match_score, rank_score, volume):
+    """
+    Build the SQL expression used to rank search results.
+
+    Combines match quality from the search index, the precomputed
+    Bayesian rating score, and the rolling ``recent_sales`` volume kept
+    by ``popularity_service``. Each component is bounded so no single one
+    can swamp the others.
+    """
+    weights = current_app.config["SEARCH_RANKING_WEIGHTS"]
+    volume = func.coalesce(volume, 0)
+    rating = func.coalesce(rank_score, current_app.config["RATING_PRIOR_MEAN"]) / 5.0
+    return (
+        weights["match"] * match_score
+        + weights["rating"] * rating
+        + weights["popularity"] * volume / (volume + 10.0)
+    )
 
 
 def search_restaurants_filtered(
     query: str = None,
     cuisine_ids: List[int] = None,
-    restaurant_ids: List[int] = None
-) -> List[Restaurant]:
-    """Search restaurants with filters applied."""
+    restaurant_ids: List[int] = None,
+    price_min: float = None,
+    price_max: float = None,
+    cursor: Optional[str] = None,
+    near: Optional[geo_index.NearBy] = None,
+) -> Page:
+    """
+    Search restaurants with filters applied, one page at a time.
+
+    A price range keeps restaurants with at least one active dish in it.
+    Results are ordered by relevance (see ``_paginate_ranked``), or by
+    distance when ``near`` is given; the distance filter is a range scan
+    over the geohash index.
+    """
+
     query_builder = db.session.query(Restaurant).filter(Restaurant.is_active == True)
+    match_score = literal(0.0)
     
-    # Apply text search if query provided
+    # Apply text search through the search index if query provided
     if query:
         query = query.strip().lower()
-        query_builder = query_builder.filter(
-            or_(
-                Restaurant.name.ilike(f"%{query}%"),
-                Restaurant.location.ilike(f"%{query}%"),
-            )
-        )
+        matches = search_index.get_backend().restaurant_matches(query).subquery()
+        query_builder = query_builder.join(matches, matches.c.id == Restaurant.id)
+        match_score = matches.c.score + _exact_name_bonus(Restaurant.name_normalized, query)
     
     # Apply cuisine filter
     if cuisine_ids:
-        query_builder = query_builder.join(Restaurant.cuisines).filter(
-            Cuisine.id.in_(cuisine_ids)
+        query_builder = query_builder.filter(
+            Restaurant.cuisines.any(Cuisine.id.in_(cuisine_ids))
         )
     
     # Apply restaurant filter (for specific restaurant selection)
     if restaurant_ids:
         query_builder = query_builder.filter(Restaurant.id.in_(restaurant_ids))
-    
-    return query_builder.order_by(Restaurant.name.asc()).all()
+
+    # Apply price filter through the restaurant's active dishes
+    if price_min is not None or price_max is not None:
+        query_builder = query_builder.filter(
+            Restaurant.menu_items.any(
+                and_(
+                    MenuItem.is_active == True,
+                    MenuItem.price >= price_min if price_min is not None else true(),
+                    MenuItem.price <= price_max if price_max is not None else true(),
+                )
+            )
+        )
+
+    relevance = _relevance(
+        match_score,
+        Restaurant.rank_score,
+        Restaurant.recent_sales,
+    )
+
+    # Restrict to the covering geohash cells and sort nearest first
+    if near:
+        in_circle, distance = geo_index.within(near)
+        return paginate(
+            query_builder.filter(in_circle),
+            [(distance, False), (Restaurant.id, False)],
+            cursor=cursor,
+            per_page=current_app.config["SEARCH_RESULT_LIMIT"],
+        )
+
+    return _paginate_ranked(query_builder, Restaurant.id, relevance, cursor)
 
 
 def search_menu_items_filtered(
@@ -170,9 +474,18 @@ def search_menu_items_filtered(
     cuisine_ids: List[int] = None,
     restaurant_ids: List[int] = None,
     price_min: float = None,
-    price_max: float = None
-) -> List[MenuItem]:
-    """Search menu items with filters applied."""
+    price_max: float = None,
+    cursor: Optional[str] = None,
+    near: Optional[geo_index.NearBy] = None,
+) -> Page:
+    """
+    Search menu items with filters applied, one page at a time.
+
+    Results are ordered by relevance, or with ``near`` limited to dishes
+    of restaurants inside the circle and ordered by their distance, using
+    the same geohash range scan as the restaurant search.
+    """
+
     query_builder = (
         db.session.query(MenuItem)
         .options(
@@ -182,31 +495,18 @@ def search_menu_items_filtered(
         )
         .filter(MenuItem.is_active == True)
     )
+    match_score = literal(0.0)
     
-    # Track if we need to join tables
-    cuisine_joined = False
-    category_joined = False
-    
-    # Apply text search if query provided
+    # Apply text search through the search index if query provided
     if query:
         query = query.strip().lower()
-        query_builder = query_builder.join(Cuisine).join(Category)
-        cuisine_joined = True
-        category_joined = True
-        query_builder = query_builder.filter(
-            or_(
-                MenuItem.name.ilike(f"%{query}%"),
-                MenuItem.description.ilike(f"%{query}%"),
-                Cuisine.name.ilike(f"%{query}%"),
-                Category.name.ilike(f"%{query}%"),
-            )
-        )
+        matches = search_index.get_backend().menu_item_matches(query).subquery()
+        query_builder = query_builder.join(matches, matches.c.id == MenuItem.id)
+        match_score = matches.c.score + _exact_name_bonus(MenuItem.name_normalized, query)
     
     # Apply cuisine filter
     if cuisine_ids:
-        if not cuisine_joined:
-            query_builder = query_builder.join(Cuisine)
-        query_builder = query_builder.filter(Cuisine.id.in_(cuisine_ids))
+        query_builder = query_builder.filter(MenuItem.cuisine_id.in_(cuisine_ids))
     
     # Apply price filters
     if price_min is not None:
@@ -217,5 +517,83 @@ def search_menu_items_filtered(
     # Apply restaurant filter
     if restaurant_ids:
         query_builder = query_builder.filter(MenuItem.restaurant_id.in_(restaurant_ids))
-    
-    return query_builder.order_by(MenuItem.name.asc()).all()
+
+    relevance = _relevance(
+        match_score,
+        MenuItem.rank_score,
+        MenuItem.recent_sales,
+    )
+
+    # Only dishes of restaurants in the covering geohash cells, nearest first
+    if near:
+        in_circle, distance = geo_index.within(near)
+        return paginate(
+            query_builder.join(
+                Restaurant, Restaurant.id == MenuItem.restaurant_id
+            ).filter(in_circle),
+            [(distance, False), (MenuItem.id, False)],
+            cursor=cursor,
+            per_page=current_app.config["SEARCH_RESULT_LIMIT"],
+        )
+
+    return _paginate_ranked(query_builder, MenuItem.id, relevance, cursor)
+
+
+def _paginate_ranked(query_builder, id_column, relevance, cursor: Optional[str]) -> Page:
+    """
+    Fetch one page of results ordered by relevance, from a ranking snapshot.
+
+    Relevance moves with live ratings and sales, so keyset paging on it
+    could skip or repeat rows whose score changed between two pages.
+    The first page instead ranks up to SEARCH_SNAPSHOT_SIZE ids in one
+    query and keeps them in the search cache; its cursor names that
+    snapshot and an offset, and later pages load their slice of it by
+    primary key, re-checking the filters so rows that stopped matching
+    drop out. A cursor whose snapshot expired ranks again and continues
+    at the same offset.
+
+    Args:
+        query_builder: Filtered ORM query of the searched entity
+        id_column: Primary key column of that entity
+        relevance: Ranking expression, higher first
+        cursor: Token from a previous page's ``next_cursor``
+
+    Returns:
+        Page of entities with the cursor for the following page
+    """
+    cache = search_cache.get_cache()
+    per_page = current_app.config["SEARCH_RESULT_LIMIT"]
+
+    token, offset = None, 0
+    if cursor:
+        values = decode_cursor(cursor)
+        if (
+            values is not None
+            and len(values) == 2
+            and isinstance(values[0], str)
+            and isinstance(values[1], int)
+            and values[1] >= 0
+        ):
+            token, offset = values
+        else:
+            current_app.logger.warning(f"Ignoring malformed page cursor: {cursor}")
+
+    ids = cache.get_snapshot(token) if token else None
+    if ids is None:
+        ids = [
+            id
+            for (id,) in query_builder.with_entities(id_column)
+            .order_by(relevance.desc(), id_column.asc())
+            .limit(current_app.config["SEARCH_SNAPSHOT_SIZE"])
+        ]
+        token = cache.put_snapshot(ids)
+
+    page_ids = ids[offset : offset + per_page]
+    rows = {}
+    if page_ids:
+        rows = {row.id: row for row in query_builder.filter(id_column.in_(page_ids))}
+
+    next_cursor = None
+    if offset + per_page < len(ids):
+        next_cursor = encode_cursor([token, offset + per_page])
+    return Page([rows[id] for id in page_ids if id in rows], next_cursor)
@@ -0,0 +1,292 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models import ItemSalesBucket, MenuItem, Restaurant
+from app.services import outbox_service
+
+# What the sketches count
+ITEM = "item"
+RESTAURANT = "restaurant"
+
+# Rescale a sketch before its forward-decay weights get this large (e^40)
+_MAX_EXPONENT = 40.0
+
+
+class DecayedSpaceSaving:
+    """Space-Saving heavy-hitter sketch over exponentially decayed counts.
+
+    Keeps at most ``capacity`` counters, so memory is bounded however many
+    distinct keys are seen. When a new key arrives at a full sketch it
+    takes over the smallest counter, whose value becomes the new key's
+    error bound; keys with a true share above ``1 / capacity`` of the
+    total are never lost.
+
+    Counts use forward decay: an event at time ``t`` is stored with weight
+    ``e^(rate * (t - landmark))`` and read back divided by the same factor
+    at query time, so counters never need touching as time passes. The
+    half-life sets how quickly old sales fade, which makes the sketch
+    behave like a sliding window of roughly that length.
+    """
+
+    def __init__(self, capacity: int, half_life_hours: float):
+        self.capacity = capacity
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self.landmark: Optional[float] = None
+        self._counts: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _rescale(self, now: float) -> None:
+        factor = math.exp(-self.rate * (now - self.landmark))
+        self._counts = {key: count * factor for key, count in self._counts.items()}
+        self.landmark = now
+
+    def add(self, key: int, amount: float, at: float) -> None:
+        """Count ``amount`` occurrences of ``key`` at epoch time ``at``."""
+        if self.landmark is None:
+            self.landmark = at
+        if self.rate * (at - self.landmark) > _MAX_EXPONENT:
+            self._rescale(at)
+
+        weight = amount * math.exp(self.rate * (at - self.landmark))
+        if key in self._counts:
+            self._counts[key] += weight
+        elif len(self._counts) < self.capacity:
+            self._counts[key] = weight
+        else:
+            smallest = min(self._counts, key=self._counts.__getitem__)
+            self._counts[key] = self._counts.pop(smallest) + weight
+
+    def top(self, limit: int, now: float) -> List[Tuple[int, float]]:
+        """Return up to ``limit`` keys with their decayed counts, largest first."""
+        if self.landmark is None:
+            return []
+        scale = math.exp(-self.rate * (now - self.landmark))
+        ranked = sorted(self._counts.items(), key=lambda pair: pair[1], reverse=True)
+        return [(key, count * scale) for key, count in ranked[:limit]]
+
+
+class TrendingEngine:
+    """Item and restaurant sketches for each configured half-life.
+
+    A "window" here is a decay half-life, not a hard cut-off: in the "24h"
+    sketch a sale from a day ago counts half and one from two days ago a
+    quarter.
+
+    Args:
+        windows: Name to half-life in hours, e.g. {"1h": 1, "24h": 24}
+        capacity: Counters per sketch
+    """
+
+    def __init__(self, windows: Dict[str, float], capacity: int):
+        self.windows = dict(windows)
+        self._sketches = {
+            (kind, name): DecayedSpaceSaving(capacity, hours)
+            for kind in (ITEM, RESTAURANT)
+            for name, hours in self.windows.items()
+        }
+        self._lock = threading.Lock()
+
+    def record(self, restaurant_id: int, quantities: Iterable[Tuple[int, int]], at: float) -> None:
+        """Feed one order's ``(menu_item_id, quantity)`` pairs into every sketch."""
+        quantities = list(quantities)
+        units = sum(quantity for _, quantity in quantities)
+        with self._lock:
+            for name in self.windows:
+                items = self._sketches[(ITEM, name)]
+                for menu_item_id, quantity in quantities:
+                    items.add(menu_item_id, quantity, at)
+                self._sketches[(RESTAURANT, name)].add(restaurant_id, units, at)
+
+    def top(self, kind: str, window: str, limit: int, now: float) -> List[Tuple[int, float]]:
+        with self._lock:
+            return self._sketches[(kind, window)].top(limit, now)
+
+
+def _settings() -> Tuple[Dict[str, float], int]:
+    config = current_app.config
+    return config["TRENDING_WINDOWS"], config["TRENDING_CAPACITY"]
+
+
+def init_app(app: Flask) -> None:
+    """
+    Attach a trending engine to the app and try to seed it.
+
+    If the tables do not exist yet the engine is seeded on first use.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    app.extensions["trending"] = {
+        "engine": None,
+        "offset": 0,
+        "syncing": threading.Lock(),
+    }
+    with app.app_context():
+        try:
+            seed()
+        except SQLAlchemyError:
+            db.session.rollback()
+            app.logger.info("Trending engine deferred until first lookup")
+
+
+def seed() -> None:
+    """
+    Build the engine from the hourly sales counters.
+
+    Runs once per process; afterwards only new orders are fed in by
+    ``catch_up``. Buckets older than the longest half-life are skipped, and
+    each bucket is fed in at the middle of its hour. The outbox offset is
+    taken before the counters are read, so an order committed while seeding
+    may be counted twice but is never missed.
+    """
+    windows, capacity = _settings()
+    engine = TrendingEngine(windows, capacity)
+    offset = outbox_service.latest_offset()
+    since = datetime.now() - timedelta(hours=max(windows.values()))
+
+    rows = db.session.execute(
+        select(
+            ItemSalesBucket.restaurant_id,
+            ItemSalesBucket.menu_item_id,
+            ItemSalesBucket.bucket_start,
+            ItemSalesBucket.quantity,
+        )
+        .where(ItemSalesBucket.bucket_start >= since.replace(minute=0, second=0, microsecond=0))
+        .order_by(ItemSalesBucket.bucket_start)
+        .execution_options(yield_per=1000)
+    )
+    count = 0
+    for restaurant_id, menu_item_id, hour, quantity in rows:
+        at = (hour + timedelta(minutes=30)).timestamp()
+        engine.record(restaurant_id, [(menu_item_id, quantity)], at)
+        count += 1
+
+    state = current_app.extensions["trending"]
+    state["engine"] = engine
+    state["offset"] = offset
+    current_app.logger.info(f"Seeded trending engine from {count} sales buckets")
+
+
+def catch_up() -> int:
+    """
+    Feed the orders placed since the last call into the engine.
+
+    Reads the ``order.created`` events after the engine's outbox offset, so
+    orders placed through any worker are counted exactly once, without
+    re-reading the sales counters. If another thread is already catching
+    up, returns straight away and lookups use the engine as it is.
+
+    Returns:
+        Number of orders fed in
+    """
+    state = current_app.extensions["trending"]
+    if not state["syncing"].acquire(blocking=False):
+        return 0
+    try:
+        engine, offset, count = state["engine"], state["offset"], 0
+        for batch in outbox_service.tail(offset, topics=[outbox_service.ORDERS]):
+            for event in batch:
+                if event.type == "order.created":
+                    engine.record(
+                        event.payload["restaurant_id"],
+                        event.payload["items"],
+                        event.created_at.timestamp(),
+                    )
+                    count += 1
+            state["offset"] = batch[-1].id
+        return count
+    finally:
+        state["syncing"].release()
+
+
+def _get_engine() -> Optional[TrendingEngine]:
+    """Return the engine, seeding it on first use and catching it up."""
+    state = current_app.extensions["trending"]
+    try:
+        if state["engine"] is None:
+            seed()
+        else:
+            catch_up()
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Failed to update trending engine: {str(e)}")
+        db.session.rollback()
+    return state["engine"]
+
+
+def top(kind: str, limit: int = 10, window: Optional[str] = None) -> List[Tuple[int, float]]:
+    """
+    Return the top ``limit`` ids of a kind with their trending scores.
+
+    Args:
+        kind: ITEM or RESTAURANT
+        limit: Maximum number of ids
+        window: Name of a TRENDING_WINDOWS entry, defaults to TRENDING_WINDOW
+
+    Returns:
+        ``(id, score)`` pairs, highest score first. The score is the
+        decayed number of units sold.
+    """
+    window = window or current_app.config["TRENDING_WINDOW"]
+    engine = _get_engine()
+    if engine is None:
+        return []
+    return engine.top(kind, window, limit, time.time())
+
+
+def trending_item_ids(limit: int = 10, window: Optional[str] = None) -> Set[int]:
+    """Return the ids of the top trending menu items."""
+    return {id for id, _ in top(ITEM, limit, window)}
+
+
+def get_trending_items(limit: int = 10, window: Optional[str] = None) -> List[MenuItem]:
+    """
+    Load the top trending active menu items, best first.
+
+    Only the sketch is consulted for ranking; the database is hit once to
+    load the chosen items by primary key.
+    """
+    try:
+        ranked = [id for id, _ in top(ITEM, limit, window)]
+        if not ranked:
+            return []
+        items = {
+            item.id: item
+            for item in MenuItem.query.options(
+                joinedload(MenuItem.restaurant),
+                joinedload(MenuItem.cuisine),
+                joinedload(MenuItem.category),
+            ).filter(MenuItem.id.in_(ranked), MenuItem.is_active == True)
+        }
+        return [items[id] for id in ranked if id in items]
+    except Exception as e:
+        current_app.logger.error(f"Failed to load trending items: {str(e)}")
+        return []
+
+
+def get_trending_restaurants(limit: int = 10, window: Optional[str] = None) -> List[Restaurant]:
+    """Load the top trending active restaurants, best first."""
+    try:
+        ranked = [id for id, _ in top(RESTAURANT, limit, window)]
+        if not ranked:
+            return []
+        restaurants = {
+            r.id: r
+            for r in Restaurant.query.filter(
+                Restaurant.id.in_(ranked), Restaurant.is_active == True
+            )
+        }
+        return [restaurants[id] for id in ranked if id in restaurants]
+    except Exception as e:
+        current_app.logger.error(f"Failed to load trending restaurants: {str(e)}")
+        return []
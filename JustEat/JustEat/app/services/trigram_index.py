@@ -0,0 +1,184 @@
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+from flask import current_app
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import (
+    Category,
+    Cuisine,
+    MenuItem,
+    Restaurant,
+    SearchTerm,
+    SearchTermTrigram,
+)
+from app.services.search_index import tokenize
+from app.utils import insert_ignore
+
+# Words shorter than this are too ambiguous to correct
+MIN_TERM_LENGTH = 3
+
+# Models whose names feed the vocabulary
+_INDEXED_MODELS = (Restaurant, MenuItem, Cuisine, Category)
+
+
+class TermMatch(NamedTuple):
+    """A vocabulary term and its trigram similarity to the searched word."""
+
+    term: str
+    similarity: float
+
+
+def trigrams(word: str) -> Set[str]:
+    """Return the distinct trigrams of a word padded like pg_trgm.
+
+    Two leading spaces and one trailing space give the start of the word
+    extra weight, so "piza" shares more grams with "pizza" than with
+    "spicy".
+    """
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _vocabulary(words: Iterable[str]) -> Set[str]:
+    """Tokenize names into indexable vocabulary words."""
+    return {
+        token
+        for text in words
+        if text
+        for token in tokenize(text)
+        if len(token) >= MIN_TERM_LENGTH and not token.isdigit()
+    }
+
+
+def index_terms(connection, names: Iterable[str]) -> int:
+    """Add unseen words from the given names to the trigram index.
+
+    Args:
+        connection: Connection to run the inserts on
+        names: Raw names to tokenize
+
+    Returns:
+        Number of words that were not indexed yet
+    """
+    words = _vocabulary(names)
+    if not words:
+        return 0
+
+    terms = SearchTerm.__table__
+    existing = set(
+        connection.execute(select(terms.c.term).where(terms.c.term.in_(words))).scalars()
+    )
+    missing = words - existing
+    if not missing:
+        return 0
+
+    dialect = connection.dialect.name
+    connection.execute(
+        insert_ignore(dialect, terms),
+        [{"term": word, "trigram_count": len(trigrams(word))} for word in missing],
+    )
+    term_ids = dict(
+        connection.execute(
+            select(terms.c.term, terms.c.id).where(terms.c.term.in_(missing))
+        ).all()
+    )
+    connection.execute(
+        insert_ignore(dialect, SearchTermTrigram.__table__),
+        [
+            {"trigram": gram, "term_id": term_ids[word]}
+            for word in missing
+            for gram in trigrams(word)
+        ],
+    )
+    return len(missing)
+
+
+def rebuild_terms(connection) -> int:
+    """Rebuild the vocabulary from all current names, dropping stale terms."""
+    connection.execute(SearchTermTrigram.__table__.delete())
+    connection.execute(SearchTerm.__table__.delete())
+
+    names = []
+    for model in _INDEXED_MODELS:
+        names.extend(connection.execute(select(model.name)).scalars())
+    return index_terms(connection, names)
+
+
+def rebuild_vocabulary() -> None:
+    """Rebuild the trigram vocabulary and commit."""
+    count = rebuild_terms(db.session.connection())
+    db.session.commit()
+    current_app.logger.info(f"Rebuilt trigram vocabulary with {count} terms")
+
+
+def similar_terms(
+    word: str, limit: int = 5, threshold: Optional[float] = None
+) -> List[TermMatch]:
+    """Find vocabulary terms similar to a word using the trigram postings.
+
+    Similarity is the Jaccard index of the two trigram sets, computed in a
+    single grouped query over the postings of the word's own trigrams.
+
+    Args:
+        word: Word to look up
+        limit: Maximum number of terms to return
+        threshold: Minimum similarity, defaults to SEARCH_FUZZY_THRESHOLD
+
+    Returns:
+        Matching terms, most similar first
+    """
+    if threshold is None:
+        threshold = current_app.config.get("SEARCH_FUZZY_THRESHOLD", 0.3)
+
+    grams = trigrams(word.lower())
+    shared = func.count(SearchTermTrigram.trigram)
+    similarity = (shared * 1.0) / (len(grams) + SearchTerm.trigram_count - shared)
+
+    rows = db.session.execute(
+        select(SearchTerm.term, similarity.label("similarity"))
+        .join(SearchTermTrigram, SearchTermTrigram.term_id == SearchTerm.id)
+        .where(SearchTermTrigram.trigram.in_(grams))
+        .group_by(SearchTerm.id, SearchTerm.term, SearchTerm.trigram_count)
+        .having(similarity >= threshold)
+        .order_by(similarity.desc(), SearchTerm.term.asc())
+        .limit(limit)
+    ).all()
+    return [TermMatch(term, float(score)) for term, score in rows]
+
+
+def suggest_query(query: str) -> Optional[str]:
+    """Build a "did you mean" query by correcting each misspelled word.
+
+    Args:
+        query: Search query that produced no results
+
+    Returns:
+        Corrected query, or None if no word could be improved
+    """
+    corrected = []
+    changed = False
+    for token in tokenize(query):
+        matches = similar_terms(token, limit=1) if len(token) >= MIN_TERM_LENGTH else []
+        if matches and matches[0].term != token:
+            corrected.append(matches[0].term)
+            changed = True
+        else:
+            corrected.append(token)
+
+    return " ".join(corrected) if changed else None
+
+
+@event.listens_for(Session, "after_flush")
+def _index_flushed_names(session, flush_context) -> None:
+    """Add names of new or renamed catalogue rows to the vocabulary."""
+    names = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, _INDEXED_MODELS):
+            continue
+        if obj in session.new or inspect(obj).attrs.name.history.has_changes():
+            names.append(obj.name)
+
+    if names:
+        index_terms(session.connection(), names)
@@ -65,6 +65,17 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    // Fill the price inputs from a price band
+    document.querySelectorAll('.price-band').forEach(function(band) {
+        band.addEventListener('click', function() {
+            const priceMin = filterForm.querySelector('input[name="price_min"]');
+            const priceMax = filterForm.querySelector('input[name="price_max"]');
+            priceMin.value = band.dataset.min;
+            priceMax.value = band.dataset.max;
+            updateFilterCount();
+        });
+    });
+
     // Initialize
     updateFilterCount();
     updateFilterOptionStates();
@@ -105,6 +116,12 @@ document.addEventListener('DOMContentLoaded', function() {
         if (priceMin) params.append('price_min', priceMin);
         if (priceMax) params.append('price_max', priceMax);
 
+        // Keep an active "near me" search
+        const currentParams = new URLSearchParams(window.location.search);
+        ['lat', 'lng', 'radius'].forEach(name => {
+            if (currentParams.has(name)) params.append(name, currentParams.get(name));
+        });
+
         // Navigate to home page with filters
         const currentUrl = new URL(window.location);
         currentUrl.search = params.toString();
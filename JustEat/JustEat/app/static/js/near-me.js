@@ -0,0 +1,22 @@
+// "Near me" restaurant search
+document.addEventListener('DOMContentLoaded', function() {
+    const nearMeBtn = document.getElementById('near-me-btn');
+    if (!nearMeBtn || !navigator.geolocation) return;
+
+    nearMeBtn.addEventListener('click', function() {
+        nearMeBtn.disabled = true;
+        navigator.geolocation.getCurrentPosition(
+            function(position) {
+                const url = new URL(window.location);
+                url.searchParams.delete('cursor');
+                url.searchParams.set('lat', position.coords.latitude.toFixed(5));
+                url.searchParams.set('lng', position.coords.longitude.toFixed(5));
+                window.location.href = url.toString();
+            },
+            function() {
+                nearMeBtn.disabled = false;
+                alert('Could not determine your location');
+            }
+        );
+    });
+});
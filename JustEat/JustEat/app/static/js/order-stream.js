@@ -0,0 +1,68 @@
+document.addEventListener("DOMContentLoaded", function () {
+  const grid = document.getElementById("order-grid");
+  if (!grid || !window.EventSource) return;
+
+  setupOrderStream(grid);
+});
+
+/**
+ * Keeps an order list (the restaurant board or a customer's history) up
+ * to date from its event stream.
+ *
+ * New orders are added to the top of the list and changed orders have
+ * their card swapped in place, each by fetching that one card. Older
+ * pages and lists limited to past dates are left as rendered.
+ *
+ * @param {HTMLElement} grid - The order grid with `data-stream-url` and `data-card-url` attributes.
+ */
+function setupOrderStream(grid) {
+  const source = new EventSource(grid.dataset.streamUrl);
+  const live = grid.dataset.live === "true";
+  const statusFilter = grid.dataset.status;
+
+  source.addEventListener("order", async function (message) {
+    const event = JSON.parse(message.data);
+    const current = document.getElementById(`order-${event.order_id}`);
+    if (!current && (!live || event.type !== "created")) return;
+
+    if (statusFilter && statusFilter !== "all" && statusFilter !== event.status) {
+      if (current) current.remove();
+      return;
+    }
+
+    const card = await fetchCard(grid.dataset.cardUrl.replace("/0/card", `/${event.order_id}/card`));
+    if (!card) return;
+
+    if (current) {
+      current.replaceWith(card);
+    } else {
+      grid.prepend(card);
+      document.getElementById("no-orders")?.remove();
+    }
+  });
+
+  // The stream fell behind, or reconnected after changes it did not see
+  source.addEventListener("resync", function () {
+    source.close();
+    window.location.reload();
+  });
+}
+
+/**
+ * Fetches the rendered card of one order.
+ *
+ * @param {string} url - URL of the order card fragment.
+ * @returns {Promise<HTMLElement|null>} The card element, or null if it could not be loaded.
+ */
+async function fetchCard(url) {
+  try {
+    const response = await fetch(url);
+    if (!response.ok || response.redirected) return null;
+
+    const template = document.createElement("template");
+    template.innerHTML = (await response.text()).trim();
+    return template.content.firstElementChild;
+  } catch (error) {
+    return null;
+  }
+}
@@ -0,0 +1,91 @@
+document.addEventListener("DOMContentLoaded", function () {
+  const inputs = document.querySelectorAll("[data-role='search-autocomplete']");
+
+  inputs.forEach((input) => setupAutocomplete(input));
+});
+
+// Icons shown next to each kind of suggestion
+const SUGGESTION_ICONS = {
+  restaurant: "bi-buildings",
+  menu_item: "bi-egg-fried",
+  cuisine: "bi-cup-hot",
+  category: "bi-tag",
+};
+
+/**
+ * Attaches typeahead suggestions to a search input.
+ *
+ * Requests are debounced and stale responses are dropped, so only the
+ * suggestions for the latest text are ever shown.
+ *
+ * @param {HTMLInputElement} input - The search input with a `data-suggest-url` attribute.
+ */
+function setupAutocomplete(input) {
+  const list = input.parentElement.querySelector("[data-role='search-suggestions']");
+  if (!list) return;
+
+  let timer = null;
+  let latest = 0;
+
+  input.addEventListener("input", function () {
+    clearTimeout(timer);
+    const query = input.value.trim();
+
+    if (!query) {
+      hideSuggestions(list);
+      return;
+    }
+
+    timer = setTimeout(async function () {
+      const requestId = ++latest;
+      const url = `${input.dataset.suggestUrl}?q=${encodeURIComponent(query)}`;
+
+      try {
+        const response = await fetch(url, { headers: { Accept: "application/json" } });
+        if (!response.ok || requestId !== latest) return;
+
+        const data = await response.json();
+        renderSuggestions(list, data.suggestions);
+      } catch (error) {
+        hideSuggestions(list);
+      }
+    }, 150);
+  });
+
+  input.addEventListener("blur", function () {
+    // Let clicks on a suggestion land before hiding the list
+    setTimeout(() => hideSuggestions(list), 150);
+  });
+}
+
+/**
+ * Renders suggestion links into the dropdown list.
+ *
+ * @param {HTMLElement} list - The dropdown container.
+ * @param {Array<{label: string, type: string, url: string}>} suggestions - Suggestions to show.
+ */
+function renderSuggestions(list, suggestions) {
+  list.replaceChildren();
+
+  suggestions.forEach((suggestion) => {
+    const link = document.createElement("a");
+    link.href = suggestion.url;
+    link.className = "list-group-item list-group-item-action d-flex align-items-center gap-2";
+
+    const icon = document.createElement("i");
+    icon.className = `bi ${SUGGESTION_ICONS[suggestion.type] || "bi-search"} text-muted`;
+
+    const label = document.createElement("span");
+    label.textContent = suggestion.label;
+
+    link.append(icon, label);
+    list.appendChild(link);
+  });
+
+  list.classList.toggle("d-none", suggestions.length === 0);
+}
+
+function hideSuggestions(list) {
+  list.classList.add("d-none");
+  list.replaceChildren();
+}
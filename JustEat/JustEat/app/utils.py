@@ -1,4 +1,10 @@
+from typing import Iterable, Sequence
+
 from slugify import slugify
+from sqlalchemy import Table, and_, insert, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
 
 from .models import UserRole
 
@@ -33,3 +39,83 @@ def generate_restaurant_slug(name: str, id: int) -> str:
         str: A unique slug for the restaurant.
     """
     return f"{slugify(name)}-{id}"
+
+
+def insert_ignore(dialect_name: str, table: Table) -> Insert:
+    """
+    Build an INSERT that silently skips rows violating a unique constraint.
+
+    Args:
+        dialect_name (str): Name of the database dialect (e.g. "sqlite").
+        table (Table): The table to insert into.
+
+    Returns:
+        Insert: An insert statement with the dialect's conflict handling.
+    """
+    if dialect_name == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect_name == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect_name in ("mysql", "mariadb"):
+        return insert(table).prefix_with("IGNORE")
+    return insert(table)
+
+
+def insert_or_increment(
+    connection: Connection,
+    table: Table,
+    key_columns: Sequence[str],
+    counter_columns: Sequence[str],
+    rows: Iterable[dict],
+) -> None:
+    """
+    Insert rows, adding to the existing counters of rows whose key exists.
+
+    SQLite, PostgreSQL and MySQL do this with one native upsert for all
+    rows. Other dialects update each row's counters in place and insert
+    the rows whose key was not found.
+
+    Args:
+        connection (Connection): Connection to execute on, usually the
+            session's so the change joins its transaction.
+        table (Table): The table to upsert into.
+        key_columns (Sequence[str]): Columns of the conflicting unique key.
+        counter_columns (Sequence[str]): Columns to increment on conflict.
+        rows (Iterable[dict]): Values of every column to insert.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    dialect_name = connection.dialect.name
+    if dialect_name in ("sqlite", "postgresql"):
+        dialect = sqlite if dialect_name == "sqlite" else postgresql
+        statement = dialect.insert(table)
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={
+                    name: table.c[name] + statement.excluded[name]
+                    for name in counter_columns
+                },
+            ),
+            rows,
+        )
+        return
+    if dialect_name in ("mysql", "mariadb"):
+        statement = mysql.insert(table)
+        connection.execute(
+            statement.on_duplicate_key_update(
+                {name: table.c[name] + statement.inserted[name] for name in counter_columns}
+            ),
+            rows,
+        )
+        return
+
+    for row in rows:
+        increment = (
+            update(table)
+            .where(and_(*(table.c[name] == row[name] for name in key_columns)))
+            .values({name: table.c[name] + row[name] for name in counter_columns})
+        )
+        if connection.execute(increment).rowcount == 0:
+            connection.execute(insert(table), [row])
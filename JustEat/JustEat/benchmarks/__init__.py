@@ -0,0 +1,4 @@
+"""Performance benchmarks run against a synthetic catalogue.
+
+Run the search benchmark with ``python -m benchmarks.search_bench --help``.
+"""
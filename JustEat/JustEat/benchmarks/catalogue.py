@@ -0,0 +1,174 @@
+import math
+import random
+from datetime import datetime, time
+from typing import List
+
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import (
+    Category,
+    Cuisine,
+    MenuItem,
+    Restaurant,
+    User,
+    UserRole,
+    normalize_text,
+    restaurant_cuisine,
+)
+from app.services import geo_index, rating_service, trigram_index
+
+CUISINES = [
+    "Italian", "Chinese", "Indian", "Mexican", "Thai", "Japanese", "Korean",
+    "French", "Greek", "Lebanese", "Turkish", "American", "Vietnamese", "Spanish",
+]
+CATEGORIES = ["Starters", "Mains", "Sides", "Desserts", "Drinks", "Breads", "Salads"]
+DISHES = [
+    "Pizza", "Burger", "Biryani", "Pad Thai", "Ramen", "Sushi", "Tacos", "Burrito",
+    "Paneer Tikka", "Butter Chicken", "Dal Makhani", "Falafel", "Shawarma",
+    "Lasagne", "Risotto", "Dumplings", "Fried Rice", "Noodles", "Pho", "Bibimbap",
+    "Crème Brûlée", "Tiramisu", "Jalapeño Poppers", "Gyoza", "Kebab", "Moussaka",
+    "Paella", "Churros", "Naan", "Samosa", "Spring Rolls", "Caesar Salad",
+]
+ADJECTIVES = [
+    "Classic", "Spicy", "Smoky", "Crispy", "Loaded", "Garlic", "Masala", "Cheesy",
+    "Grilled", "Tandoori", "Truffle", "Herb", "Chilli", "Honey", "Lemon", "Vegan",
+]
+PLACES = [
+    "Kitchen", "House", "Corner", "Express", "Bistro", "Diner", "Grill", "Cafe",
+    "Palace", "Garden", "Street", "Table",
+]
+AREAS = [
+    "Connaught Place", "Hauz Khas", "Saket", "Karol Bagh", "Lajpat Nagar",
+    "Dwarka", "Rohini", "Vasant Kunj", "Chandni Chowk", "Greater Kailash",
+]
+
+# Restaurants are scattered around this point so near-me searches have hits
+CENTRE = (28.6139, 77.2090)
+
+
+def _chunks(rows: List[dict], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _ratings(rng: random.Random, max_count: int) -> dict:
+    """Rating aggregates that agree with each other, as rating_service keeps them.
+
+    A random number of ratings is spread over the star buckets around a
+    random quality, and the sum, average and rank score follow from them.
+    """
+    count = rng.randint(0, max_count)
+    quality = rng.uniform(2.5, 5.0)
+    weights = [math.exp(-((stars - quality) ** 2)) for stars in rating_service.STARS]
+    histogram = [int(count * weight / sum(weights)) for weight in weights]
+    histogram[round(quality) - 1] += count - sum(histogram)
+    total = sum(stars * n for stars, n in zip(rating_service.STARS, histogram))
+    return {
+        "avg_rating": total / count if count else 0.0,
+        "rating_sum": total,
+        "rating_count": count,
+        "rank_score": rating_service._bayesian_score(total, count),
+        **{f"rating_{stars}": n for stars, n in zip(rating_service.STARS, histogram)},
+    }
+
+
+def generate(
+    restaurants: int,
+    menu_items: int,
+    seed: int = 42,
+    chunk_size: int = 10_000,
+) -> None:
+    """
+    Fill an empty database with a synthetic catalogue.
+
+    Rows are written with bulk Core inserts, so ORM events do not run and
+    derived columns (slug, normalized names, geohash, rating aggregates)
+    are computed here.
+    The search index triggers still fire for every row; the trigram
+    vocabulary is rebuilt once at the end.
+
+    Args:
+        restaurants: Number of restaurants to create
+        menu_items: Number of menu items, spread evenly over restaurants
+        seed: Random seed, so runs compare like with like
+        chunk_size: Rows per INSERT batch
+    """
+    rng = random.Random(seed)
+
+    owner = User(
+        name="bench owner",
+        email="bench@example.com",
+        phone="0000000000",
+        role=UserRole.OWNER,
+        password_hash="!",
+    )
+    db.session.add(owner)
+    db.session.add_all(Cuisine(name=name) for name in CUISINES)
+    db.session.add_all(Category(name=name) for name in CATEGORIES)
+    db.session.commit()
+
+    cuisine_ids = [id for (id,) in db.session.query(Cuisine.id)]
+    category_ids = [id for (id,) in db.session.query(Category.id)]
+    now = datetime.now()
+
+    restaurant_rows = []
+    for id in range(1, restaurants + 1):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(DISHES)} {rng.choice(PLACES)}"
+        latitude = CENTRE[0] + rng.uniform(-0.25, 0.25)
+        longitude = CENTRE[1] + rng.uniform(-0.25, 0.25)
+        restaurant_rows.append(
+            {
+                "id": id,
+                "owner_id": owner.id,
+                "name": name,
+                "name_normalized": normalize_text(name),
+                "location": f"{rng.choice(AREAS)}, New Delhi",
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": geo_index.encode(latitude, longitude),
+                "opening_time": time(9, 0),
+                "closing_time": time(23, 0),
+                "slug": f"bench-{id}",
+                **_ratings(rng, 500),
+                "created_at": now,
+                "is_active": rng.random() < 0.9,
+            }
+        )
+    for chunk in _chunks(restaurant_rows, chunk_size):
+        db.session.execute(insert(Restaurant.__table__), chunk)
+
+    cuisine_rows = [
+        {"restaurant_id": id, "cuisine_id": cuisine_id}
+        for id in range(1, restaurants + 1)
+        for cuisine_id in rng.sample(cuisine_ids, 2)
+    ]
+    for chunk in _chunks(cuisine_rows, chunk_size):
+        db.session.execute(insert(restaurant_cuisine), chunk)
+
+    item_rows = []
+    for id in range(1, menu_items + 1):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}"
+        item_rows.append(
+            {
+                "id": id,
+                "name": name,
+                "name_normalized": normalize_text(name),
+                "description": f"{rng.choice(ADJECTIVES)} {rng.choice(DISHES).lower()} "
+                f"with {rng.choice(ADJECTIVES).lower()} sauce",
+                "price": round(rng.uniform(50, 900), 2),
+                "restaurant_id": (id - 1) % restaurants + 1,
+                **_ratings(rng, 200),
+                "cuisine_id": rng.choice(cuisine_ids),
+                "category_id": rng.choice(category_ids),
+                "is_active": rng.random() < 0.95,
+            }
+        )
+        if len(item_rows) == chunk_size:
+            db.session.execute(insert(MenuItem.__table__), item_rows)
+            item_rows = []
+    if item_rows:
+        db.session.execute(insert(MenuItem.__table__), item_rows)
+
+    db.session.commit()
+    trigram_index.rebuild_vocabulary()
@@ -0,0 +1,289 @@
+"""Search latency benchmark.
+
+Builds a synthetic catalogue in a scratch SQLite database, runs a mix of
+realistic searches through ``search_service`` and reports latency
+percentiles and database work per scenario::
+
+    python -m benchmarks.search_bench --restaurants 10000 --menu-items 500000
+    python -m benchmarks.search_bench --save benchmarks/baseline.json
+    python -m benchmarks.search_bench --baseline benchmarks/baseline.json
+
+With ``--baseline`` the exit status is 1 when any scenario regressed by
+more than ``--tolerance``, so the command can gate a release.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from statistics import quantiles
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+
+from app import create_app
+from app.config import TestingConfig, configs
+from app.extensions import db
+from app.services import geo_index, search_service
+
+from . import catalogue
+
+# Number of SQLite VM instructions between progress callbacks
+_VM_STEP_GRANULARITY = 100
+
+
+def _page_rows(result) -> int:
+    """Count the rows of a ``(Page, Page)`` search result."""
+    return sum(len(page) for page in result)
+
+
+def _suggestion_rows(result) -> int:
+    """A spelling suggestion is one row, or none."""
+    return 1 if result else 0
+
+
+def _facet_rows(result) -> int:
+    """Count the non-empty options of a facets dict."""
+    return (
+        len(result["cuisines"])
+        + len(result["restaurants"])
+        + sum(1 for band in result["prices"] if band["count"])
+    )
+
+
+class Scenario(NamedTuple):
+    """A named search call to benchmark.
+
+    Attributes:
+        name: Scenario name, the key in baselines
+        run: The call to time
+        rows: Counts the result rows of ``run``'s return value
+    """
+
+    name: str
+    run: Callable[[], object]
+    rows: Callable[[object], int] = _page_rows
+
+
+class Result(NamedTuple):
+    """Measurements of one scenario.
+
+    Attributes:
+        p50, p95, p99: Latency percentiles in milliseconds
+        statements: SQL statements executed per call
+        vm_steps: SQLite virtual machine steps per call, a proxy for rows scanned
+        rows: Result rows returned per call
+    """
+
+    p50: float
+    p95: float
+    p99: float
+    statements: int
+    vm_steps: int
+    rows: int
+
+
+def scenarios() -> List[Scenario]:
+    """The query mix: popular dishes, prefixes, typos, filters and deep pages."""
+    filtered = search_service.get_filtered_search_results
+    first_page = {}
+
+    def second_page():
+        if "cursor" not in first_page:
+            restaurants, items = filtered(query="pizza")
+            first_page["cursor"] = (restaurants.next_cursor, items.next_cursor)
+        restaurant_cursor, item_cursor = first_page["cursor"]
+        return filtered(
+            query="pizza",
+            restaurant_cursor=restaurant_cursor,
+            menu_item_cursor=item_cursor,
+        )
+
+    near = geo_index.NearBy(*catalogue.CENTRE, radius_km=3.0)
+    return [
+        Scenario("popular_dish", lambda: search_service.get_search_results("pizza")),
+        Scenario("two_words", lambda: search_service.get_search_results("butter chicken")),
+        Scenario("prefix", lambda: search_service.get_search_results("bir")),
+        Scenario("accented", lambda: search_service.get_search_results("creme brulee")),
+        Scenario("cuisine_name", lambda: search_service.get_search_results("italian")),
+        Scenario("no_results", lambda: search_service.get_search_results("zzqx")),
+        Scenario(
+            "typo_suggestion",
+            lambda: search_service.get_search_suggestion("biriyani"),
+            _suggestion_rows,
+        ),
+        Scenario(
+            "filtered_cuisine_price",
+            lambda: filtered(query="spicy", cuisine_ids=["1", "3"], price_min=100, price_max=400),
+        ),
+        Scenario("filters_only", lambda: filtered(cuisine_ids=["2"], price_max=300)),
+        Scenario("near_me", lambda: filtered(near=near)),
+        Scenario("second_page", second_page),
+        Scenario(
+            "facets", lambda: search_service.get_search_facets(query="chicken"), _facet_rows
+        ),
+    ]
+
+
+def _percentile(timings: List[float], percent: int) -> float:
+    if len(timings) == 1:
+        return timings[0]
+    return quantiles(timings, n=100, method="inclusive")[percent - 1]
+
+
+def measure(scenario: Scenario, iterations: int, warmup: int) -> Result:
+    """Time a scenario, then run it once more to count database work."""
+    for _ in range(warmup):
+        scenario.run()
+        db.session.expire_all()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        scenario.run()
+        timings.append((time.perf_counter() - start) * 1000)
+        # Do not let the identity map hide the cost of loading rows
+        db.session.expire_all()
+
+    # Counting is done on a separate call so it does not skew the timings
+    counters = {"statements": 0, "vm_steps": 0}
+
+    def count_statement(*args):
+        counters["statements"] += 1
+
+    def count_steps():
+        counters["vm_steps"] += _VM_STEP_GRANULARITY
+        return 0
+
+    engine = db.engine
+    raw = db.session.connection().connection.driver_connection
+    event.listen(engine, "before_cursor_execute", count_statement)
+    raw.set_progress_handler(count_steps, _VM_STEP_GRANULARITY)
+    try:
+        rows = scenario.rows(scenario.run())
+    finally:
+        raw.set_progress_handler(None, 0)
+        event.remove(engine, "before_cursor_execute", count_statement)
+        db.session.expire_all()
+
+    return Result(
+        p50=_percentile(timings, 50),
+        p95=_percentile(timings, 95),
+        p99=_percentile(timings, 99),
+        statements=counters["statements"],
+        vm_steps=counters["vm_steps"],
+        rows=rows,
+    )
+
+
+def compare(
+    results: Dict[str, Result], baseline: Dict[str, dict], tolerance: float
+) -> List[str]:
+    """List scenarios whose p95 latency or VM steps exceed the baseline."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric in ("p95", "vm_steps"):
+            allowed = reference[metric] * (1 + tolerance)
+            value = getattr(result, metric)
+            if value > allowed:
+                regressions.append(
+                    f"{name}: {metric} {value:.1f} > {reference[metric]:.1f} "
+                    f"(+{tolerance:.0%} allowed)"
+                )
+    return regressions
+
+
+def report(results: Dict[str, Result], baseline: Optional[Dict[str, dict]]) -> None:
+    header = f"{'scenario':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'stmts':>7}{'vm steps':>12}{'rows':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        line = (
+            f"{name:<24}{r.p50:>9.2f}{r.p95:>9.2f}{r.p99:>9.2f}"
+            f"{r.statements:>7}{r.vm_steps:>12}{r.rows:>7}"
+        )
+        if baseline and name in baseline:
+            change = (r.p95 / baseline[name]["p95"] - 1) if baseline[name]["p95"] else 0
+            line += f"   p95 {change:+.0%}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark search_service at catalogue scale.")
+    parser.add_argument("--restaurants", type=int, default=10_000)
+    parser.add_argument("--menu-items", type=int, default=500_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--database", help="SQLite file to reuse between runs (built if missing)"
+    )
+    parser.add_argument("--backend", default="auto", help="SEARCH_BACKEND to benchmark")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save", help="Write the results as a new baseline JSON")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Allowed slowdown before failing"
+    )
+    args = parser.parse_args(argv)
+
+    path = args.database or os.path.join(tempfile.mkdtemp(), "search_bench.db")
+    build = not os.path.exists(path)
+
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.abspath(path)}"
+        SEARCH_BACKEND = args.backend
+        # Measure the engine itself, not the result cache
+        SEARCH_CACHE_SIZE = 0
+
+    configs["benchmark"] = BenchmarkConfig
+    app = create_app("benchmark")
+    # Per-query INFO logs would dominate the timings
+    app.logger.setLevel(logging.WARNING)
+
+    with app.app_context():
+        if build:
+            print(
+                f"Building catalogue: {args.restaurants} restaurants, "
+                f"{args.menu_items} menu items ..."
+            )
+            start = time.perf_counter()
+            db.create_all()
+            catalogue.generate(args.restaurants, args.menu_items, seed=args.seed)
+            print(f"Built in {time.perf_counter() - start:.1f}s ({path})")
+
+        results = {
+            scenario.name: measure(scenario, args.iterations, args.warmup)
+            for scenario in scenarios()
+        }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({name: r._asdict() for name, r in results.items()}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""Gunicorn settings, picked up by running ``gunicorn app:app`` from this directory.
+
+Live order pages hold a Server-Sent Events connection open for up to
+ORDER_STREAM_MAX_SECONDS, and order events reach them through an
+in-memory hub that only sees changes made in its own process. The app
+is therefore served by a single process with threaded workers: every
+request thread shares the one hub, and an open stream occupies one
+thread instead of a whole sync worker.
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Order events are not shared between processes; do not raise this
+workers = 1
+
+# Each open order stream holds one of these threads
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "64"))
@@ -20,6 +20,7 @@ from app.models import (
     User,
     UserRole,
 )
+from app.services import popularity_service
 from app.utils import generate_restaurant_slug
 
 
@@ -287,6 +288,9 @@ def seed():
 
         print("Orders created successfully.")
 
+        # Orders above bypass place_order, so fill the sales counters from them
+        popularity_service.rebuild()
+
 
 if __name__ == "__main__":
     seed()
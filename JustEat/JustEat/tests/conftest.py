@@ -1,6 +1,7 @@
 from datetime import time
 import random
 import pytest
+from sqlalchemy import event
 from werkzeug.security import generate_password_hash
 
 from app import create_app, db
@@ -137,6 +138,23 @@ def menu_a(restaurant_a, cuisines, categories):
     return menu
 
 
+@pytest.fixture
+def count_statements(app):
+    """Call a function and count the SQL statements it sends to the database."""
+
+    def _count(call, *args, **kwargs):
+        statements = []
+        listener = lambda *event_args: statements.append(event_args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            result = call(*args, **kwargs)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        return result, len(statements)
+
+    return _count
+
+
 @pytest.fixture
 def login_user(client):
     def _login(user):
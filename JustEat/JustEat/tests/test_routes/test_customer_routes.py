@@ -0,0 +1,87 @@
+import re
+from datetime import time
+
+from app.extensions import db
+from app.models import Restaurant
+from app.services import rating_service
+from app.services import restaurant_service as restaurant_svc
+
+
+def _add_restaurants(owner, count):
+    restaurants = [
+        Restaurant(
+            name=f"Place {i:02d}",
+            location="Testville",
+            slug=f"place-{i}",
+            opening_time=time(10, 0),
+            closing_time=time(22, 0),
+            owner_id=owner.id,
+            is_active=True,
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(restaurants)
+    db.session.commit()
+    return restaurants
+
+
+def test_home_pages_through_restaurants(client, login_user, customer_a, owner_a):
+    _add_restaurants(owner_a, 25)
+    login_user(customer_a)
+
+    response = client.get("/home")
+    assert response.status_code == 200
+    first_page = set(re.findall(rb"/place-(\d+)/menu", response.data))
+    cursor = re.search(rb"cursor=([\w-]+)", response.data)
+    assert cursor is not None
+
+    response = client.get(f"/home?cursor={cursor.group(1).decode()}")
+    second_page = set(re.findall(rb"/place-(\d+)/menu", response.data))
+    assert second_page
+    assert not first_page & second_page
+    assert len(first_page | second_page) == 25
+    assert b"More restaurants" not in response.data
+
+
+def test_home_ignores_malformed_cursor(client, login_user, customer_a, owner_a):
+    _add_restaurants(owner_a, 3)
+    login_user(customer_a)
+
+    response = client.get("/home?cursor=not-a-cursor")
+    assert response.status_code == 200
+    assert b"Place 02" in response.data
+
+
+def test_home_near_me_sorts_by_distance(client, login_user, customer_a, owner_a):
+    far, near, nearest = _add_restaurants(owner_a, 3)
+    # Connaught Place, New Delhi and points around it
+    restaurant_svc.set_coordinates(nearest, 28.6315, 77.2167)
+    restaurant_svc.set_coordinates(near, 28.6500, 77.2300)
+    restaurant_svc.set_coordinates(far, 28.4595, 77.0266)  # Gurugram, ~27 km
+    db.session.commit()
+    login_user(customer_a)
+
+    response = client.get("/home?lat=28.6304&lng=77.2177&radius=5")
+    assert response.status_code == 200
+    slugs = re.findall(rb"/(place-\d+)/menu", response.data)
+    assert list(dict.fromkeys(slugs)) == [nearest.slug.encode(), near.slug.encode()]
+
+
+def test_home_top_rated_uses_bayesian_score(client, login_user, customer_a, owner_a):
+    one_review, many_reviews, unrated = _add_restaurants(owner_a, 3)
+    rating_service.add_restaurant_ratings([(one_review.id, 5)])
+    rating_service.add_restaurant_ratings(
+        [(many_reviews.id, 5)] * 70 + [(many_reviews.id, 4)] * 30
+    )
+    db.session.commit()
+
+    assert one_review.avg_rating > many_reviews.avg_rating
+    assert many_reviews.rank_score > one_review.rank_score > unrated.rank_score
+    login_user(customer_a)
+
+    response = client.get("/home?sort=top_rated")
+    assert b"Top Rated Restaurants" in response.data
+    slugs = re.findall(rb"/(place-\d+)/menu", response.data)
+    assert list(dict.fromkeys(slugs)) == [
+        many_reviews.slug.encode(), one_review.slug.encode(), unrated.slug.encode()
+    ]
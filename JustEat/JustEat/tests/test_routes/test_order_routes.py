@@ -0,0 +1,440 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import (
+    IdempotencyKey,
+    ItemSalesBucket,
+    MenuItem,
+    MenuItemRating,
+    Order,
+    OrderItem,
+    OutboxEvent,
+    OrderStatus,
+    RestaurantRating,
+)
+from app.services import cart_service as cart_svc
+from app.services import menu_item_service as menu_item_svc
+from app.services import order_service as order_svc
+from app.services import idempotency_service, popularity_service, trending_service
+from app.services import order_event_service, outbox_service, rating_service
+from app.services.trending_service import DecayedSpaceSaving
+
+
+def _order(client, restaurant, items):
+    for item in items:
+        client.post(f"/{restaurant.slug}/cart/add/{item.id}")
+    return client.post("/cart/place-order", follow_redirects=True)
+
+
+def test_place_order_bumps_hourly_sales(client, login_user, customer_a, restaurant_a, menu_a):
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    login_user(customer_a)
+
+    response = _order(client, restaurant_a, [pizza, pizza, burger])
+    assert response.status_code == 200
+    _order(client, restaurant_a, [pizza])
+
+    buckets = {b.menu_item_id: b for b in ItemSalesBucket.query.all()}
+    assert buckets[pizza.id].quantity == 3
+    assert buckets[burger.id].quantity == 1
+    assert buckets[pizza.id].restaurant_id == restaurant_a.id
+
+    # Pizza sold more than once, the burger only once
+    assert menu_item_svc.get_popular_item_ids(restaurant_a) == {pizza.id}
+    assert menu_item_svc.get_popular_item_ids_for_search([pizza, burger]) == {pizza.id}
+
+
+def test_popularity_rebuild_matches_live_counters(
+    client, login_user, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    login_user(customer_a)
+    _order(client, restaurant_a, [menu_a[0], menu_a[0], menu_a[1]])
+    live = {(b.menu_item_id, b.bucket_start, b.quantity) for b in ItemSalesBucket.query}
+
+    assert popularity_service.rebuild() == 2
+    rebuilt = {(b.menu_item_id, b.bucket_start, b.quantity) for b in ItemSalesBucket.query}
+    assert rebuilt == live
+
+
+
+def test_recent_sales_totals_follow_orders_and_age_out(
+    client, login_user, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    login_user(customer_a)
+    _order(client, restaurant_a, [pizza, pizza, burger])
+
+    db.session.expire_all()
+    assert (pizza.recent_sales, burger.recent_sales) == (2, 1)
+    assert restaurant_a.recent_sales == 3
+    assert popularity_service.refresh_recent_sales() == 0
+
+    # Sales older than the ranking window drop out on the next refresh
+    for bucket in ItemSalesBucket.query:
+        bucket.bucket_start -= timedelta(days=8)
+    db.session.commit()
+    assert popularity_service.refresh_recent_sales() == 3
+    assert (pizza.recent_sales, burger.recent_sales, restaurant_a.recent_sales) == (0, 0, 0)
+
+def test_trending_follows_orders_without_aggregating(
+    client, login_user, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    login_user(customer_a)
+    _order(client, restaurant_a, [pizza, pizza, burger])
+
+    ranked = trending_service.top(trending_service.ITEM, window="1h")
+    assert [id for id, _ in ranked] == [pizza.id, burger.id]
+    assert trending_service.trending_item_ids(1) == {pizza.id}
+    assert [r.id for r in trending_service.get_trending_restaurants()] == [restaurant_a.id]
+
+    # Later orders are fed in from the outbox, once each
+    _order(client, restaurant_a, [pizza, pizza])
+    [(_, score)] = trending_service.top(trending_service.ITEM, 1, window="7d")
+    assert abs(score - 4) < 0.1
+
+    response = client.get("/home")
+    assert b"Trending now" in response.data
+    assert pizza.name.encode() in response.data
+
+
+def test_decayed_sketch_keeps_heavy_hitters_in_bounded_memory():
+    sketch = DecayedSpaceSaving(capacity=3, half_life_hours=1)
+    for second in range(300):
+        sketch.add(1, 1, second)
+        sketch.add(100 + second, 1, second)  # A long tail of one-off sales
+
+    assert len(sketch) == 3
+    assert sketch.top(1, 300)[0][0] == 1
+
+    # An hour later every count has halved
+    [(_, now)], [(_, later)] = sketch.top(1, 300), sketch.top(1, 3900)
+    assert abs(later - now / 2) < 1e-6
+
+
+def test_add_ratings_updates_aggregates_in_sql(
+    client, login_user, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    login_user(customer_a)
+    _order(client, restaurant_a, [pizza, burger])
+    _order(client, restaurant_a, [pizza])
+    first, second = Order.query.order_by(Order.id).all()
+
+    assert order_svc.add_ratings(
+        customer_a.id,
+        first.id,
+        [{"item_id": pizza.id, "rating": 5}, {"item_id": burger.id, "rating": 2}],
+        {"restaurant_id": restaurant_a.id, "rating": 4, "comment": "Good"},
+    )
+    assert order_svc.add_ratings(
+        customer_a.id,
+        second.id,
+        [{"item_id": pizza.id, "rating": 4}],
+        {"restaurant_id": restaurant_a.id, "rating": 3},
+    )
+
+    assert (pizza.rating_count, pizza.rating_sum, pizza.avg_rating) == (2, 9, 4.5)
+    assert (burger.rating_count, burger.avg_rating) == (1, 2)
+    assert (restaurant_a.rating_count, restaurant_a.avg_rating) == (2, 3.5)
+    assert MenuItemRating.query.count() == 3
+
+
+def test_ratings_reconcile_repairs_drifted_aggregates(
+    client, runner, login_user, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    login_user(customer_a)
+    _order(client, restaurant_a, [pizza])
+    order = Order.query.one()
+    order_svc.add_ratings(
+        customer_a.id,
+        order.id,
+        [{"item_id": pizza.id, "rating": 4}],
+        {"restaurant_id": restaurant_a.id, "rating": 5},
+    )
+
+    # Simulate a half-applied review and a row from before rating_sum existed
+    pizza.rating_count, pizza.avg_rating = 3, 2.0
+    burger.rating_sum = None
+    db.session.commit()
+
+    result = runner.invoke(args=["ratings", "reconcile", "--dry-run", "-v"])
+    assert "Found 0 restaurants." in result.output
+    assert "Found 2 menu items." in result.output
+    assert pizza.rating_count == 3
+
+    result = runner.invoke(args=["ratings", "reconcile", "--chunk-size", "1"])
+    assert "Corrected 2 menu items." in result.output
+    assert (pizza.rating_count, pizza.rating_sum, pizza.avg_rating) == (1, 4, 4)
+    assert (burger.rating_count, burger.rating_sum, burger.avg_rating) == (0, 0, 0)
+
+    result = runner.invoke(args=["ratings", "reconcile"])
+    assert "Corrected 0 menu items." in result.output
+
+
+def test_ratings_reconcile_skips_rows_rated_meanwhile(app, monkeypatch, menu_a):
+    pizza, _ = menu_a
+    pizza.rating_count, pizza.rating_sum = 3, 12.0
+    db.session.commit()
+    read_chunk = rating_service._corrections
+
+    def rated_after_read(model, *args):
+        rows = read_chunk(model, *args)
+        if model is MenuItem:
+            rating_service.add_menu_item_ratings([(pizza.id, 5)])
+        return rows
+
+    monkeypatch.setattr(rating_service, "_corrections", rated_after_read)
+    assert pizza.id not in rating_service.reconcile()["menu_items"]
+    db.session.refresh(pizza)
+    assert (pizza.rating_count, pizza.rating_sum) == (4, 17.0)
+
+
+def test_rating_histograms_follow_reviews(client, login_user, customer_a, restaurant_a, menu_a):
+    restaurant_a.is_active = True
+    pizza, _ = menu_a
+    login_user(customer_a)
+    for stars in (5, 5, 2):
+        _order(client, restaurant_a, [pizza])
+        order = Order.query.order_by(Order.id.desc()).first()
+        order_svc.add_ratings(
+            customer_a.id,
+            order.id,
+            [{"item_id": pizza.id, "rating": stars}],
+            {"restaurant_id": restaurant_a.id, "rating": stars, "comment": "ok"},
+        )
+
+    assert [count for _, count, _ in restaurant_a.rating_histogram] == [2, 0, 0, 1, 0]
+    assert (pizza.rating_5, pizza.rating_2) == (2, 1)
+
+    response = client.get(f"/{restaurant_a.slug}/reviews")
+    assert b"3 ratings" in response.data
+    assert b"width: 67%" in response.data
+
+
+def test_reviews_are_paged_with_authors_joined(
+    app, client, login_user, count_statements, customer_a, owner_a, restaurant_a
+):
+    restaurant_a.is_active = True
+    login_user(customer_a)
+    order = Order(customer_id=customer_a.id, restaurant_id=restaurant_a.id, total=0)
+    db.session.add(order)
+    db.session.flush()
+    for i, author in enumerate([customer_a, owner_a] * 3):
+        db.session.add(
+            RestaurantRating(
+                user_id=author.id,
+                restaurant_id=restaurant_a.id,
+                order_id=order.id,
+                rating=4,
+                comment=f"review-text-{i}",
+            )
+        )
+    db.session.commit()
+    url = f"/{restaurant_a.slug}/reviews"
+
+    def statements_for_page(size):
+        app.config["PAGE_SIZE"] = size
+        db.session.expunge_all()
+        return count_statements(client.get, url)
+
+    statements_for_page(1)  # Loads the logged-in user once
+    small, small_count = statements_for_page(2)
+    large, large_count = statements_for_page(6)
+
+    assert small.data.count(b"review-text-") == 2
+    assert b"More reviews" in small.data
+    assert large.data.count(b"review-text-") == 6
+    assert b"More reviews" not in large.data
+    # Authors come with the page, so the cost does not grow with its size
+    assert small_count == large_count
+
+
+def test_checkout_statements_do_not_grow_with_cart(
+    client, login_user, count_statements, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    login_user(customer_a)
+
+    def checkout_statements(items):
+        for item in items:
+            client.post(f"/{restaurant_a.slug}/cart/add/{item.id}")
+        db.session.expire_all()
+        _, count = count_statements(client.post, "/cart/place-order")
+        return count
+
+    one_line = checkout_statements([pizza])
+    two_lines = checkout_statements([pizza, burger, burger])
+    assert one_line == two_lines
+
+    order = Order.query.order_by(Order.id.desc()).first()
+    assert sorted((i.name, i.quantity) for i in order.items) == [("Burger", 2), ("Pizza", 1)]
+    assert order.total == pizza.price + 2 * burger.price
+
+
+def test_repeated_checkout_returns_the_original_order(
+    client, login_user, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    login_user(customer_a)
+    client.post(f"/{restaurant_a.slug}/cart/add/{pizza.id}")
+    key = cart_svc.get_user_cart(customer_a).checkout_key
+
+    first = client.post("/cart/place-order", data={"idempotency_key": key})
+    retry = client.post(
+        "/cart/place-order", data={"idempotency_key": key}, follow_redirects=True
+    )
+    assert first.status_code == 302
+    assert b"Order placed successfully!" in retry.data
+    assert Order.query.count() == 1
+    assert IdempotencyKey.query.one().order_id == Order.query.one().id
+
+    # A key still being processed by another request leaves the new cart alone
+    client.post(f"/{restaurant_a.slug}/cart/add/{burger.id}")
+    busy = cart_svc.get_user_cart(customer_a).checkout_key
+    assert busy != key
+    assert idempotency_service.claim(customer_a.id, busy).fresh
+    response = client.post(
+        "/cart/place-order", headers={"Idempotency-Key": busy}, follow_redirects=True
+    )
+    assert b"already being placed" in response.data
+    assert Order.query.count() == 1
+    assert cart_svc.get_user_cart(customer_a) is not None
+
+    # Once the other request gives up its claim the customer can retry
+    idempotency_service.release(customer_a.id, busy)
+    assert IdempotencyKey.query.count() == 1
+    client.post("/cart/place-order", data={"idempotency_key": busy})
+    assert Order.query.count() == 2
+
+
+def test_order_history_pages_with_batched_loading(
+    app, client, login_user, count_statements, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    for i, status in enumerate([OrderStatus.PENDING, OrderStatus.DELIVERED] * 3):
+        order = Order(
+            customer_id=customer_a.id, restaurant_id=restaurant_a.id, total=10, status=status
+        )
+        order.items = [
+            OrderItem(menu_item_id=item.id, name=item.name, quantity=1, price_at_order=5)
+            for item in menu_a
+        ]
+        db.session.add(order)
+    db.session.commit()
+    login_user(customer_a)
+
+    def history(size, query=""):
+        app.config["PAGE_SIZE"] = size
+        db.session.expire_all()
+        response, count = count_statements(client.get, "/orders" + query)
+        return response.data, count
+
+    small, small_count = history(2)
+    large, large_count = history(6)
+    assert small.count(b"Order # ") == 2
+    assert b"Older orders" in small
+    assert large.count(b"Order # ") == 6
+    assert b"Older orders" not in large
+    # Restaurants, reviews and lines come with the page, not per order
+    assert small_count == large_count
+
+    delivered, _ = history(6, "?status=delivered")
+    assert delivered.count(b"Order # ") == 3
+
+
+def test_customer_stream_follows_status_changes(
+    app, client, login_user, customer_a, restaurant_a, menu_a
+):
+    app.config["ORDER_STREAM_HEARTBEAT"] = 0.01
+    restaurant_a.is_active = True
+    login_user(customer_a)
+    _order(client, restaurant_a, menu_a[:1])
+    order = Order.query.filter_by(customer_id=customer_a.id).one()
+
+    response = client.get("/orders/stream", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    assert b'id="order-grid"' in client.get("/orders").data
+
+    assert order_svc.update_order_status(order, "delivered")
+    messages = response.iter_encoded()
+    assert next(messages).startswith(b"retry: ")
+    delivered = next(messages)
+    assert f'"order_id": {order.id}'.encode() in delivered
+    assert b'"status": "delivered"' in delivered
+    response.close()
+
+    card = client.get(f"/orders/{order.id}/card")
+    assert f'id="order-{order.id}"'.encode() in card.data
+    assert b"Add review" in card.data
+    topic = order_event_service.customer_topic(customer_a.id)
+    assert order_event_service.get_hub().subscriber_count(topic) == 0
+
+
+def test_outbox_records_committed_changes_in_offset_order(
+    app, client, runner, login_user, customer_a, restaurant_a, menu_a
+):
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    login_user(customer_a)
+    _order(client, restaurant_a, [pizza, burger])
+    order = Order.query.filter_by(customer_id=customer_a.id).one()
+    assert order_svc.update_order_status(order, "delivered")
+    # A rejected transition rolls back and leaves no event behind
+    assert order_svc.update_order_status(order, "cancelled") is None
+    assert order_svc.add_ratings(
+        customer_a.id,
+        order.id,
+        [{"item_id": pizza.id, "rating": 5}],
+        {"restaurant_id": restaurant_a.id, "rating": 4},
+    )
+    menu_item_svc.update_item_special_status(burger, True)
+
+    events = outbox_service.read()
+    assert [(e.topic, e.type, e.key) for e in events] == [
+        (outbox_service.ORDERS, "order.created", order.id),
+        (outbox_service.ORDERS, "order.status_changed", order.id),
+        (outbox_service.RATINGS, "rating.added", order.id),
+        (outbox_service.CATALOGUE, "menu_item.updated", burger.id),
+    ]
+    assert events[0].payload["items"] == [[pizza.id, 1], [burger.id, 1]]
+    assert events[1].payload == {"from": "pending", "to": "delivered", "version": 2}
+    assert outbox_service.latest_offset() == events[-1].id
+
+    # Consumers resume from their last offset, in batches
+    batches = list(outbox_service.tail(events[0].id, batch_size=2))
+    assert [[e.id for e in batch] for batch in batches] == [
+        [e.id for e in events[1:3]],
+        [events[3].id],
+    ]
+    only_orders = outbox_service.read(topics=[outbox_service.ORDERS])
+    assert [e.type for e in only_orders] == ["order.created", "order.status_changed"]
+
+    result = runner.invoke(
+        args=["outbox", "tail", "--after", str(events[1].id), "--topic", "ratings"]
+    )
+    assert result.exit_code == 0
+    lines = [line for line in result.output.splitlines() if line.startswith("{")]
+    assert len(lines) == 1 and '"type": "rating.added"' in lines[0]
+
+    # Reads stop at the first event whose transaction may not have ended, so
+    # one committed out of offset order is not skipped
+    app.config["OUTBOX_SETTLE_SECONDS"] = 60
+    events[0].created_at = events[2].created_at = datetime.now() - timedelta(minutes=5)
+    db.session.commit()
+    assert [e.id for e in outbox_service.read()] == [events[0].id]
+    assert outbox_service.latest_offset() == events[1].id - 1
+
+    assert outbox_service.prune() == 0
+    OutboxEvent.query.update({"created_at": datetime.now() - timedelta(days=30)})
+    db.session.commit()
+    assert outbox_service.prune() == 4
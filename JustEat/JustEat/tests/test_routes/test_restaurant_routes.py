@@ -1,3 +1,14 @@
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import Order, OrderItem, OrderStatus
+from app.services import cart_service as cart_svc
+from app.services import order_event_service
+from app.services import order_service as order_svc
+
+
 def test_restaurant_not_found(client, login_user, owner_a):
     login_user(owner_a)
     response = client.get("/restaurants/unknown-restaurant-90", follow_redirects=True)
@@ -48,3 +59,149 @@ def test_update_restaurant_details(client, login_user, owner_a, restaurant_a):
     assert response.status_code == 200
     assert b"Restaurant details updated successfully" in response.data
     # assert response.request.path == f"/restaurants/{restaurant_a.slug}/cuisines"
+
+
+def test_order_board_pages_and_filters(
+    app, client, login_user, count_statements, owner_a, customer_a, restaurant_a, menu_a
+):
+    statuses = [OrderStatus.PENDING, OrderStatus.DELIVERED, OrderStatus.CANCELLED] * 2
+    for day, status in enumerate(statuses, start=1):
+        order = Order(
+            customer_id=customer_a.id,
+            restaurant_id=restaurant_a.id,
+            total=10,
+            status=status,
+            created_at=datetime(2025, 1, day, 12, 0),
+        )
+        order.items = [
+            OrderItem(menu_item_id=item.id, name=item.name, quantity=1, price_at_order=5)
+            for item in menu_a
+        ]
+        db.session.add(order)
+    db.session.commit()
+    login_user(owner_a)
+    url = f"/restaurants/{restaurant_a.slug}/orders"
+
+    def board(size, query=""):
+        app.config["PAGE_SIZE"] = size
+        db.session.expire_all()
+        response, count = count_statements(client.get, url + query)
+        return response.data, count
+
+    small, small_count = board(2)
+    large, large_count = board(6)
+    assert small.count(b"Order # ") == 2
+    assert b"Older orders" in small
+    assert large.count(b"Order # ") == 6
+    # Customers and order lines are loaded per page, not per order
+    assert small_count == large_count
+
+    pending, _ = board(6, "?status=pending")
+    assert pending.count(b"Order # ") == 2
+    january, _ = board(6, "?status=delivered&from=2025-01-02&to=2025-01-04")
+    assert january.count(b"Order # ") == 1
+    assert b"Order # 2<" in january
+
+
+def test_order_status_changes_reject_lost_updates(
+    client, login_user, owner_a, customer_a, restaurant_a
+):
+    order = Order(customer_id=customer_a.id, restaurant_id=restaurant_a.id, total=10)
+    db.session.add(order)
+    db.session.commit()
+    login_user(owner_a)
+    url = f"/restaurants/{restaurant_a.slug}/orders/{order.id}"
+
+    # The card offers exactly the allowed next statuses
+    card = client.get(f"{url}/card").data
+    assert card.count(b'name="version" value="1"') == len(order.next_statuses)
+    assert f"{url}/delivered".encode() in card and f"{url}/cancelled".encode() in card
+    # A version that was never current is stale, not "use the loaded one"
+    assert order_svc.update_order_status(order, "delivered", version=0) is None
+
+    # Two tabs rendered at version 1; the second one to submit loses
+    response = client.post(f"{url}/delivered", data={"version": 1}, follow_redirects=True)
+    assert b"Order status updated successfully" in response.data
+    response = client.post(f"{url}/cancelled", data={"version": 1}, follow_redirects=True)
+    assert b"Failed to update order status" in response.data
+    db.session.refresh(order)
+    assert (order.status, order.version) == (OrderStatus.DELIVERED, 2)
+
+    # A write that lands after the order was read is not overwritten either
+    racing = Order(customer_id=customer_a.id, restaurant_id=restaurant_a.id, total=10)
+    db.session.add(racing)
+    db.session.commit()
+    assert racing.status == OrderStatus.PENDING
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(Order)
+            .where(Order.id == racing.id)
+            .values(status=OrderStatus.CANCELLED, version=2)
+        )
+    assert order_svc.update_order_status(racing, "delivered") is None
+    db.session.refresh(racing)
+    assert (racing.status, racing.version) == (OrderStatus.CANCELLED, 2)
+
+    # Terminal statuses have no way out
+    assert order_svc.update_order_status(order, "pending") is None
+
+
+def test_order_stream_pushes_new_orders_and_status_changes(
+    app, client, login_user, owner_a, customer_a, restaurant_a, menu_a
+):
+    app.config["ORDER_STREAM_HEARTBEAT"] = 0.01
+    login_user(owner_a)
+    response = client.get(f"/restaurants/{restaurant_a.slug}/orders/stream", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    topic = order_event_service.restaurant_topic(restaurant_a.id)
+    assert order_event_service.get_hub().subscriber_count(topic) == 1
+
+    cart_svc.add_to_cart(customer_a, menu_a[0].id, restaurant_a.id)
+    order = order_svc.place_order(customer_a, cart_svc.get_checkout_cart(customer_a))
+    client.post(
+        f"/restaurants/{restaurant_a.slug}/orders/{order.id}/delivered",
+        data={"version": 1},
+    )
+
+    messages = response.iter_encoded()
+    assert next(messages).startswith(b"retry: ")
+    created, delivered = next(messages), next(messages)
+    assert b'"type": "created"' in created and b'"status": "pending"' in created
+    assert b'"type": "status"' in delivered and b'"status": "delivered"' in delivered
+    assert next(messages) == b": keep-alive\n\n"
+
+    # The board fetches the card of each order it is told about
+    card = client.get(f"/restaurants/{restaurant_a.slug}/orders/{order.id}/card")
+    assert f'id="order-{order.id}"'.encode() in card.data
+    assert b"Delivered" in card.data
+
+    response.close()
+    assert order_event_service.get_hub().subscriber_count(topic) == 0
+
+
+def test_order_stream_resyncs_a_reconnect_that_missed_events(
+    app, client, login_user, owner_a, customer_a, restaurant_a, menu_a
+):
+    app.config["ORDER_STREAM_HEARTBEAT"] = 0.01
+    login_user(owner_a)
+    url = f"/restaurants/{restaurant_a.slug}/orders/stream"
+
+    def first_messages(**headers):
+        response = client.get(url, headers=headers, buffered=False)
+        messages = response.iter_encoded()
+        opening, following = next(messages), next(messages)
+        response.close()
+        return opening, following
+
+    opening, _ = first_messages()
+    last_event_id = opening.split(b"id: ")[1].split(b"\n")[0].decode()
+
+    # Nothing happened while the browser was away
+    _, following = first_messages(**{"Last-Event-ID": last_event_id})
+    assert following == b": keep-alive\n\n"
+
+    # An order was placed in the gap between two connections
+    cart_svc.add_to_cart(customer_a, menu_a[0].id, restaurant_a.id)
+    order_svc.place_order(customer_a, cart_svc.get_checkout_cart(customer_a))
+    _, following = first_messages(**{"Last-Event-ID": last_event_id})
+    assert following.startswith(b"event: resync")
@@ -0,0 +1,289 @@
+from app.extensions import db
+from app.models import MenuItem
+from app.services import geo_index
+from app.services import menu_item_service as menu_item_svc
+from app.services import restaurant_service as restaurant_svc
+from app.services import search_cache
+from app.services import search_service as search_svc
+from app.services.search_index import LikeSearchBackend
+
+
+def test_search_matches_menu_item_name(client, login_user, customer_a, menu_a):
+    login_user(customer_a)
+    response = client.get("/search?q=pizz", follow_redirects=True)
+    assert response.status_code == 200
+    assert b"Pizza" in response.data
+    assert b"Burger" not in response.data
+
+
+def test_search_matches_description(client, login_user, customer_a, menu_a):
+    login_user(customer_a)
+    response = client.get("/search?q=juicy", follow_redirects=True)
+    assert response.status_code == 200
+    assert b"Burger" in response.data
+
+
+def test_search_index_follows_updates(client, login_user, customer_a, menu_a):
+    menu_a[0].name = "Lasagne"
+    menu_a[0].description = "Baked layered pasta"
+    db.session.commit()
+
+    login_user(customer_a)
+    response = client.get("/search?q=lasagne", follow_redirects=True)
+    assert b"Lasagne" in response.data
+
+    response = client.get("/search?q=pizza", follow_redirects=True)
+    assert b"Nothing Found" in response.data
+
+
+def test_search_finds_active_restaurant(client, login_user, customer_a, restaurant_a):
+    restaurant_a.is_active = True
+    db.session.commit()
+
+    login_user(customer_a)
+    response = client.get("/search?q=testv", follow_redirects=True)
+    assert response.status_code == 200
+    assert b"Testaurant" in response.data
+
+
+def test_search_corrects_misspelled_query(client, login_user, customer_a, menu_a):
+    login_user(customer_a)
+    response = client.get("/search?q=buger", follow_redirects=True)
+    assert response.status_code == 200
+    assert b"Showing results for" in response.data
+    assert b"Burger" in response.data
+
+
+def test_search_ranks_name_hits_first(client, login_user, customer_a, menu_a):
+    side = MenuItem(
+        name="Garlic Bread",
+        description="Goes great with pizza",
+        price=3.99,
+        cuisine_id=menu_a[0].cuisine_id,
+        category_id=menu_a[0].category_id,
+        restaurant_id=menu_a[0].restaurant_id,
+        avg_rating=5.0,
+        rating_count=40,
+        rank_score=4.7,
+    )
+    db.session.add(side)
+    db.session.commit()
+
+    login_user(customer_a)
+    response = client.get("/search?q=pizza", follow_redirects=True)
+    assert b"Garlic Bread" in response.data
+    assert response.data.index(b"Pizza") < response.data.index(b"Garlic Bread")
+
+
+def test_search_suggestions(client, login_user, customer_a, menu_a):
+    login_user(customer_a)
+    response = client.get("/search/suggest?q=piz")
+    assert response.status_code == 200
+    labels = [s["label"] for s in response.get_json()["suggestions"]]
+    assert "Pizza" in labels
+    assert "Burger" not in labels
+
+
+def test_search_suggestions_follow_menu_changes(
+    client, login_user, customer_a, menu_a
+):
+    login_user(customer_a)
+    assert client.get("/search/suggest?q=burg").get_json()["suggestions"]
+
+    menu_item_svc.update_item_active_status(menu_a[1], False)
+    assert not client.get("/search/suggest?q=burg").get_json()["suggestions"]
+
+    menu_item_svc.update_menu_item(
+        menu_a[0].id, "Calzone", "", 9.99,
+        menu_a[0].cuisine_id, menu_a[0].category_id, False,
+    )
+    labels = [s["label"] for s in client.get("/search/suggest?q=c").get_json()["suggestions"]]
+    assert "Calzone" in labels
+    assert not client.get("/search/suggest?q=pizz").get_json()["suggestions"]
+
+
+def test_search_facets_count_the_restaurants_each_option_lists(app, restaurant_a, menu_a):
+    # Testaurant serves cuisines 1 and 2, with dishes at 10.99 and 8.99
+    restaurant_a.is_active = True
+    db.session.commit()
+
+    facets = search_svc.get_search_facets(cuisine_ids=["3"])
+    # Cuisine counts ignore the cuisine filter, other facets respect it
+    assert facets["cuisines"] == {1: 1, 2: 1}
+    assert facets["restaurants"] == {}
+    assert [band["count"] for band in facets["prices"]] == [0, 0, 0, 0, 0]
+
+    facets = search_svc.get_search_facets(price_min=10, price_max=20)
+    assert facets["restaurants"] == {restaurant_a.id: 1}
+    assert [band["count"] for band in facets["prices"]] == [1, 1, 0, 0, 0]
+    restaurants, _ = search_svc.get_filtered_search_results(price_min=10, price_max=20)
+    assert [r.id for r in restaurants] == [restaurant_a.id]
+
+    facets = search_svc.get_search_facets(price_min=50)
+    assert facets["cuisines"] == {} and facets["restaurants"] == {}
+    restaurants, _ = search_svc.get_filtered_search_results(price_min=50)
+    assert not restaurants
+
+    # Cached until a catalogue write, and inactive restaurants are not counted
+    assert app.extensions["search_cache"].get_facets(
+        search_cache.make_key(None, [3], [], None, None, None, None)
+    )
+    restaurant_svc.update_restaurant_status(restaurant_a, False)
+    facets = search_svc.get_search_facets(cuisine_ids=["3"])
+    assert facets["cuisines"] == {}
+
+
+def test_home_shows_price_bands(client, login_user, customer_a, restaurant_a, menu_a):
+    restaurant_a.is_active = True
+    login_user(customer_a)
+    response = client.get("/home")
+    assert response.status_code == 200
+    assert b'data-min="0" data-max="10"' in response.data
+    assert b'data-min="10" data-max="20"' in response.data
+
+
+
+def test_search_page_counts_facets_for_the_query(
+    client, login_user, customer_a, restaurant_a, menu_a, cuisines
+):
+    restaurant_a.is_active = True
+    db.session.commit()
+    login_user(customer_a)
+
+    facets = search_svc.get_search_facets(query="testaurant")
+    assert facets["cuisines"] == {1: 1, 2: 1}
+    assert search_svc.get_search_facets(query="nowhere")["cuisines"] == {}
+
+    response = client.get("/search?q=testaurant")
+    assert response.status_code == 200
+    assert f"cuisine={cuisines[0].id}".encode() in response.data
+    assert b"price_min=10&amp;price_max=20" in response.data
+
+    # Picking an option filters the results it counted
+    response = client.get("/search?q=testaurant&price_min=50")
+    assert b"Nothing Found" in response.data
+
+
+def test_search_cache_drops_price_filtered_entries_on_repricing(
+    app, restaurant_a, menu_a, cuisines
+):
+    # The restaurant matches the cuisine filter, none of its dishes do
+    restaurant_a.is_active = True
+    pizza, burger = menu_a
+    pizza.cuisine_id = burger.cuisine_id = cuisines[2].id
+    db.session.commit()
+
+    def search():
+        restaurants, _ = search_svc.get_filtered_search_results(
+            cuisine_ids=[str(cuisines[0].id)], price_min=50
+        )
+        return [r.id for r in restaurants]
+
+    assert search() == []
+    menu_item_svc.update_menu_item(
+        pizza.id, "Pizza", "", 55, pizza.cuisine_id, pizza.category_id, False
+    )
+    assert search() == [restaurant_a.id]
+    menu_item_svc.update_item_active_status(pizza, False)
+    assert search() == []
+
+
+def test_search_pages_keep_the_first_page_ranking(app, menu_a):
+    app.config["SEARCH_RESULT_LIMIT"] = 1
+    pizza, burger = menu_a
+    first = search_svc.search_menu_items_filtered()
+    assert [item.id for item in first] == [pizza.id]
+
+    # The burger now outranks the pizza, but the next page is cut from
+    # the ranking the reader started with, so nothing is skipped or repeated
+    burger.recent_sales = 100
+    db.session.commit()
+    second = search_svc.search_menu_items_filtered(cursor=first.next_cursor)
+    assert [item.id for item in second] == [burger.id]
+    assert second.next_cursor is None
+
+    # A fresh search sees the new ranking
+    assert [item.id for item in search_svc.search_menu_items_filtered()] == [burger.id]
+
+def test_search_cache_serves_repeat_queries(app, menu_a):
+    cache = app.extensions["search_cache"]
+    _, items = search_svc.get_filtered_search_results(query="Pizza ")
+    assert [item.name for item in items] == ["Pizza"]
+    assert len(cache) == 1
+
+    # Equivalent query hits the same entry
+    _, items = search_svc.get_filtered_search_results(query="pizza")
+    assert [item.name for item in items] == ["Pizza"]
+    assert len(cache) == 1
+
+
+def test_search_cache_invalidated_by_menu_writes(app, menu_a, cuisines, categories):
+    cache = app.extensions["search_cache"]
+    restaurant_id = menu_a[0].restaurant_id
+    search_svc.get_filtered_search_results(query="pizza")
+    search_svc.get_filtered_search_results(query="burger")
+    assert len(cache) == 2
+
+    # A new pizza only affects the pizza search
+    menu_item_svc.create_menu_item(
+        restaurant_id, "Pepperoni Pizza", "Spicy", 12.5, cuisines[0].id, categories[0].id
+    )
+    assert len(cache) == 1
+    _, items = search_svc.get_filtered_search_results(query="pizza")
+    assert {item.name for item in items} == {"Pizza", "Pepperoni Pizza"}
+
+    # Hiding the burger drops the burger search
+    menu_item_svc.update_item_active_status(menu_a[1], False)
+    _, items = search_svc.get_filtered_search_results(query="burger")
+    assert not items
+
+
+def test_search_ignores_accents_and_case(app, menu_a):
+    pizza = menu_a[0]
+    pizza.name = "Crème Brûlée"
+    db.session.commit()
+    assert pizza.name_normalized == "creme brulee"
+
+    _, items = search_svc.get_filtered_search_results(query="CREME brulee")
+    assert [item.name for item in items] == ["Crème Brûlée"]
+
+
+def test_like_backend_matches_normalized_names(app, menu_a):
+    menu_a[1].name = "Jalapeño Burger"
+    db.session.commit()
+
+    app.extensions["search_backend"] = LikeSearchBackend()
+    _, items = search_svc.get_filtered_search_results(query="jalapeno")
+    assert [item.name for item in items] == ["Jalapeño Burger"]
+
+
+def test_near_me_search_keeps_dishes_inside_the_circle(app, restaurant_a, menu_a):
+    restaurant_a.is_active = True
+    restaurant_svc.set_coordinates(restaurant_a, 28.6315, 77.2167)
+    db.session.commit()
+    here = geo_index.NearBy(28.6304, 77.2177, 3.0)
+    gurugram = geo_index.NearBy(28.4595, 77.0266, 3.0)
+
+    restaurants, items = search_svc.get_filtered_search_results(near=here)
+    assert [r.id for r in restaurants] == [restaurant_a.id]
+    assert {item.id for item in items} == {item.id for item in menu_a}
+
+    restaurants, items = search_svc.get_filtered_search_results(near=gurugram)
+    assert not restaurants and not items
+
+    # Listings that only show restaurants skip the dish search
+    restaurants, items = search_svc.get_filtered_search_results(
+        near=here, with_menu_items=False
+    )
+    assert [r.id for r in restaurants] == [restaurant_a.id] and not items
+
+
+def test_search_suggestions_from_database(app, client, login_user, customer_a, menu_a):
+    app.config["AUTOCOMPLETE_IN_MEMORY"] = False
+    login_user(customer_a)
+    labels = [s["label"] for s in client.get("/search/suggest?q=PIZ").get_json()["suggestions"]]
+    assert labels == ["Pizza"]
+
+    # Reads go to the database, so other workers' writes show up at once
+    menu_item_svc.update_item_active_status(menu_a[1], False)
+    assert not client.get("/search/suggest?q=burg").get_json()["suggestions"]